@@ -0,0 +1,683 @@
+'''
+Benchmarks for CheersBot's hot paths.
+
+Run with:
+    python benchmark.py
+    python benchmark.py --eggs 1000 --legacy-sample 5
+    python benchmark.py --suite offline --scales 1,100,10000
+    python benchmark.py --suite offline --save-baseline v1.0     # store the results under a label
+    python benchmark.py --suite offline --compare v1.0           # flag regressions against that label
+    python benchmark.py --suite sharded --workers 1,2,4 --scales 10000
+
+The offline suite drives the real bot code against stand-ins for Discord guilds, voice channels,
+voice clients and interactions, so it needs no bot token and no network connection. Audio is a
+stand-in too: plays "send" a fixed number of silent frames as fast as they can be read.
+
+The sharded suite runs one auto-join across several worker processes, each owning a share of the
+stand-in guilds and claiming its fires in a shared state database the way sharded workers do.
+With --overlap every worker is handed every guild, to check that each guild still plays once.
+'''
+
+import argparse
+import asyncio
+import contextlib
+import json
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import timedelta
+
+try:
+    import psutil  # Optional, for the current RSS
+except ImportError:
+    psutil = None
+
+try:
+    import resource  # Not on Windows; gives the peak RSS when psutil is missing
+except ImportError:
+    resource = None
+
+import discord
+
+import cheersbot
+
+# Timezones the benchmark eggs pick from: a mix of abbreviations and full names
+BENCH_TIMEZONES = ["CST", "JST", "EST", "PST", "ACST", "America/Chicago", "Europe/London", "Asia/Tokyo", "UTC"]
+
+# Stored results of earlier runs, by label
+BASELINE_FILE = os.path.join(cheersbot.BASE_DIR, "benchmark_baselines.json")
+
+# A benchmark counts as regressed when its p99 or throughput is this much worse than the baseline
+REGRESSION_THRESHOLD = 0.20
+
+# Default guild / Easter egg counts for the offline suite
+DEFAULT_SCALES = "1,10,100,1000,10000"
+
+# Default worker process counts for the sharded suite
+DEFAULT_WORKERS = "1,2,4"
+
+# Result fields every benchmark reports; anything else is printed after them
+REPORT_COLUMNS = ("ops", "seconds", "ops_per_sec", "p50_ms", "p99_ms", "cpu_seconds", "rss_mb")
+
+# Frames each stand-in play sends (50 frames = one second of audio)
+FAKE_SOUND_FRAMES = 50
+
+# Build a list of eggs spread over the day and over the benchmark timezones
+def make_eggs(count):
+    eggs = []
+    for i in range(count):
+        hour = random.randint(1, 12)
+        minute = random.randint(0, 59)
+        period = random.choice(["AM", "PM"])
+        eggs.append(cheersbot.EasterEgg(
+            name=f"bench-{i}",
+            sound="Cheers_Bitch",
+            join_time=f"{hour}:{minute:02d} {period}",
+            play_delay=0,
+            timezone=random.choice(BENCH_TIMEZONES)
+        ))
+    return eggs
+
+# Old behaviour: every conversion rebuilt the abbreviation index and looked the timezone up again
+def legacy_converted_time(egg):
+    tz_name = egg.timezone
+    abbreviation_mapping = cheersbot.build_timezone_mapping()
+    if tz_name in abbreviation_mapping:
+        tz_name = abbreviation_mapping[tz_name]
+    tz = cheersbot.pytz.timezone(tz_name)
+    join_time = cheersbot.datetime.strptime(egg.join_time, "%I:%M %p")
+    now = cheersbot.datetime.now(tz)
+    join_time = join_time.replace(year=now.year, month=now.month, day=now.day)
+    return tz.localize(join_time).astimezone(cheersbot.pytz.utc)
+
+# One easter egg tick converts every egg's join time twice (can_trigger, then the time check)
+def run_tick(eggs, convert):
+    start = time.perf_counter()
+    for egg in eggs:
+        convert(egg)
+        convert(egg)
+    return time.perf_counter() - start
+
+def bench_timezones(egg_count, legacy_sample, ticks):
+    eggs = make_eggs(egg_count)
+
+    start = time.perf_counter()
+    cheersbot.timezone_resolver.warm()
+    warm_time = time.perf_counter() - start
+
+    resolver_ticks = [run_tick(eggs, lambda egg: egg.get_converted_time()) for _ in range(ticks)]
+
+    # The legacy path is far too slow to run at full size, so time a sample and scale it up
+    sample = eggs[:legacy_sample]
+    legacy_sample_time = run_tick(sample, legacy_converted_time)
+    legacy_tick = legacy_sample_time / len(sample) * egg_count
+
+    best_tick = min(resolver_ticks)
+    print(f"Timezone resolver, {egg_count} eggs:")
+    print(f"  index build (once):      {warm_time * 1000:10.2f} ms")
+    print(f"  per tick (resolver):     {best_tick * 1000:10.2f} ms  (best of {ticks})")
+    print(f"  per tick (legacy, est.): {legacy_tick * 1000:10.2f} ms  (from {len(sample)} eggs)")
+    print(f"  speedup:                 {legacy_tick / best_tick:10.1f}x")
+
+'''
+Stand-ins for the parts of Discord the bot talks to
+'''
+
+class FakeMember:
+    def __init__(self, member_id):
+        self.id = member_id
+        self.name = f"member-{member_id}"
+        self.roles = []
+
+class FakeAudio(discord.AudioSource):
+    """A sound of FAKE_SOUND_FRAMES silent Opus frames."""
+
+    def __init__(self, frames=FAKE_SOUND_FRAMES):
+        self._frames = frames
+
+    def read(self):
+        if self._frames <= 0:
+            return b''
+        self._frames -= 1
+        return b'\xf8\xff\xfe'
+
+    def is_opus(self):
+        return True
+
+class FakeVoiceClient:
+    """Plays sources on the event loop instead of a player thread, then calls `after` like discord.py does."""
+
+    def __init__(self, channel):
+        self.channel = channel
+        self._connected = True
+        self._playing = False
+
+    def is_connected(self):
+        return self._connected
+
+    def is_playing(self):
+        return self._playing
+
+    async def move_to(self, channel):
+        self.channel = channel
+
+    async def disconnect(self, force=False):
+        self._connected = False
+        if self.channel.guild.voice_client is self:
+            self.channel.guild.voice_client = None
+
+    def play(self, source, after=None):
+        if self._playing:
+            raise discord.ClientException("Already playing audio.")
+        self._playing = True
+        asyncio.get_running_loop().call_soon(self._drain, source, after)
+
+    def _drain(self, source, after):
+        while source.read():
+            pass
+        source.cleanup()
+        self._playing = False
+        if after is not None:
+            after(None)
+
+class FakeVoiceChannel(discord.VoiceChannel):
+    """A voice channel with a fixed member list; connecting takes `connect_latency` seconds."""
+
+    def __init__(self, guild, channel_id, position, member_count, connect_latency=0.0):
+        self.guild = guild
+        self.id = channel_id
+        self.name = f"voice-{position}"
+        self.position = position
+        self._members = [FakeMember(channel_id * 100 + i) for i in range(member_count)]
+        self._connect_latency = connect_latency
+
+    @property
+    def members(self):
+        return self._members
+
+    async def connect(self, *, reconnect=True, self_deaf=False, **kwargs):
+        if self._connect_latency:
+            await asyncio.sleep(self._connect_latency)
+        self.guild.voice_client = FakeVoiceClient(self)
+        return self.guild.voice_client
+
+class FakeGuild:
+    def __init__(self, guild_id, channel_count=5, connect_latency=0.0):
+        self.id = guild_id
+        self.name = f"guild-{guild_id}"
+        self.afk_channel = None
+        self.voice_client = None
+        self.voice_channels = [
+            FakeVoiceChannel(self, guild_id * 1000 + position, position, random.randint(0, 10), connect_latency)
+            for position in range(channel_count)
+        ]
+        self._channels = {channel.id: channel for channel in self.voice_channels}
+
+    def get_channel(self, channel_id):
+        return self._channels.get(channel_id)
+
+class FakeTextChannel:
+    def __init__(self, channel_id):
+        self.id = channel_id
+        self.name = "bot-log"
+        self.sent_messages = 0
+
+    async def send(self, *args, **kwargs):
+        self.sent_messages += 1
+
+class FakeBot:
+    """Just enough of commands.Bot for the code paths under benchmark."""
+
+    def __init__(self, guilds):
+        self.guilds = guilds
+        self._guilds = {guild.id: guild for guild in guilds}
+        self.log_channel = FakeTextChannel(0)
+
+    def get_guild(self, guild_id):
+        return self._guilds.get(guild_id)
+
+    def get_channel(self, channel_id):
+        return self.log_channel  # Every channel lookup outside a guild is the log channel
+
+class FakeResponse:
+    def __init__(self):
+        self._done = False
+
+    def is_done(self):
+        return self._done
+
+    async def send_message(self, *args, **kwargs):
+        self._done = True
+
+    async def defer(self, *args, **kwargs):
+        self._done = True
+
+class FakeFollowup:
+    async def send(self, *args, **kwargs):
+        pass
+
+class FakeInteraction:
+    def __init__(self, guild, user):
+        self.guild = guild
+        self.guild_id = guild.id
+        self.user = user
+        self.response = FakeResponse()
+        self.followup = FakeFollowup()
+
+class SimulatedClock:
+    """A UTC clock that only moves when told to; pass it as a scheduler's `clock`."""
+
+    def __init__(self, start=None):
+        self.now = start or cheersbot.utc_now()
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += timedelta(seconds=seconds)
+
+    def set(self, when):
+        self.now = max(self.now, when)
+
+'''
+Offline suite
+'''
+
+# Send the bot's per-play console output nowhere while a benchmark runs
+@contextlib.contextmanager
+def quiet():
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+def current_rss_mb():
+    if psutil is not None:
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    if resource is not None:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # Peak, in KB on Linux
+    return None
+
+class Measurement:
+    """Collects per-operation latencies, wall time and CPU time for one benchmark at one scale."""
+
+    def __init__(self, name, scale):
+        self.name = name
+        self.scale = scale
+        self.latencies = []
+
+    def __enter__(self):
+        self._cpu_start = time.process_time()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.elapsed = time.perf_counter() - self._start
+        self.cpu = time.process_time() - self._cpu_start
+
+    @contextlib.contextmanager
+    def op(self):
+        start = time.perf_counter()
+        yield
+        self.latencies.append(time.perf_counter() - start)
+
+    def result(self, ops=None):
+        ops = ops if ops is not None else len(self.latencies)
+        latencies = sorted(self.latencies)
+        rss = current_rss_mb()
+        return {
+            "ops": ops,
+            "seconds": round(self.elapsed, 6),
+            "ops_per_sec": round(ops / self.elapsed, 1) if self.elapsed > 0 else None,
+            "p50_ms": round(percentile(latencies, 0.50) * 1000, 4),
+            "p99_ms": round(percentile(latencies, 0.99) * 1000, 4),
+            "cpu_seconds": round(self.cpu, 4),
+            "rss_mb": round(rss, 1) if rss is not None else None
+        }
+
+def make_guilds(count, connect_latency):
+    return [FakeGuild(guild_id, connect_latency=connect_latency) for guild_id in range(1, count + 1)]
+
+# Point the bot's globals at the stand-ins; nothing touches Discord or the real data files
+def install_fakes(guilds, history_path):
+    cheersbot.bot = FakeBot(guilds)
+    cheersbot.voice_channel_indexes.clear()
+    cheersbot.voice_sessions = cheersbot.VoiceSessionManager(linger_seconds=0)
+    cheersbot.create_audio_source = lambda sound_path: FakeAudio()
+    cheersbot.save_easter_eggs = lambda: None
+    cheersbot.journal_easter_eggs = lambda eggs, deleted=False: None
+    cheersbot.log_sink = cheersbot.LogSink(max_queued=10 ** 6)
+    cheersbot.log_sink.start()
+    cheersbot.play_history = cheersbot.PlayHistory(history_path)
+    cheersbot.play_history.start()
+    cheersbot.guild_settings = cheersbot.GuildSettingsStore(os.path.join(os.path.dirname(history_path), "guild_settings.db"))
+
+# Cancel a background task and wait for it; asyncio.wait_for can swallow a cancel that lands as it completes
+async def stop_task(task):
+    while task is not None and not task.done():
+        task.cancel()
+        await asyncio.wait([task], timeout=0.1)
+
+# Stop what install_fakes started, so each scale starts clean and the event loop can shut down
+async def remove_fakes():
+    await stop_task(cheersbot.log_sink._task)
+    for session in cheersbot.voice_sessions.sessions.values():
+        await stop_task(session.worker)
+        await stop_task(session.linger)
+    cheersbot.play_history.close()
+
+async def bench_choose_sound(guilds):
+    """One pick per guild through its own settings, as a /cheers or a test play does."""
+    with Measurement("choose_sound", len(guilds)) as m:
+        for guild in guilds:
+            with m.op():
+                cheersbot.choose_sound(guild.id)
+    return m.result()
+
+async def bench_choose_sounds(guilds, rounds=20):
+    """The batch pick an auto-join run makes: one sound for every guild at once."""
+    guild_ids = [guild.id for guild in guilds]
+    with Measurement("choose_sounds", rounds) as m:
+        for _ in range(rounds):
+            with m.op():
+                cheersbot.choose_sounds(guild_ids)
+    return m.result()
+
+async def bench_log_action(scale, guilds):
+    with Measurement("log_action", scale) as m:
+        for i in range(scale):
+            channel = guilds[i % len(guilds)].voice_channels[0]
+            with m.op():
+                await cheersbot.log_action(
+                    voice_channel=channel,
+                    sound_name="Cheers_Bitch.mp3",
+                    is_easter_egg=False,
+                    mode="randomize",
+                    join_time=cheersbot.datetime.now(),
+                    leave_time=cheersbot.datetime.now()
+                )
+    return m.result()
+
+async def bench_auto_join(guilds):
+    """One auto-join run across every guild: connect, play at the same moment, log."""
+    connect_slots = asyncio.Semaphore(cheersbot.AUTO_JOIN_MAX_CONCURRENT_CONNECTS)
+    play_time = cheersbot.utc_now()
+
+    async def one_guild(guild, sound, m):
+        with m.op():
+            return await cheersbot.auto_join_guild(guild, sound, play_time, connect_slots, 0)
+
+    with Measurement("auto_join_task", len(guilds)) as m:
+        sounds = cheersbot.choose_sounds([guild.id for guild in guilds])
+        skews = await asyncio.gather(*(one_guild(guild, sounds[guild.id], m) for guild in guilds))
+    result = m.result()
+    skews = sorted(skew for skew in skews if skew is not None)
+    result["played"] = len(skews)
+    result["skew_p99_ms"] = round(percentile(skews, 0.99) * 1000, 4)
+    return result
+
+async def bench_easter_egg_task(scale):
+    """A simulated day of the Easter egg scheduler with `scale` eggs, jumping straight from one fire time to the next."""
+    eggs = make_eggs(scale)
+    clock = SimulatedClock()
+    scheduler = cheersbot.EasterEggScheduler(clock=clock)
+    end = clock.now + timedelta(days=1)
+
+    fired = 0
+    with Measurement("easter_egg_task", scale) as m:
+        with m.op():
+            scheduler.reschedule_all(eggs)
+        while True:
+            next_fire_time = scheduler.next_fire_time()
+            if next_fire_time is None or next_fire_time > end:
+                break
+            clock.set(next_fire_time)
+            with m.op():
+                fired += len(scheduler.tick())
+    result = m.result(ops=fired)
+    result["ticks"] = len(m.latencies) - 1
+    return result
+
+async def bench_easter_egg_lookup(scale):
+    """Case-insensitive name lookups in a registry of `scale` eggs, and how much memory each egg takes."""
+    tracemalloc.start()
+    eggs = cheersbot.EasterEggRegistry(make_eggs(scale))
+    bytes_per_egg = tracemalloc.get_traced_memory()[0] / scale
+    tracemalloc.stop()
+
+    names = [f"BENCH-{random.randrange(scale)}" for _ in range(scale)]
+    with Measurement("easter_egg_lookup", scale) as m:
+        for name in names:
+            with m.op():
+                eggs.find(name)
+    result = m.result()
+    result["bytes_per_egg"] = round(bytes_per_egg)
+    return result
+
+async def bench_easter_egg_journal(scale, directory):
+    """Journaling one fire at a time (append and fsync) with `scale` eggs, against rewriting the whole file once."""
+    eggs = make_eggs(scale)
+    data = [cheersbot.easter_egg_to_json(egg) for egg in eggs]
+    journal = cheersbot.EasterEggJournal(
+        os.path.join(directory, f"journal-{scale}.log"), os.path.join(directory, f"easter_eggs-{scale}.json")
+    )
+    fires = min(scale, 200)
+
+    with Measurement("easter_egg_journal", fires) as m:
+        for egg in eggs[:fires]:
+            egg.mark_triggered()
+            with m.op():
+                journal.append({"op": "fired", "name": egg.name, "last_triggered": egg.last_triggered.isoformat()})
+                journal.flush()
+    result = m.result()
+
+    start = time.perf_counter()
+    journal.compact(data)
+    result["full_save_ms"] = round((time.perf_counter() - start) * 1000, 3)
+    return result
+
+async def bench_commands(guilds):
+    """Each slash command once per guild, run the way discord.py would call them once the checks pass."""
+    user = FakeMember(1)
+    commands = [
+        ("/cheers", lambda interaction: cheersbot.cheers.callback(interaction, interaction.guild.voice_channels[0])),
+        ("/sounds", lambda interaction: cheersbot.sounds.callback(interaction)),
+        ("/easteregg", lambda interaction: cheersbot.easteregg.callback(interaction)),
+        ("/autojoin_status", lambda interaction: cheersbot.autojoin_status.callback(interaction))
+    ]
+
+    results = {}
+    for name, invoke in commands:
+        with Measurement(name, len(guilds)) as m:
+            for guild in guilds:
+                interaction = FakeInteraction(guild, user)
+                with m.op():
+                    await invoke(interaction)
+        results[name] = m.result()
+    return results
+
+async def run_offline_suite(scales, connect_latency):
+    results = {}
+    history_dir = tempfile.mkdtemp(prefix="cheersbot-bench-")
+    cheersbot.easter_eggs = cheersbot.EasterEggRegistry(make_eggs(50))
+    cheersbot.timezone_resolver.warm()  # Done once at startup by the bot, so keep it out of the timings
+
+    for scale in scales:
+        guilds = make_guilds(scale, connect_latency)
+        install_fakes(guilds, os.path.join(history_dir, f"history-{scale}.db"))
+        with quiet():
+            scale_results = {
+                "choose_sound": await bench_choose_sound(guilds),
+                "choose_sounds": await bench_choose_sounds(guilds),
+                "log_action": await bench_log_action(scale, guilds),
+                "auto_join_task": await bench_auto_join(guilds),
+                "easter_egg_task": await bench_easter_egg_task(scale),
+                "easter_egg_lookup": await bench_easter_egg_lookup(scale),
+                "easter_egg_journal": await bench_easter_egg_journal(scale, history_dir)
+            }
+            scale_results.update(await bench_commands(guilds))
+            await remove_fakes()
+
+        for name, result in scale_results.items():
+            key = f"{name}@{scale}"
+            results[key] = result
+            print_result(key, result)
+    return results
+
+def print_result(key, result):
+    extra = "".join(f"  {k}={v}" for k, v in result.items() if k not in REPORT_COLUMNS)
+    print(
+        f"{key:28} {result['ops']:>8} ops  {result['ops_per_sec'] or 0:>12.1f} ops/s  "
+        f"p50 {result['p50_ms']:>9.3f} ms  p99 {result['p99_ms']:>9.3f} ms  "
+        f"cpu {result['cpu_seconds']:>8.3f} s  rss {result['rss_mb']} MB{extra}"
+    )
+
+async def bench_sharded_auto_join(guilds, fire_time, start, history_path):
+    """This worker's part of one auto-join run: claim the guilds, then connect and play in the ones it won."""
+    install_fakes(guilds, history_path)
+    connect_slots = asyncio.Semaphore(cheersbot.AUTO_JOIN_MAX_CONCURRENT_CONNECTS)
+    start.wait()  # Every worker starts the run at the same moment
+    play_time = cheersbot.utc_now()
+
+    async def one_guild(guild, sound, m):
+        with m.op():
+            return await cheersbot.auto_join_guild(guild, sound, play_time, connect_slots, 0)
+
+    with Measurement("auto_join_sharded", len(guilds)) as m:
+        claimed = await cheersbot.claim_guilds("Auto-join", fire_time, guilds)
+        sounds = cheersbot.choose_sounds([guild.id for guild in claimed])
+        skews = await asyncio.gather(*(one_guild(guild, sounds[guild.id], m) for guild in claimed))
+    await remove_fakes()
+    return m, [skew for skew in skews if skew is not None]
+
+# One worker process of the sharded suite; runs in a fresh interpreter
+def run_sharded_worker(worker, workers, scale, connect_latency, overlap, state_path, history_path, fire_time, start, results):
+    with quiet():
+        cheersbot.shared_state = cheersbot.SharedState(state_path, worker=worker)
+        cheersbot.timezone_resolver.warm()
+        guilds = [
+            guild for guild in make_guilds(scale, connect_latency)
+            if overlap or guild.id % workers == worker  # Stand-in for the shard a guild belongs to
+        ]
+        m, skews = asyncio.run(bench_sharded_auto_join(guilds, fire_time, start, history_path))
+    results.put((m.elapsed, m.cpu, m.latencies, skews))
+
+def run_sharded_suite(scales, worker_counts, connect_latency, overlap):
+    results = {}
+    state_dir = tempfile.mkdtemp(prefix="cheersbot-bench-")
+    context = multiprocessing.get_context("spawn")
+    for scale in scales:
+        for workers in worker_counts:
+            state_path = os.path.join(state_dir, f"state-{scale}x{workers}.db")
+            start = context.Barrier(workers)
+            queue = context.Queue()
+            fire_time = cheersbot.utc_now()
+            processes = [
+                context.Process(target=run_sharded_worker, args=(
+                    worker, workers, scale, connect_latency, overlap, state_path,
+                    os.path.join(state_dir, f"history-{scale}x{workers}-{worker}.db"), fire_time, start, queue
+                ))
+                for worker in range(workers)
+            ]
+            for process in processes:
+                process.start()
+            parts = [queue.get() for _ in processes]
+            for process in processes:
+                process.join()
+
+            # The run takes as long as its slowest worker
+            elapsed = max(part[0] for part in parts)
+            latencies = sorted(latency for part in parts for latency in part[2])
+            skews = sorted(skew for part in parts for skew in part[3])
+            rss = current_rss_mb()
+            result = {
+                "ops": len(latencies),
+                "seconds": round(elapsed, 6),
+                "ops_per_sec": round(len(latencies) / elapsed, 1) if elapsed > 0 else None,
+                "p50_ms": round(percentile(latencies, 0.50) * 1000, 4),
+                "p99_ms": round(percentile(latencies, 0.99) * 1000, 4),
+                "cpu_seconds": round(sum(part[1] for part in parts), 4),
+                "rss_mb": round(rss, 1) if rss is not None else None,
+                "played": len(skews),
+                "duplicates": len(latencies) - scale,
+                "skew_p99_ms": round(percentile(skews, 0.99) * 1000, 4)
+            }
+            key = f"auto_join_sharded@{scale}x{workers}"
+            results[key] = result
+            print_result(key, result)
+    return results
+
+def load_baselines():
+    if not os.path.exists(BASELINE_FILE):
+        return {}
+    with open(BASELINE_FILE, "r") as f:
+        return json.load(f)
+
+def save_baseline(label, results):
+    baselines = load_baselines()
+    baselines[label] = {"recorded": cheersbot.utc_now().isoformat(), "results": results}
+    with open(BASELINE_FILE, "w") as f:
+        json.dump(baselines, f, indent=4)
+    print(f"Saved baseline '{label}' to {BASELINE_FILE}")
+
+# Print how each benchmark moved against a stored baseline; returns the keys that regressed
+def compare_baseline(label, results):
+    baselines = load_baselines()
+    if label not in baselines:
+        print(f"No baseline named '{label}' in {BASELINE_FILE}")
+        return []
+
+    regressions = []
+    print(f"Compared with baseline '{label}' ({baselines[label]['recorded']}):")
+    for key, result in results.items():
+        base = baselines[label]["results"].get(key)
+        if base is None:
+            continue
+        p99_change = (result["p99_ms"] - base["p99_ms"]) / base["p99_ms"] if base["p99_ms"] else 0.0
+        throughput_change = (
+            (result["ops_per_sec"] - base["ops_per_sec"]) / base["ops_per_sec"] if base["ops_per_sec"] else 0.0
+        )
+        regressed = p99_change > REGRESSION_THRESHOLD or throughput_change < -REGRESSION_THRESHOLD
+        if regressed:
+            regressions.append(key)
+        print(f"  {key:28} p99 {p99_change:+8.1%}  throughput {throughput_change:+8.1%}{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark CheersBot hot paths.")
+    parser.add_argument("--suite", choices=["timezones", "offline", "sharded", "all"], default="timezones", help="Which benchmarks to run.")
+    parser.add_argument("--eggs", type=int, default=1000, help="Number of easter eggs per tick.")
+    parser.add_argument("--legacy-sample", type=int, default=5, help="Eggs used to estimate the legacy tick cost.")
+    parser.add_argument("--ticks", type=int, default=5, help="Ticks to run with the resolver.")
+    parser.add_argument("--scales", default=DEFAULT_SCALES, help="Comma separated guild / Easter egg counts for the offline suite.")
+    parser.add_argument("--connect-latency", type=float, default=0.0, help="Seconds each stand-in voice connect takes.")
+    parser.add_argument("--workers", default=DEFAULT_WORKERS, help="Comma separated worker process counts for the sharded suite.")
+    parser.add_argument("--overlap", action="store_true", help="Sharded suite: hand every worker every guild, to check fires stay exactly once.")
+    parser.add_argument("--save-baseline", metavar="LABEL", help="Store the offline results under this label.")
+    parser.add_argument("--compare", metavar="LABEL", help="Compare the offline results with a stored baseline; exits 1 on a regression.")
+    args = parser.parse_args()
+
+    random.seed(420)
+    if args.suite in ("timezones", "all"):
+        bench_timezones(args.eggs, args.legacy_sample, args.ticks)
+
+    results = {}
+    scales = [int(scale) for scale in args.scales.split(",")]
+    if args.suite in ("offline", "all"):
+        results.update(asyncio.run(run_offline_suite(scales, args.connect_latency)))
+    if args.suite in ("sharded", "all"):
+        worker_counts = [int(workers) for workers in args.workers.split(",")]
+        results.update(run_sharded_suite(scales, worker_counts, args.connect_latency, args.overlap))
+
+    if results:
+        if args.save_baseline:
+            save_baseline(args.save_baseline, results)
+        if args.compare and compare_baseline(args.compare, results):
+            sys.exit(1)
@@ -34,17 +34,58 @@ import os
 import random
 import pytz
 import json
+import copy
+import hashlib
+import mmap
+import array
+import struct
+import math
+import time
+from collections import OrderedDict, deque
+import heapq
+import itertools
+import atexit
+import threading
+import queue
+import sqlite3
+import zlib
+import functools
+import ctypes
+import ctypes.util
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from types import MappingProxyType
 from discord import app_commands
 from discord.app_commands import CheckFailure
+import aiohttp
+from aiohttp import web
 from dotenv import load_dotenv
 import subprocess
 from discord.ui import Button, View
 import platform
+import sys
+
+try:
+    import numpy as np  # Optional, only used for batch sound draws
+except ImportError:
+    np = None
 
 intents = discord.Intents.default()
 intents.voice_states = True
 
-bot = commands.Bot(command_prefix="!", intents=intents)
+# Worker processes of a sharded deployment get their shards from the coordinator through the environment (see the Sharding section)
+WORKER_ID = int(os.environ["CHEERSBOT_WORKER"]) if "CHEERSBOT_WORKER" in os.environ else None
+SHARD_MAX_CONCURRENCY = int(os.environ.get("CHEERSBOT_MAX_CONCURRENCY", 1))
+
+if WORKER_ID is not None:
+    bot = commands.AutoShardedBot(
+        command_prefix="!",
+        intents=intents,
+        shard_ids=[int(shard_id) for shard_id in os.environ["CHEERSBOT_SHARD_IDS"].split(",")],
+        shard_count=int(os.environ["CHEERSBOT_SHARD_COUNT"])
+    )
+else:
+    bot = commands.Bot(command_prefix="!", intents=intents)
 
 #####################################################################################################################################
 # Use the os module to dynamically get the current working directory and join it with the sound folder path                         #
@@ -69,18 +110,1156 @@ print(f"Sound folder path: {SOUND_FOLDER}")
 print(f"FFmpeg path: {ffmpeg_path}")                                                                                                #
 #####################################################################################################################################
 
-# Get available sound files in the sound folder
+'''
+ __  __      _        _
+|  \/  | ___| |_ _ __(_) ___ ___ _
+| |\/| |/ _ \ __| '__| |/ __/ __(_)
+| |  | |  __/ |_| |  | | (__\__ \_
+|_|  |_|\___|\__|_|  |_|\___|___(_)
+
+'''
+# Histogram buckets in seconds, from sub-millisecond up to a minute
+METRIC_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# Recent observations kept per histogram for the percentiles in /perf
+METRIC_RECENT_SAMPLES = 1024
+
+# Defaults for the metrics config section; the endpoint only listens locally unless configured otherwise
+METRICS_HOST = "127.0.0.1"
+METRICS_PORT = 9108
+
+# How often the event loop lag is sampled, and how big a stall gets printed
+LOOP_LAG_INTERVAL = 0.5
+LOOP_LAG_WARN_SECONDS = 0.25
+
+# A trigger that fires more than this many seconds after its scheduled time counts as late
+TRIGGER_LATE_SECONDS = 1.0
+
+def format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + "}"
+
+class Counter:
+    """A monotonically increasing count, optionally split by labels."""
+
+    kind = "counter"
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help_text = help_text
+        self._values = {}  # Sorted label pairs -> count
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def values(self):
+        with self._lock:
+            return dict(self._values)
+
+    def render(self):
+        return [f"{self.name}{format_labels(labels)} {value}" for labels, value in self.values().items()]
+
+class Gauge(Counter):
+    """A value that goes up and down, e.g. the latest event loop lag."""
+
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[tuple(sorted(labels.items()))] = value
+
+class Histogram:
+    """
+    Bucketed timings in Prometheus form (cumulative buckets, sum and count), plus the most
+    recent observations for quick percentiles. Safe to observe from any thread.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name, help_text, buckets=METRIC_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self._children = {}  # Sorted label pairs -> [bucket counts, sum, count, recent samples]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            child = self._children.get(key)
+            if child is None:
+                child = self._children[key] = [[0] * len(self.buckets), 0.0, 0, deque(maxlen=METRIC_RECENT_SAMPLES)]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    child[0][i] += 1
+            child[1] += value
+            child[2] += 1
+            child[3].append(value)
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    # Decorator form of time() for plain functions and methods
+    def timed(self, func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with self.time():
+                return func(*args, **kwargs)
+        return wrapper
+
+    def summary(self):
+        """Count, p50, p99 and max of the recent observations, per label set."""
+        with self._lock:
+            children = {key: (child[2], sorted(child[3])) for key, child in self._children.items()}
+        result = {}
+        for key, (count, recent) in children.items():
+            if recent:
+                result[key] = {
+                    "count": count,
+                    "p50": recent[len(recent) // 2],
+                    "p99": recent[min(len(recent) - 1, int(len(recent) * 0.99))],
+                    "max": recent[-1]
+                }
+        return result
+
+    def render(self):
+        with self._lock:
+            children = {key: (list(child[0]), child[1], child[2]) for key, child in self._children.items()}
+        lines = []
+        for labels, (counts, total, count) in children.items():
+            for bound, bucket_count in zip(self.buckets, counts):
+                lines.append(f"{self.name}_bucket{format_labels(labels, [('le', bound)])} {bucket_count}")
+            lines.append(f"{self.name}_bucket{format_labels(labels, [('le', '+Inf')])} {count}")
+            lines.append(f"{self.name}_sum{format_labels(labels)} {total}")
+            lines.append(f"{self.name}_count{format_labels(labels)} {count}")
+        return lines
+
+class Metrics:
+    """Registry of the bot's counters, gauges and histograms."""
+
+    def __init__(self):
+        self.metrics = {}  # Name -> metric, in registration order
+
+    def _register(self, metric):
+        return self.metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, help_text):
+        return self._register(Counter(name, help_text))
+
+    def gauge(self, name, help_text):
+        return self._register(Gauge(name, help_text))
+
+    def histogram(self, name, help_text, buckets=METRIC_BUCKETS):
+        return self._register(Histogram(name, help_text, buckets))
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format."""
+        lines = []
+        for metric in self.metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+metrics = Metrics()
+
+# Hot paths
+loop_lag_seconds = metrics.histogram("cheersbot_event_loop_lag_seconds", "How late the event loop woke up for a timed sleep.")
+loop_lag_last = metrics.gauge("cheersbot_event_loop_lag_last_seconds", "Most recent event loop lag sample.")
+config_load_seconds = metrics.histogram("cheersbot_config_load_seconds", "Time spent in load_or_create_config.")
+choose_sound_seconds = metrics.histogram("cheersbot_choose_sound_seconds", "Time spent picking a sound.")
+converted_time_seconds = metrics.histogram("cheersbot_converted_time_seconds", "Time spent converting an Easter egg join time to UTC.")
+voice_connect_seconds = metrics.histogram("cheersbot_voice_connect_seconds", "Time to connect to (or move to) a voice channel.")
+audio_first_frame_seconds = metrics.histogram("cheersbot_audio_first_frame_seconds", "Time from opening a sound (cache or FFmpeg) to its first frame being ready.")
+play_first_frame_seconds = metrics.histogram("cheersbot_play_first_frame_seconds", "Time from a play's target time (or request) to its first frame going out.")
+play_queue_wait_seconds = metrics.histogram("cheersbot_play_queue_wait_seconds", "Time a play waited in its guild's queue.")
+log_send_seconds = metrics.histogram("cheersbot_log_send_seconds", "Time to send a batch of log embeds, retries included.")
+
+# FFmpeg decoder pool
+ffmpeg_spawn_seconds = metrics.histogram("cheersbot_ffmpeg_spawn_seconds", "Time to start an FFmpeg decoder process.")
+ffmpeg_wait_seconds = metrics.histogram("cheersbot_ffmpeg_wait_seconds", "Time a play waited for a free FFmpeg decoder slot.")
+ffmpeg_decode_seconds = metrics.histogram("cheersbot_ffmpeg_decode_seconds", "Time from handing a sound to an FFmpeg decoder to its last frame.")
+ffmpeg_checkouts = metrics.counter("cheersbot_ffmpeg_checkouts_total", "FFmpeg decoders handed to plays, by whether one was already warm.")
+ffmpeg_recycled = metrics.counter("cheersbot_ffmpeg_recycled_total", "Warm FFmpeg decoders replaced by the health check, by reason.")
+ffmpeg_decoding = metrics.gauge("cheersbot_ffmpeg_decoding", "FFmpeg decoders handed to plays and not yet finished.")
+
+# Scheduled triggers (auto-join, Easter eggs)
+trigger_lateness_seconds = metrics.histogram("cheersbot_trigger_lateness_seconds", "How long after its scheduled time a trigger fired.")
+triggers_fired = metrics.counter("cheersbot_triggers_fired_total", "Scheduled triggers that fired.")
+triggers_late = metrics.counter("cheersbot_triggers_late_total", f"Scheduled triggers that fired more than {TRIGGER_LATE_SECONDS:g}s late.")
+triggers_missed = metrics.counter("cheersbot_triggers_missed_total", "Scheduled triggers that were skipped because they came round too late.")
+fire_claims = metrics.counter("cheersbot_fire_claims_total", "Per-guild fire claims in a sharded deployment, by whether this worker won them.")
+
+# Easter egg journal
+journal_records = metrics.counter("cheersbot_easter_egg_journal_records_total", "Records appended to the Easter egg journal.")
+journal_syncs = metrics.counter("cheersbot_easter_egg_journal_syncs_total", "Group writes of the Easter egg journal (one fsync each).")
+journal_compactions = metrics.counter("cheersbot_easter_egg_journal_compactions_total", "Times the Easter egg journal was folded into the Easter egg file.")
+
+# Record a trigger firing `lateness` seconds after its scheduled time
+def record_trigger(trigger, lateness):
+    triggers_fired.inc(trigger=trigger)
+    trigger_lateness_seconds.observe(max(lateness, 0.0), trigger=trigger)
+    if lateness > TRIGGER_LATE_SECONDS:
+        triggers_late.inc(trigger=trigger)
+
+class LoopLagMonitor:
+    """Sleeps for a fixed interval over and over and records how late each wake-up was."""
+
+    def __init__(self, interval=LOOP_LAG_INTERVAL):
+        self.interval = interval
+        self._task = None
+
+    def is_running(self):
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        if not self.is_running():
+            self._task = asyncio.create_task(self.run())
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(loop.time() - expected, 0.0)
+            loop_lag_seconds.observe(lag)
+            loop_lag_last.set(lag)
+            if lag > LOOP_LAG_WARN_SECONDS:
+                print(f"Event loop stalled for {lag * 1000:.0f} ms")
+
+loop_lag_monitor = LoopLagMonitor()
+
+class MetricsServer:
+    """Serves the metrics at /metrics in Prometheus text format."""
+
+    def __init__(self):
+        self._runner = None
+
+    def is_running(self):
+        return self._runner is not None
+
+    async def start(self, host=METRICS_HOST, port=METRICS_PORT):
+        if self.is_running():
+            return
+        app = web.Application()
+        app.router.add_get("/metrics", self.handle_metrics)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        try:
+            await web.TCPSite(runner, host, port).start()
+        except OSError as e:
+            print(f"Could not start the metrics endpoint on {host}:{port}: {e}")
+            await runner.cleanup()
+            return
+        self._runner = runner
+        print(f"Metrics available at http://{host}:{port}/metrics")
+
+    async def handle_metrics(self, request):
+        return web.Response(
+            body=metrics.render().encode("utf-8"),
+            headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
+        )
+
+metrics_server = MetricsServer()
+
+'''
+  ____                        _   _     _ _
+ / ___|  ___  _   _ _ __   __| | | |   (_) |__  _ __ __ _ _ __ _   _ _
+ \___ \ / _ \| | | | '_ \ / _` | | |   | | '_ \| '__/ _` | '__| | | (_)
+  ___) | (_) | |_| | | | | (_| | | |___| | |_) | | | (_| | |  | |_| |_
+ |____/ \___/ \__,_|_| |_|\__,_| |_____|_|_.__/|_|  \__,_|_|   \__, (_)
+                                                               |___/
+'''
+# Pre-encoded copies of the sounds, named after the SHA-256 of the source file and the processing settings
+OPUS_CACHE_FOLDER = os.path.join(BASE_DIR, "opus_cache")
+
+# Encoder settings for the cache; Discord wants 48 kHz stereo Opus in 20 ms frames
+OPUS_ENCODE_ARGS = ["-c:a", "libopus", "-ar", "48000", "-ac", "2", "-b:a", "128k", "-application", "audio", "-frame_duration", "20"]
+OPUS_FRAME_SECONDS = 0.02
+
+# Defaults for the sound_library config section: every sound is trimmed of silence below the threshold
+# at both ends and normalised to the target integrated loudness (EBU R128), without going over the true peak
+SOUND_PREPROCESS_DEFAULTS = {
+    "target_lufs": -16.0,
+    "true_peak": -1.5,
+    "loudness_range": 11.0,
+    "silence_threshold_db": -50
+}
+
+# Cache files hold the Opus packets back to back: magic, packet count, packet offsets, packet data
+FRAMES_MAGIC = b'CBF1'
+FRAMES_HEADER = struct.Struct('=4sI')
+
+# Default cap on how much pre-encoded audio is kept mapped into memory at once
+SOUND_LIBRARY_MAX_MAPPED_MB = 256
+
+# SHA-256 of a file's contents
+def hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+# Build the FFmpeg filter chain for a sound: trim leading and trailing silence, then normalise the loudness.
+# Without `measured` this is the analysis pass; with it, the second pass applies a linear gain from those numbers.
+def sound_filters(settings, measured=None):
+    trim = f"silenceremove=start_periods=1:start_threshold={settings['silence_threshold_db']}dB"
+    filters = [trim, "areverse", trim, "areverse"]  # Reversing lets the same filter trim the end
+    if measured is not None and not math.isfinite(float(measured["input_i"])):
+        return ",".join(filters)  # Nothing but silence, there is no loudness to normalise
+    loudnorm = f"loudnorm=I={settings['target_lufs']}:TP={settings['true_peak']}:LRA={settings['loudness_range']}:print_format=json"
+    if measured is not None:
+        loudnorm += (
+            f":measured_I={measured['input_i']}:measured_TP={measured['input_tp']}:measured_LRA={measured['input_lra']}"
+            f":measured_thresh={measured['input_thresh']}:offset={measured['target_offset']}:linear=true"
+        )
+    return ",".join(filters + [loudnorm])
+
+# loudnorm prints its measurements as the last JSON object in FFmpeg's log
+def parse_loudnorm(log):
+    start = log.rfind("{")
+    end = log.rfind("}")
+    if start == -1 or end < start:
+        return None
+    return json.loads(log[start:end + 1])
+
+# Trim, normalise and encode one sound into a frames file, and write its metadata next to it.
+# Runs in a worker process, so it only uses what it is given.
+def preprocess_sound(ffmpeg, source_path, frames_path, metadata_path, settings):
+    analysis = subprocess.run(
+        [ffmpeg, "-hide_banner", "-nostats", "-i", source_path, "-vn", "-af", sound_filters(settings), "-f", "null", "-"],
+        check=True,
+        capture_output=True,
+        text=True
+    )
+    measured = parse_loudnorm(analysis.stderr)
+
+    ogg_path = frames_path + ".ogg.tmp"
+    tmp_path = frames_path + ".tmp"
+    try:
+        encode = subprocess.run(
+            [
+                ffmpeg, "-y", "-hide_banner", "-nostats", "-i", source_path, "-vn",
+                "-af", sound_filters(settings, measured), *OPUS_ENCODE_ARGS, "-f", "ogg", ogg_path
+            ],
+            check=True,
+            capture_output=True,
+            text=True
+        )
+        output = parse_loudnorm(encode.stderr) if measured is not None else None
+        with open(ogg_path, 'rb') as f:
+            # The Ogg header packets aren't audio
+            packets = [
+                packet for packet in discord.oggparse.OggStream(f).iter_packets()
+                if not packet.startswith((b'OpusHead', b'OpusTags'))
+            ]
+
+        offsets = array.array('I', [0])
+        for packet in packets:
+            offsets.append(offsets[-1] + len(packet))
+        with open(tmp_path, 'wb') as f:
+            f.write(FRAMES_HEADER.pack(FRAMES_MAGIC, len(packets)))
+            f.write(offsets.tobytes())
+            for packet in packets:
+                f.write(packet)
+
+        metadata = {
+            "duration": round(len(packets) * OPUS_FRAME_SECONDS, 2),
+            "lufs": float(output["output_i"]) if output else None,  # After normalising
+            "peak": float(output["output_tp"]) if output else None,  # True peak in dBTP, after normalising
+            "source_lufs": float(measured["input_i"]) if measured and math.isfinite(float(measured["input_i"])) else None
+        }
+        write_json_atomic(metadata_path, metadata)
+        os.replace(tmp_path, frames_path)  # Last, so a frames file always has its metadata
+        return metadata
+    finally:
+        for path in (ogg_path, tmp_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+class MappedSound:
+    """A frames file mapped read-only into memory; every play of the sound reads the same pages."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+
+        magic, self.frame_count = FRAMES_HEADER.unpack_from(self._mmap)
+        if magic != FRAMES_MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a frames file")
+        self._data_start = FRAMES_HEADER.size + 4 * (self.frame_count + 1)
+        self._offsets = self._view[FRAMES_HEADER.size:self._data_start].cast('I')
+        self.size = len(self._mmap)
+        self.users = 0  # Plays currently reading from this mapping
+
+    def frame(self, index):
+        # A view into the mapping, not a copy
+        return self._view[self._data_start + self._offsets[index]:self._data_start + self._offsets[index + 1]]
+
+    def close(self):
+        """Unmaps the file; raises BufferError while a frame handed out earlier is still referenced."""
+        if hasattr(self, "_offsets"):
+            self._offsets.release()
+        self._view.release()
+        self._mmap.close()
+
+class MappedOpusAudio(discord.AudioSource):
+    """Plays a MappedSound frame by frame, with no FFmpeg process and no per-play file reads."""
+
+    def __init__(self, library, mapped):
+        self._library = library
+        self._mapped = mapped
+        self._index = 0
+
+    def read(self):
+        if self._mapped is None or self._index >= self._mapped.frame_count:
+            return b''
+        frame = self._mapped.frame(self._index)
+        self._index += 1
+        return frame
+
+    def is_opus(self):
+        return True
+
+    def cleanup(self):
+        if self._mapped is not None:
+            self._library.release(self._mapped)
+            self._mapped = None
+
+class SoundLibrary:
+    """
+    Index of the sounds in the sound folder, plus their pre-encoded audio.
+
+    ingest() trims, loudness-normalises and transcodes every sound to Opus once, in a process pool,
+    and stores the packets in OPUS_CACHE_FOLDER along with the sound's duration, peak and loudness.
+    Files are keyed by the content hash of the source file and the processing settings, so only new
+    or changed files (or all of them, after a settings change) are processed again; update() does the
+    same for just the files the watcher saw change; the two take turns, so neither swaps in its index
+    over the other's or deletes cache files the other just wrote. Plays map those
+    files into memory and share the pages; mappings nobody is playing are unmapped least recently
+    used first once more than `max_mapped_bytes` is mapped.
+    """
+
+    def __init__(self, sound_folder, cache_folder, max_mapped_bytes=SOUND_LIBRARY_MAX_MAPPED_MB * 1024 * 1024):
+        self.sound_folder = sound_folder
+        self.cache_folder = cache_folder
+        self.max_mapped_bytes = max_mapped_bytes
+        self.preprocess_settings = dict(SOUND_PREPROCESS_DEFAULTS)
+        self.workers = None  # Worker processes for ingest(); None uses one per CPU
+        self.sounds = None  # Sound name -> source file path
+        self.entries = {}  # Source file path -> frames file path
+        self.metadata = {}  # Sound name -> {"duration", "lufs", "peak", "source_lufs"}
+        self._mapped = OrderedDict()  # Frames file path -> MappedSound, least recently used first
+        self._mapped_bytes = 0
+        self._lock = threading.Lock()  # Guards the mappings; taken by the audio player threads
+        self._update_lock = threading.Lock()  # One ingest() or update() at a time
+
+    def scan(self):
+        """Re-lists the sound folder."""
+        self.sounds = {
+            f[:-4]: os.path.join(self.sound_folder, f) for f in os.listdir(self.sound_folder) if f.endswith('.mp3')
+        }
+
+    def configure(self, settings):
+        """Applies the sound_library config section; processing changes take effect on the next ingest()."""
+        self.max_mapped_bytes = settings.get("max_mapped_mb", SOUND_LIBRARY_MAX_MAPPED_MB) * 1024 * 1024
+        self.preprocess_settings = {key: settings.get(key, default) for key, default in SOUND_PREPROCESS_DEFAULTS.items()}
+        self.workers = settings.get("workers")
+
+    def names(self):
+        if self.sounds is None:
+            self.scan()
+        return list(self.sounds)
+
+    def duration(self, sound_name):
+        """Length in seconds of a processed sound, or None if it isn't in the cache."""
+        return self.metadata.get(sound_name, {}).get("duration")
+
+    def settings_key(self):
+        """Short fingerprint of everything that changes the processed audio."""
+        settings = json.dumps([self.preprocess_settings, OPUS_ENCODE_ARGS], sort_keys=True)
+        return hashlib.sha256(settings.encode()).hexdigest()[:12]
+
+    def ingest(self):
+        """Re-lists the folder, processes new or changed sounds and drops unused cache files. Blocking; run it in an executor."""
+        with self._update_lock:
+            self.scan()
+            os.makedirs(self.cache_folder, exist_ok=True)
+            settings_key = self.settings_key()
+            entries = {}
+            metadata = {}
+            pending = {}  # Sound name -> (source, frames, metadata paths) still to process
+            for sound_name, source_path in self.sounds.items():
+                self._lookup(sound_name, source_path, settings_key, entries, metadata, pending)
+            self._process(pending, entries, metadata)
+            self.entries = entries
+            self.metadata = metadata
+
+            in_use = set(entries.values()) | {frames_path[:-len(".frames")] + ".json" for frames_path in entries.values()}
+            with self._lock:
+                for frames_path in [path for path in self._mapped if path not in in_use]:
+                    self._unmap(frames_path)
+            for file_name in os.listdir(self.cache_folder):
+                cache_path = os.path.join(self.cache_folder, file_name)
+                if cache_path not in in_use:
+                    try:
+                        os.remove(cache_path)
+                    except OSError:
+                        pass  # Still mapped by a play (Windows); it goes next time
+
+            print(f"Sound library ready: {len(entries)} of {len(self.sounds)} sound(s) processed, {len(pending)} new")
+
+    def update(self, file_names):
+        """
+        Applies changes to single files in the sound folder, adding, re-processing or dropping just
+        those sounds; None checks every file. Returns the names of the sounds added and removed.
+        Blocking; run it in an executor.
+        """
+        with self._update_lock:
+            if self.sounds is None:
+                self.scan()
+            if file_names is None:
+                file_names = set(os.listdir(self.sound_folder)) | {os.path.basename(path) for path in self.sounds.values()}
+            os.makedirs(self.cache_folder, exist_ok=True)
+            settings_key = self.settings_key()
+
+            # Work on copies and swap them in at the end, so plays never see a half-updated index
+            sounds, entries, metadata = dict(self.sounds), dict(self.entries), dict(self.metadata)
+            added, removed = [], []
+            replaced = set()  # Frames files of the old versions of changed sounds
+            pending = {}
+            for file_name in sorted(file_names):
+                if not file_name.endswith('.mp3'):
+                    continue
+                sound_name = file_name[:-4]
+                source_path = os.path.join(self.sound_folder, file_name)
+                old_frames_path = entries.pop(source_path, None)
+                if old_frames_path is not None:
+                    replaced.add(old_frames_path)
+                metadata.pop(sound_name, None)
+
+                if not os.path.isfile(source_path):
+                    if sounds.pop(sound_name, None) is not None:
+                        removed.append(sound_name)
+                    continue
+                if sound_name not in sounds:
+                    added.append(sound_name)
+                sounds[sound_name] = source_path
+                self._lookup(sound_name, source_path, settings_key, entries, metadata, pending)
+            self._process(pending, entries, metadata)
+            self.sounds, self.entries, self.metadata = sounds, entries, metadata
+
+            stale = replaced - set(entries.values())
+            with self._lock:
+                for frames_path in stale:
+                    if frames_path in self._mapped:
+                        self._unmap(frames_path)
+            for frames_path in stale:
+                for cache_path in (frames_path, frames_path[:-len(".frames")] + ".json"):
+                    try:
+                        os.remove(cache_path)
+                    except OSError:
+                        pass  # Still mapped by a play (Windows); the next ingest() removes it
+            return added, removed
+
+    # Use the cached copy of a sound if there is one, otherwise queue it up for _process()
+    def _lookup(self, sound_name, source_path, settings_key, entries, metadata, pending):
+        try:
+            cache_name = f"{hash_file(source_path)}-{settings_key}"
+            frames_path = os.path.join(self.cache_folder, cache_name + ".frames")
+            metadata_path = os.path.join(self.cache_folder, cache_name + ".json")
+            if os.path.exists(frames_path) and os.path.exists(metadata_path):
+                entries[source_path] = frames_path
+                metadata[sound_name] = read_json(metadata_path)
+            else:
+                pending[sound_name] = (source_path, frames_path, metadata_path)
+        except Exception as e:
+            print(f"Error reading {sound_name}, it will be played through FFmpeg: {e}")
+
+    # Process the queued sounds in a process pool, adding the ones that worked to entries and metadata
+    def _process(self, pending, entries, metadata):
+        if not pending:
+            return
+        # Each sound is two FFmpeg runs plus parsing; spread them over the CPUs
+        with ProcessPoolExecutor(max_workers=min(len(pending), self.workers or os.cpu_count() or 1)) as pool:
+            by_cache_file = {}  # Identical files share one job
+            for sound_name, paths in pending.items():
+                if paths[1] not in by_cache_file:
+                    by_cache_file[paths[1]] = pool.submit(preprocess_sound, ffmpeg_path, *paths, self.preprocess_settings)
+            jobs = {sound_name: by_cache_file[paths[1]] for sound_name, paths in pending.items()}
+            for sound_name, job in jobs.items():
+                source_path, frames_path, _ = pending[sound_name]
+                try:
+                    metadata[sound_name] = job.result()
+                    entries[source_path] = frames_path
+                    print(f"Processed {sound_name} into the sound cache ({metadata[sound_name]['duration']:.2f}s)")
+                except Exception as e:
+                    print(f"Error processing {sound_name}, it will be played through FFmpeg: {e}")
+
+    def open_source(self, sound_path):
+        """Returns a MappedOpusAudio for a sound file, or None if it isn't pre-encoded."""
+        frames_path = self.entries.get(os.path.abspath(sound_path))
+        if frames_path is None:
+            return None
+        with self._lock:
+            mapped = self._mapped.get(frames_path)
+            if mapped is None:
+                mapped = MappedSound(frames_path)
+                self._mapped[frames_path] = mapped
+                self._mapped_bytes += mapped.size
+            self._mapped.move_to_end(frames_path)
+            mapped.users += 1
+            self._evict()
+        return MappedOpusAudio(self, mapped)
+
+    # Called from the audio player thread when a play ends
+    def release(self, mapped):
+        with self._lock:
+            mapped.users -= 1
+            self._evict()
+
+    def _evict(self):
+        for frames_path in list(self._mapped):
+            if self._mapped_bytes <= self.max_mapped_bytes:
+                break
+            if self._mapped[frames_path].users == 0:
+                self._unmap(frames_path)
+
+    def _unmap(self, frames_path):
+        mapped = self._mapped[frames_path]
+        if mapped.users:
+            return
+        try:
+            mapped.close()
+        except BufferError:
+            return  # A frame is still referenced somewhere; try again later
+        del self._mapped[frames_path]
+        self._mapped_bytes -= mapped.size
+
+sound_library = SoundLibrary(SOUND_FOLDER, OPUS_CACHE_FOLDER)
+
+# Defaults for the "ffmpeg_pool" section of config.json
+FFMPEG_POOL_WARM = 2  # Decoders kept started and waiting for a sound
+FFMPEG_POOL_MAX_PROCESSES = 8  # Decoders running plays at once; further plays wait for one to finish
+FFMPEG_POOL_MAX_IDLE_SECONDS = 300  # Warm decoders older than this are replaced
+FFMPEG_POOL_CHECK_SECONDS = 10  # How often the warm decoders are checked
+
+# FFmpeg reads the sound from stdin and writes 48 kHz stereo PCM, the format discord.py sends, to stdout
+FFMPEG_POOL_ARGS = ("-hide_banner", "-loglevel", "error", "-i", "pipe:0", "-f", "s16le", "-ar", "48000", "-ac", "2", "pipe:1")
+
+class FFmpegDecoderPool:
+    """
+    FFmpeg processes started ahead of time for plays of sounds that aren't cached yet.
+
+    An FFmpeg process decodes one input, so a warm decoder is one that has already been
+    started and is waiting on stdin: a play takes it, the sound file is written to its stdin
+    and PCM read back from its stdout, and a fresh one is started in the background to take
+    its place once the play is done. At most max_processes decode at once; plays beyond that
+    wait in line for a slot. A periodic health check replaces warm decoders that exited or
+    have waited too long.
+    """
+
+    def __init__(self, executable):
+        self.executable = executable
+        self.enabled = True
+        self.warm = FFMPEG_POOL_WARM
+        self.max_processes = FFMPEG_POOL_MAX_PROCESSES
+        self.max_idle_seconds = FFMPEG_POOL_MAX_IDLE_SECONDS
+        self.active = 0  # Slots held by plays
+        self._idle = deque()  # (process, started at), oldest first
+        self._spawning = 0
+        self._waiters = deque()
+        self._loop = None
+        self._task = None
+
+    def configure(self, settings):
+        self.enabled = settings.get("enabled", True)
+        self.warm = settings.get("warm", FFMPEG_POOL_WARM) if self.enabled else 0
+        self.max_processes = max(1, settings.get("max_processes", FFMPEG_POOL_MAX_PROCESSES))
+        self.max_idle_seconds = settings.get("max_idle_seconds", FFMPEG_POOL_MAX_IDLE_SECONDS)
+        while len(self._idle) > self.warm:
+            self._kill(self._idle.popleft()[0])
+        self._wake()
+        if self._loop is not None:
+            self.refill()
+
+    # Blocking (fork/exec); run in the executor
+    def spawn(self):
+        started = time.perf_counter()
+        process = subprocess.Popen(
+            (self.executable, *FFMPEG_POOL_ARGS),
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            creationflags=subprocess.CREATE_NO_WINDOW if platform.system() == "Windows" else 0
+        )
+        ffmpeg_spawn_seconds.observe(time.perf_counter() - started)
+        return process
+
+    def is_running(self):
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        if not self.is_running():
+            self._task = asyncio.create_task(self.run())
+        self.refill()
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(FFMPEG_POOL_CHECK_SECONDS)
+            self.check()
+
+    def check(self):
+        """Replaces warm decoders that exited or have been waiting longer than max_idle_seconds."""
+        now = time.monotonic()
+        healthy = deque()
+        for process, started_at in self._idle:
+            if process.poll() is not None:
+                print(f"A warm FFmpeg decoder exited with code {process.returncode}; starting a new one")
+                ffmpeg_recycled.inc(reason="exited")
+            elif now - started_at > self.max_idle_seconds:
+                self._kill(process)
+                ffmpeg_recycled.inc(reason="idle")
+            else:
+                healthy.append((process, started_at))
+        self._idle = healthy
+        self.refill()
+
+    def refill(self):
+        """Starts decoders in the background until `warm` of them are waiting."""
+        for _ in range(self.warm - len(self._idle) - self._spawning):
+            self._spawning += 1
+            self._loop.run_in_executor(None, self.spawn).add_done_callback(self._add_warm)
+
+    def _add_warm(self, future):
+        self._spawning -= 1
+        if future.cancelled():
+            return
+        if future.exception() is not None:
+            print(f"Error starting an FFmpeg decoder: {future.exception()}")
+            return
+        process = future.result()
+        if len(self._idle) < self.warm:
+            self._idle.append((process, time.monotonic()))
+        else:
+            self._kill(process)
+
+    async def acquire(self):
+        """Waits for a free slot and returns a started FFmpeg process waiting for its input."""
+        self._loop = asyncio.get_running_loop()
+        waited_from = time.perf_counter()
+        if self.active < self.max_processes and not self._waiters:
+            self.active += 1
+        else:
+            waiter = self._loop.create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter  # _wake() takes the slot for us before resolving it
+            except asyncio.CancelledError:
+                if not waiter.cancelled():
+                    self._release()  # Got the slot just as we were cancelled
+                raise
+        ffmpeg_wait_seconds.observe(time.perf_counter() - waited_from)
+        ffmpeg_decoding.set(self.active)
+
+        try:
+            process = None
+            while self._idle and process is None:
+                process, _ = self._idle.popleft()
+                if process.poll() is not None:
+                    ffmpeg_recycled.inc(reason="exited")
+                    process = None
+            ffmpeg_checkouts.inc(warm="true" if process is not None else "false")
+            if process is None:
+                spawning = self._loop.run_in_executor(None, self.spawn)
+                try:
+                    process = await asyncio.shield(spawning)
+                except asyncio.CancelledError:
+                    # The process starts anyway; keep it as a warm decoder or stop it once it has
+                    self._spawning += 1
+                    spawning.add_done_callback(self._add_warm)
+                    raise
+        except BaseException:
+            self._release()  # Every failure gives the slot back
+            raise
+        return process
+
+    def release(self):
+        """Gives a play's slot back. Usable from any thread (the player thread cleans up sources)."""
+        try:
+            self._loop.call_soon_threadsafe(self._release)
+        except RuntimeError:
+            pass  # The event loop is closed; nothing is waiting any more
+
+    def _release(self):
+        self.active -= 1
+        self._wake()
+        ffmpeg_decoding.set(self.active)
+        self.refill()  # Replacements start once a play is done, so they don't compete with its decoding
+
+    def _wake(self):
+        while self._waiters and self.active < self.max_processes:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.active += 1
+                waiter.set_result(None)
+
+    # Waiting for a killed process can block (a stuck FFmpeg); that happens here instead of on the caller's thread
+    _reaper = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ffmpeg-reaper")
+
+    @staticmethod
+    def _kill(process):
+        """Kills a decoder without waiting for it to exit; safe on the event loop."""
+        if process.poll() is None:
+            process.kill()
+        try:
+            FFmpegDecoderPool._reaper.submit(FFmpegDecoderPool._reap, process)
+        except RuntimeError:
+            FFmpegDecoderPool._reap(process)  # Shutting down; nothing else is running on the loop any more
+
+    @staticmethod
+    def _reap(process):
+        try:
+            process.wait(timeout=1)
+        except subprocess.TimeoutExpired:
+            pass
+        for pipe in (process.stdin, process.stdout):
+            try:
+                pipe.close()
+            except OSError:
+                pass
+
+    def close(self):
+        while self._idle:
+            self._kill(self._idle.popleft()[0])
+
+    def stats(self):
+        return {"warm": len(self._idle), "decoding": self.active, "waiting": len(self._waiters)}
+
+ffmpeg_pool = FFmpegDecoderPool(ffmpeg_path)
+
+# Don't leave warm decoders behind on shutdown
+atexit.register(ffmpeg_pool.close)
+
+class PooledFFmpegAudio(discord.AudioSource):
+    """PCM audio decoded by a pooled FFmpeg process; start() gets the process, a thread feeds it the sound file."""
+
+    def __init__(self, pool, sound_path):
+        self.pool = pool
+        self.sound_path = sound_path
+        self.process = None
+        self._started_at = None
+        self._finished = False
+        self._released = False
+
+    async def start(self):
+        self.process = await self.pool.acquire()
+        self._started_at = time.perf_counter()
+        threading.Thread(target=self._feed, name="ffmpeg-feed", daemon=True).start()
+
+    # Runs on its own thread: writing the whole file up front would block once the pipes fill
+    def _feed(self):
+        try:
+            with open(self.sound_path, "rb") as f:
+                for chunk in iter(lambda: f.read(64 * 1024), b""):
+                    self.process.stdin.write(chunk)
+        except (OSError, ValueError) as e:
+            if not self._released:  # Otherwise the play was stopped and the process killed
+                print(f"Error feeding {self.sound_path} to FFmpeg: {e}")
+        finally:
+            try:
+                self.process.stdin.close()
+            except OSError:
+                pass
+
+    def read(self):
+        frame = self.process.stdout.read(discord.opus.Encoder.FRAME_SIZE)
+        if len(frame) == discord.opus.Encoder.FRAME_SIZE:
+            return frame
+        if not self._finished:
+            self._finished = True
+            ffmpeg_decode_seconds.observe(time.perf_counter() - self._started_at)
+        return b""
+
+    def is_opus(self):
+        return False
+
+    def cleanup(self):
+        if self.process is None or self._released:
+            return
+        self._released = True
+        FFmpegDecoderPool._kill(self.process)
+        self.pool.release()
+
+# Audio source for a sound file: pre-encoded frames when cached, otherwise decoded by FFmpeg (from the pool when enabled)
+def create_audio_source(sound_path):
+    try:
+        source = sound_library.open_source(sound_path)
+        if source is not None:
+            return source
+    except (OSError, ValueError) as e:
+        print(f"Error opening cached sound for {sound_path}: {e}")
+    if ffmpeg_pool.enabled:
+        return PooledFFmpegAudio(ffmpeg_pool, sound_path)
+    return discord.FFmpegPCMAudio(sound_path, executable=ffmpeg_path)
+
+# " (1.2s)" after a sound name in listings, from the cache metadata; empty if the sound isn't processed yet
+def format_duration(sound_name):
+    duration = sound_library.duration(sound_name)
+    return f" ({duration:.1f}s)" if duration is not None else ""
+
+# Get available sound files in the sound folder (from the library index, see SoundLibrary.scan)
 def get_available_sounds():
-    return [f[:-4] for f in os.listdir(SOUND_FOLDER) if f.endswith('.mp3')]
+    return sound_library.names()
 
-# Save the config to the file, sorting sounds by percentage (highest first)
-def save_config(config):
-    # Sort the sounds by percentage in descending order (highest first)
-    config["sounds"] = dict(sorted(config["sounds"].items(), key=lambda item: item[1], reverse=True))
+'''
+  ____  _
+ / ___|| |_ ___  _ __ __ _  __ _  ___ _
+ \___ \| __/ _ \| '__/ _` |/ _` |/ _ (_)
+  ___) | || (_) | | | (_| | (_| |  __/_
+ |____/ \__\___/|_|  \__,_|\__, |\___(_)
+                           |___/
+'''
+# Write bytes to a temp file next to the target, fsync it and swap it in, so a crash never leaves a half-written file
+def write_bytes_atomic(path, data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+    # Make the rename itself durable (not possible on Windows)
+    if hasattr(os, "O_DIRECTORY"):
+        dir_fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+def write_json_atomic(path, data):
+    write_bytes_atomic(path, json.dumps(data, indent=4).encode())
+
+def read_json(path):
+    with open(path, 'r') as f:
+        return json.load(f)
+
+class Storage:
+    """
+    Runs blocking file I/O on one dedicated thread.
 
-    # Write the sorted config to the file
-    with open(CONFIG_FILE, 'w') as f:
-        json.dump(config, f, indent=4)
+    Coroutines and slash commands hand their reads and writes to this thread instead of calling
+    open() on the event loop, so a slow disk can't stall heartbeats or voice. Having a single
+    thread also keeps writes to the same file in the order they were made.
+    """
+
+    def __init__(self):
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="storage")
+
+    def submit(self, function, *args):
+        """Queues a call without waiting for it; errors are printed. Usable from any thread."""
+        future = self._executor.submit(function, *args)
+        future.add_done_callback(self._report_error)
+        return future
+
+    async def run(self, function, *args):
+        """Runs a call on the storage thread and waits for its result."""
+        return await asyncio.wrap_future(self._executor.submit(function, *args))
+
+    async def read_json(self, path):
+        return await self.run(read_json, path)
+
+    def write_json(self, path, data):
+        """Queues an atomic write of data that must not be changed afterwards."""
+        return self.submit(write_json_atomic, path, data)
+
+    @staticmethod
+    def _report_error(future):
+        if not future.cancelled() and future.exception() is not None:
+            print(f"Error in storage thread: {future.exception()}")
+
+storage = Storage()
+
+'''
+ ____  _                        _   ____  _        _         
+/ ___|| |__   __ _ _ __ ___  __| | / ___|| |_ __ _| |_ ___ _ 
+\___ \| '_ \ / _` | '__/ _ \/ _` | \___ \| __/ _` | __/ _ (_)
+ ___) | | | | (_| | | |  __/ (_| |  ___) | || (_| | ||  __/_ 
+|____/|_| |_|\__,_|_|  \___|\__,_| |____/ \__\__,_|\__\___(_)
+'''
+# SQLite database the processes of a sharded deployment share (see the Sharding section)
+SHARED_STATE_FILE = os.path.join(BASE_DIR, "shared_state.db")
+
+SHARED_STATE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    name TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS fire_claims (
+    trigger TEXT NOT NULL,
+    fire_time REAL NOT NULL,
+    guild_id INTEGER NOT NULL,
+    worker INTEGER,
+    claimed_at REAL NOT NULL,
+    PRIMARY KEY (trigger, fire_time, guild_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS identify_slots (
+    bucket INTEGER PRIMARY KEY,
+    next_at REAL NOT NULL
+);
+"""
+
+class SharedState:
+    """
+    State shared by the processes of a sharded deployment, in a SQLite database in WAL mode.
+
+    - documents: the config, the Easter egg list, the sound list and the auto-join toggle as
+      JSON, each with a version number that goes up on every write, so a process can tell
+      cheaply when another one changed something.
+    - fire_claims: one row per (trigger, fire time, guild). A process only plays in a guild
+      after inserting that row, so every scheduled fire runs exactly once per guild, even if
+      two workers briefly own the same shard.
+    - identify_slots: spaces out gateway logins across processes (see reserve_identify()).
+
+    Each thread gets its own connection; every call is a short transaction.
+    """
+
+    def __init__(self, path, worker=None):
+        self.path = path
+        self.worker = worker
+        self._local = threading.local()
+
+    def connect(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)  # Transactions are explicit
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(SHARED_STATE_SCHEMA)
+            self._local.connection = connection
+        return connection
+
+    @contextmanager
+    def transaction(self):
+        connection = self.connect()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield connection
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    def get(self, name):
+        """Returns (version, data) of a document; (0, None) if it was never written."""
+        row = self.connect().execute("SELECT version, data FROM documents WHERE name = ?", (name,)).fetchone()
+        return (row[0], json.loads(row[1])) if row else (0, None)
+
+    def version(self, name):
+        row = self.connect().execute("SELECT version FROM documents WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else 0
+
+    def versions(self):
+        return dict(self.connect().execute("SELECT name, version FROM documents"))
+
+    def put(self, name, data):
+        """Replaces a document and returns its new version."""
+        with self.transaction() as connection:
+            connection.execute(
+                "INSERT INTO documents (name, data, version, updated_at) VALUES (?, ?, 1, ?) "
+                "ON CONFLICT (name) DO UPDATE SET data = excluded.data, version = version + 1, updated_at = excluded.updated_at",
+                (name, json.dumps(data), time.time())
+            )
+            return connection.execute("SELECT version FROM documents WHERE name = ?", (name,)).fetchone()[0]
+
+    def claim(self, trigger, fire_time, guild_ids):
+        """Claims one fire of a trigger in each guild; returns the IDs of the guilds this process won."""
+        fire_timestamp = fire_time.timestamp()
+        claimed_at = time.time()
+        won = set()
+        with self.transaction() as connection:
+            for guild_id in guild_ids:
+                cursor = connection.execute(
+                    "INSERT OR IGNORE INTO fire_claims (trigger, fire_time, guild_id, worker, claimed_at) VALUES (?, ?, ?, ?, ?)",
+                    (trigger, fire_timestamp, guild_id, self.worker, claimed_at)
+                )
+                if cursor.rowcount:
+                    won.add(guild_id)
+        return won
+
+    def prune_claims(self, before):
+        """Drops claims for fires before `before`; returns how many were dropped."""
+        with self.transaction() as connection:
+            return connection.execute("DELETE FROM fire_claims WHERE fire_time < ?", (before.timestamp(),)).rowcount
+
+    def reserve_identify(self, bucket, interval):
+        """
+        Books the next gateway login in a rate limit bucket and returns how many seconds to wait for it.
+        Discord allows one login per bucket every 5 seconds, across every process of the bot.
+        """
+        now = time.time()
+        with self.transaction() as connection:
+            row = connection.execute("SELECT next_at FROM identify_slots WHERE bucket = ?", (bucket,)).fetchone()
+            slot = max(now, row[0]) if row else now
+            connection.execute("INSERT OR REPLACE INTO identify_slots (bucket, next_at) VALUES (?, ?)", (bucket, slot + interval))
+        return slot - now
+
+# Set in the worker processes of a sharded deployment, where it replaces config.json and easter_eggs.json; None otherwise
+shared_state = SharedState(SHARED_STATE_FILE, worker=WORKER_ID) if WORKER_ID is not None else None
+
+'''
+   ____             __ _         ____  _
+  / ___|___  _ __  / _(_) __ _  / ___|| |_ ___  _ __ ___ _
+ | |   / _ \| '_ \| |_| |/ _` | \___ \| __/ _ \| '__/ _ (_)
+ | |__| (_) | | | |  _| | (_| |  ___) | || (_) | | |  __/_
+  \____\___/|_| |_|_| |_|\__, | |____/ \__\___/|_|  \___(_)
+                         |___/
+'''
+DEFAULT_LOG_SETTINGS = {
+    "embed_title": "HH Cheers Bot Log",
+    "footer_text": "EST. 1/1/2024",
+    "thumbnail_url": "https://i.imgur.com/SKICBLv.png",
+    "footer_icon_url": "https://i.imgur.com/SKICBLv.png"
+}
+
+# How long the config has to stay unchanged before pending edits are written to disk
+CONFIG_FLUSH_DELAY = 1.0
+
+# Recursively wrap dicts and lists so a config snapshot can't be changed in place
+def freeze_config(value):
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze_config(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze_config(item) for item in value)
+    return value
+
+# A plain, mutable copy of (part of) a frozen config snapshot
+def thaw_config(value):
+    if isinstance(value, MappingProxyType):
+        return {key: thaw_config(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [thaw_config(item) for item in value]
+    return value
+
+# Sort the sounds by percentage in descending order (highest first)
+def sort_config_sounds(config):
+    config["sounds"] = dict(sorted(config["sounds"].items(), key=lambda item: item[1], reverse=True))
 
 # Update config to match the sounds in the sound folder and manage sound_status
 def update_config_sounds(config):
@@ -106,67 +1285,174 @@ def update_config_sounds(config):
         config["default_sound"] = random.choice(available_sounds)
         config["sounds"][config["default_sound"]] = 100
 
-    save_config(config)
-
-# Load or create the config file for sounds and mode
-def load_or_create_config():
-    if not os.path.exists(CONFIG_FILE):
-        config = {
-            "sounds": {},
-            "default_sound": None,
-            "mode": "single",
-            "log_settings": {
-                "embed_title": "HH Cheers Bot Log",
-                "footer_text": "EST. 1/1/2024",
-                "thumbnail_url": "https://i.imgur.com/SKICBLv.png",
-                "footer_icon_url": "https://i.imgur.com/SKICBLv.png"
-            }
-        }
-        sounds_in_folder = get_available_sounds()
-        if sounds_in_folder:
-            default_sound = random.choice(sounds_in_folder)
-            config["default_sound"] = default_sound
-            for sound in sounds_in_folder:
-                config["sounds"][sound] = 0.001 if sound != default_sound else 100
-        save_config(config)
-    else:
-        with open(CONFIG_FILE, 'r') as f:
-            config = json.load(f)
-
-        # Ensure new log settings exist
-        if "log_settings" not in config:
-            config["log_settings"] = {
-                "embed_title": "HH Cheers Bot Log",
-                "footer_text": "EST. 1/1/2024",
-                "thumbnail_url": "https://i.imgur.com/SKICBLv.png",
-                "footer_icon_url": "https://i.imgur.com/SKICBLv.png"
+    sort_config_sounds(config)
+
+class ConfigStore:
+    """
+    Keeps config.json in memory as an immutable snapshot.
+
+    Readers get the snapshot without touching the disk. Writers take a copy with edit(),
+    change it and hand it back with commit(); commits are coalesced by a debounce timer and
+    written to disk on the storage thread. Manual edits to config.json are picked up by reload(),
+    or by reload_if_changed() when the file watcher sees the file change.
+
+    In a sharded worker `shared` is set and the config document in the shared state takes the
+    place of the file.
+    """
+
+    def __init__(self, path, flush_delay=CONFIG_FLUSH_DELAY, shared=None):
+        self.path = path
+        self.flush_delay = flush_delay
+        self.shared = shared
+        self._version = None  # Version of the shared config document we last read or wrote
+        self._data = None  # Plain dict behind the current snapshot, never mutated after it is set
+        self._snapshot = None
+        self._on_disk = None  # What config.json held when it was last read or written
+        self._dirty = False
+        self._flush_timer = None
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+
+    @property
+    def snapshot(self):
+        if self._snapshot is None:
+            self.reload()
+        return self._snapshot
+
+    def reload(self):
+        """Reads config.json from disk, syncs it with the sound folder and swaps in the new snapshot."""
+        config = None
+        if self.shared is not None:
+            self._version, config = self.shared.get("config")
+        if config is None and os.path.exists(self.path):
+            with open(self.path, 'r') as f:
+                config = json.load(f)
+
+        if config is None:
+            config = {
+                "sounds": {},
+                "default_sound": None,
+                "mode": "single",
+                "log_settings": dict(DEFAULT_LOG_SETTINGS)
             }
+            sounds_in_folder = get_available_sounds()
+            if sounds_in_folder:
+                default_sound = random.choice(sounds_in_folder)
+                config["default_sound"] = default_sound
+                for sound in sounds_in_folder:
+                    config["sounds"][sound] = 0.001 if sound != default_sound else 100
+            sort_config_sounds(config)
+            self._set(config, persist=True)
+        else:
+            on_disk = copy.deepcopy(config)
+            self._on_disk = on_disk
+
+            # Ensure new log settings exist
+            if "log_settings" not in config:
+                config["log_settings"] = dict(DEFAULT_LOG_SETTINGS)
+            update_config_sounds(config)
+
+            # Only write back when syncing actually changed something
+            self._set(config, persist=config != on_disk)
+
+        return self._snapshot
+
+    def reload_if_changed(self):
+        """Reloads config.json if it no longer holds what the store last read or wrote; returns True if it did."""
+        if self.shared is not None:
+            if self.shared.version("config") == self._version:
+                return False
+            self.reload()
+            return True
+        with open(self.path, 'r') as f:
+            on_disk = json.load(f)
+        if on_disk == self._on_disk:
+            return False  # Our own write
+        self.reload()
+        return True
+
+    def sync_sounds(self):
+        """Adds and removes config entries to match the sound library in one commit; returns True if anything changed."""
+        config = self.edit()
         update_config_sounds(config)
+        if config == self._data:
+            return False
+        self.commit(config)
+        return True
+
+    def edit(self):
+        """Returns a mutable deep copy of the current config for the caller to change and commit()."""
+        if self._data is None:
+            self.reload()
+        return copy.deepcopy(self._data)
+
+    def commit(self, config):
+        """Makes an edited config the current snapshot and schedules it to be written to disk."""
+        sort_config_sounds(config)
+        self._set(config, persist=True)
+
+    def flush(self):
+        """Writes any pending changes to disk now."""
+        # The write lock keeps flushes in order; the state lock is only held long enough to grab the data
+        with self._write_lock:
+            with self._lock:
+                if self._flush_timer is not None:
+                    self._flush_timer.cancel()
+                    self._flush_timer = None
+                if not self._dirty:
+                    return
+                data = self._data
+                self._dirty = False
+            if self.shared is not None:
+                self._version = self.shared.put("config", data)
+            else:
+                write_json_atomic(self.path, data)
+            self._on_disk = data
+
+    def _set(self, config, persist):
+        with self._lock:
+            self._data = config
+            self._snapshot = freeze_config(config)
+            if persist:
+                self._dirty = True
+                self._schedule_flush()
+
+    # Restart the debounce timer so a burst of commits ends up as a single write
+    def _schedule_flush(self):
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+        self._flush_timer = threading.Timer(self.flush_delay, storage.submit, (self.flush,))
+        self._flush_timer.daemon = True
+        self._flush_timer.start()
+
+config_store = ConfigStore(CONFIG_FILE, shared=shared_state)
+
+# Make sure edits still waiting on the debounce timer reach the disk on shutdown
+atexit.register(config_store.flush)
+
+# Commit an edited config; it is written to disk shortly after by the config store
+def save_config(config):
+    config_store.commit(config)
 
-    return config
+# Get the current config snapshot (read-only, no disk access)
+@config_load_seconds.timed
+def load_or_create_config():
+    return config_store.snapshot
 
 # Pull the values from the config.json file
 config = load_or_create_config()
 STARTUP_CHANNEL_ID = config["startup_and_roles"].get("startup_channel_id")
-ROLE_NEEDED_FOR_GENERAL_COMMAND = config["startup_and_roles"].get("role_needed_for_general_command")
-ROLE_NEEDED_FOR_RELOAD_COMMAND = config["startup_and_roles"].get("role_needed_for_reload_command")
+sound_library.configure(config.get("sound_library", {}))
+ffmpeg_pool.configure(config.get("ffmpeg_pool", {}))
 
 # Default sound from config
 DEFAULT_SOUND_FILE = os.path.join(SOUND_FOLDER, f"{config.get('default_sound_file', 'cheers_bitch')}.mp3")
 selected_sound = DEFAULT_SOUND_FILE
 
-# Easter Egg List
-easter_eggs = []
-
 # Path to the Easter Egg JSON file
-EASTER_EGG_FILE = "easter_eggs.json"
-
+EASTER_EGG_FILE = os.path.join(BASE_DIR, "easter_eggs.json")
 
 
-# Backup old config and create a new one
-def backup_and_create_new_config(config):
-    os.rename(CONFIG_FILE, CONFIG_FILE + ".backup")
-    save_config(config)
 
 
 
@@ -178,8 +1464,29 @@ def backup_and_create_new_config(config):
  |_____\__,_|___/\__\___|_|    |_____\__, |\__, | |___/\__|_|   \__,_|\___|\__|\__,_|_|  \___(_)
                                      |___/ |___/                                                
 '''
+# An Easter egg whose join time passed less than this many seconds ago still fires (e.g. right after a restart)
+EASTER_EGG_GRACE_SECONDS = 60
+
+# Current time in UTC, used by all the scheduling code
+def utc_now():
+    return datetime.now(pytz.utc)
+
+# Fields of an Easter egg as stored in the JSON file, in order
+EASTER_EGG_FIELDS = ("name", "sound", "join_time", "play_delay", "timezone", "enabled", "last_triggered")
+
+# Parse a join time ("4:15 PM"); there are only 1440 different ones, so eggs share the parsed times
+@functools.lru_cache(maxsize=2048)
+def parse_join_time(join_time):
+    return datetime.strptime(join_time, "%I:%M %p").time()
+
 class EasterEgg:
-    def __init__(self, name, sound, join_time, play_delay, timezone, enabled=True, last_triggered=None):
+    # No per-egg __dict__: tens of thousands of eggs across guilds stay small
+    __slots__ = (
+        "name", "sound", "_join_time", "join_clock", "play_delay", "timezone",
+        "enabled", "last_triggered", "guild_id"
+    )
+
+    def __init__(self, name, sound, join_time, play_delay, timezone, enabled=True, last_triggered=None, guild_id=None):
         self.name = name
         self.sound = sound
         self.join_time = join_time
@@ -187,70 +1494,293 @@ class EasterEgg:
         self.timezone = timezone
         self.enabled = enabled
         self.last_triggered = last_triggered  # Keep it None if it hasn't been triggered
+        self.guild_id = guild_id  # Only fires in this guild; None fires in every guild
 
-    def get_converted_time(self):
-        tz_name = self.timezone
-        abbreviation_mapping = build_timezone_mapping()
+    @property
+    def join_time(self):
+        return self._join_time
 
-        # Map abbreviation to full timezone name if necessary
-        if tz_name in abbreviation_mapping:
-            tz_name = abbreviation_mapping[tz_name]
+    @join_time.setter
+    def join_time(self, value):
+        self.join_clock = parse_join_time(value)  # Parsed once here instead of on every tick; raises ValueError
+        self._join_time = value
 
+    @converted_time_seconds.timed
+    def get_converted_time(self):
         try:
-            tz = pytz.timezone(tz_name)
-            join_time = datetime.strptime(self.join_time, "%I:%M %p")  # Parse join_time as naive
-            now = datetime.now(tz)
-            # Combine today's date with the provided time
-            join_time = join_time.replace(year=now.year, month=now.month, day=now.day)
+            # Abbreviations (CST, JST, ...) are mapped to full timezone names by the resolver
+            tz = timezone_resolver.resolve(self.timezone)
+            now = utc_now().astimezone(tz)
+            # Combine today's date with the join time (naive)
+            join_time = datetime.combine(now.date(), self.join_clock)
             join_time_aware = tz.localize(join_time)
             return join_time_aware.astimezone(pytz.utc)  # Return join time in UTC
         except pytz.UnknownTimeZoneError:
             print(f"Error: Invalid timezone '{self.timezone}'")
             return None
 
-    def can_trigger(self):
-        """Checks if the Easter Egg can be triggered based on last trigger and current time."""
-        now_utc = datetime.now(pytz.utc)  # Get current time in UTC
-        join_time_utc = self.get_converted_time()  # Convert join_time to UTC
-
-        if join_time_utc is None:
-            print(f"Error: Cannot check trigger for Easter Egg '{self.name}' due to invalid timezone.")
-            return False
-
-    # If never triggered, check if the current UTC time has passed the join_time
-        if self.last_triggered is None:
-            if now_utc >= join_time_utc:
-                self.mark_triggered()  # Mark it as triggered
-                return True
+    def next_trigger_time(self, after_utc):
+        """Returns the first UTC time at or after `after_utc` when the join time comes round in the egg's timezone."""
+        try:
+            tz = timezone_resolver.resolve(self.timezone)
+        except pytz.UnknownTimeZoneError:
+            print(f"Error: Invalid timezone '{self.timezone}'")
+            return None
 
-        # Check if it hasn't been triggered today and the join_time has passed
-        last_triggered_date = self.last_triggered.date() if self.last_triggered else None
-        now_date = now_utc.date()
+        join_time = self.join_clock
+        local_date = after_utc.astimezone(tz).date()
 
-        if last_triggered_date is None:  # Handle case when last_triggered is None
+        # The next occurrence is at most two local days away
+        for day_offset in range(3):
+            local_join = datetime.combine(local_date + timedelta(days=day_offset), join_time)
+            try:
+                join_time_aware = tz.localize(local_join, is_dst=None)
+            except pytz.NonExistentTimeError:
+                # Skipped by a DST jump forward: fire at the same wall-clock offset after the jump
+                join_time_aware = tz.normalize(tz.localize(local_join, is_dst=False))
+            except pytz.AmbiguousTimeError:
+                # Repeated by a DST jump back: fire on the first pass only
+                join_time_aware = tz.localize(local_join, is_dst=True)
+
+            join_time_utc = join_time_aware.astimezone(pytz.utc)
+            if join_time_utc >= after_utc:
+                return join_time_utc
+        return None
+
+    def trigger_window_start(self, now_utc):
+        """Earliest join time that still counts as due: within the grace period, and never one that already fired."""
+        window_start = now_utc - timedelta(seconds=EASTER_EGG_GRACE_SECONDS)
+        if self.last_triggered is not None and self.last_triggered >= window_start:
+            window_start = self.last_triggered + timedelta(seconds=1)
+        return window_start
+
+    def can_trigger(self, now_utc=None):
+        """Checks if the Easter Egg is enabled and its join time has come round since it last fired."""
+        if not self.enabled:
             return False
+        now_utc = now_utc or utc_now()
+        fire_time = self.next_trigger_time(self.trigger_window_start(now_utc))
+        return fire_time is not None and fire_time <= now_utc
 
-        if now_date != last_triggered_date:
-            if now_utc >= join_time_utc:
-                self.mark_triggered()  # Update last_triggered to now
-                return True
-
-    def mark_triggered(self):
+    def mark_triggered(self, when=None):
         """Marks the Easter Egg as triggered by setting the current UTC time."""
-        self.last_triggered = datetime.now(pytz.utc)
-
-# Save Easter Eggs to JSON
+        self.last_triggered = when or utc_now()
+
+# An Easter Egg as it is stored in the JSON file (or, for a guild's own eggs, in the guild's settings)
+# (guild_id is implied by where the egg is stored)
+def easter_egg_to_json(egg):
+    data = {field: getattr(egg, field) for field in EASTER_EGG_FIELDS}
+    # Convert datetime objects to ISO format strings for serialization
+    data["last_triggered"] = egg.last_triggered.isoformat() if egg.last_triggered else None
+    return data
+
+class EasterEggRegistry:
+    """
+    A list of Easter eggs (every guild's, or one guild's own) indexed by case-folded name,
+    so commands find an egg with one dict lookup instead of scanning. Iterates in the order
+    the eggs were added, which is the order they are saved in.
+    """
+
+    def __init__(self, eggs=()):
+        self._by_name = {}
+        for egg in eggs:
+            self.add(egg)
+
+    def __iter__(self):
+        return iter(self._by_name.values())
+
+    def __len__(self):
+        return len(self._by_name)
+
+    def find(self, name):
+        return self._by_name.get(name.casefold())
+
+    def add(self, egg):
+        """Adds the egg; returns False (and adds nothing) if an egg with the same name is already here."""
+        key = egg.name.casefold()
+        if key in self._by_name:
+            return False
+        self._by_name[key] = egg
+        return True
+
+    def remove(self, egg):
+        if self._by_name.get(egg.name.casefold()) is egg:
+            del self._by_name[egg.name.casefold()]
+
+# Append-only log of the changes made to the Easter eggs in the Easter egg file since it was last written
+EASTER_EGG_JOURNAL_FILE = os.path.join(BASE_DIR, "easter_eggs.journal")
+
+# Once the journal holds this many records it is folded into the Easter egg file and emptied
+EASTER_EGG_JOURNAL_COMPACT_RECORDS = 1000
+
+class EasterEggJournal:
+    """
+    Append-only journal of fires and deletes of the Easter eggs in easter_eggs.json.
+
+    Each change appends one small record instead of rewriting the whole file; records that
+    arrive while a write is in progress go out together in the next write, with one fsync.
+    Every line carries a CRC, so a line cut short by a crash is recognised and cut off when
+    the journal is read back. The file is written and read as bytes, so the lines end in a
+    bare newline on every platform and the CRC always covers exactly what was written. Compaction writes the full file atomically and only then drops
+    the records it covered, and replaying a record the file already includes changes nothing,
+    so a crash at any point leaves a consistent state.
+
+    Each record also carries the egg's entry as it stood in the file when the record was made
+    (`base`), and is only replayed onto an entry that still matches it: an egg edited, reset or
+    re-added by hand since then keeps the hand edit.
+    """
+
+    def __init__(self, path, snapshot_path, compact_records=EASTER_EGG_JOURNAL_COMPACT_RECORDS):
+        self.path = path
+        self.snapshot_path = snapshot_path
+        self.compact_records = compact_records
+        self.records = 0  # Records since the last compaction, written or not
+        self.seq = 0
+        self._pending = []  # (seq, encoded line) waiting to be written
+        self._written = []  # (seq, encoded line) written since the last compaction
+        self._snapshot = {}  # Casefolded name -> entry, as the Easter egg file was last read or written
+        self._flush_queued = False
+        self._lock = threading.Lock()
+
+    def append(self, record):
+        """Queues a record; the storage thread writes it together with whatever else is queued by then."""
+        line = json.dumps(record, separators=(",", ":")).encode()
+        with self._lock:
+            self.seq += 1
+            self.records += 1
+            self._pending.append((self.seq, b"%08x %s\n" % (zlib.crc32(line), line)))
+            queue_flush = not self._flush_queued
+            self._flush_queued = True
+        journal_records.inc()
+        if queue_flush:
+            storage.submit(self.flush)
+
+    def base(self, name):
+        """The entry for `name` in the Easter egg file as it was last read or written, or None."""
+        with self._lock:
+            return self._snapshot.get(name.casefold())
+
+    def set_snapshot(self, entries):
+        snapshot = {}
+        for entry in entries:
+            snapshot.setdefault(str(entry.get("name")).casefold(), entry)
+        with self._lock:
+            self._snapshot = snapshot
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, []
+            self._flush_queued = False
+        if not pending:
+            return
+        with open(self.path, "ab") as f:
+            f.write(b"".join(line for _, line in pending))
+            f.flush()
+            os.fsync(f.fileno())
+        self._written.extend(pending)
+        journal_syncs.inc()
+
+    def read(self):
+        """The records on disk, in order. A damaged last line (a crash mid-append) is cut off the file."""
+        try:
+            f = open(self.path, "rb")
+        except FileNotFoundError:
+            return []
+        records = []
+        good_bytes = 0
+        with f:
+            for raw in f:
+                try:
+                    checksum, line = raw.split(b" ", 1)
+                    if not line.endswith(b"\n") or int(checksum, 16) != zlib.crc32(line[:-1]):
+                        raise ValueError("checksum mismatch")
+                    records.append(json.loads(line))
+                except ValueError:
+                    print(f"Dropping a damaged record at the end of {self.path}")
+                    break
+                good_bytes += len(raw)
+        if good_bytes < os.path.getsize(self.path):
+            os.truncate(self.path, good_bytes)
+        with self._lock:
+            self.records = max(self.records, len(records) + len(self._pending))
+        return records
+
+    def compact(self, data, upto=None):
+        """Writes `data` as the Easter egg file, then drops the records up to `upto` (all of them by default)."""
+        self.flush()
+        write_json_atomic(self.snapshot_path, data)
+        self.set_snapshot(data)
+        with self._lock:
+            self._written = [(seq, line) for seq, line in self._written if upto is not None and seq > upto]
+            self.records = len(self._written) + len(self._pending)
+        write_bytes_atomic(self.path, b"".join(line for _, line in self._written))
+        journal_compactions.inc()
+
+easter_egg_journal = EasterEggJournal(EASTER_EGG_JOURNAL_FILE, EASTER_EGG_FILE)
+
+# Make sure records still waiting for the storage thread reach the disk on shutdown
+atexit.register(easter_egg_journal.flush)
+
+# Apply journal records to the entries of the Easter egg file. A record only applies to an entry that still
+# matches its `base`, so records the file already includes, and eggs changed by hand since, are left alone
+def apply_easter_egg_records(entries, records):
+    positions = {}
+    for position, entry in enumerate(entries):
+        positions.setdefault(str(entry.get("name")).casefold(), position)
+
+    result = list(entries)
+    deleted = set()
+    for record in records:
+        position = positions.get(str(record.get("name")).casefold())
+        if position is None:
+            continue
+        if "base" in record and record["base"] != entries[position]:
+            continue
+        if record.get("op") == "delete":
+            deleted.add(position)
+        elif record.get("op") == "fired":
+            result[position] = {**result[position], "last_triggered": record.get("last_triggered")}
+    return [entry for position, entry in enumerate(result) if position not in deleted]
+
+# Save the full Easter egg list, compacting the journal; the file is written on the storage thread, this only takes a copy of the list
 def save_easter_eggs():
-    with open(EASTER_EGG_FILE, 'w') as f:
-        # Convert datetime objects to ISO format strings for serialization
-        data = [
-            {
-                **egg.__dict__,
-                "last_triggered": egg.last_triggered.isoformat() if egg.last_triggered else None
-            }
-            for egg in easter_eggs
-        ]
-        json.dump(data, f, indent=4)
+    data = [easter_egg_to_json(egg) for egg in easter_eggs]
+    if shared_state is not None:
+        return storage.submit(shared_state.put, "easter_eggs", data)
+    return storage.submit(easter_egg_journal.compact, data, easter_egg_journal.seq)
+
+# Record fired or deleted Easter eggs of every guild: a journal record each instead of rewriting the file
+def journal_easter_eggs(eggs, deleted=False):
+    if shared_state is not None:
+        return save_easter_eggs()  # Sharded workers keep the list in the shared state
+    for egg in eggs:
+        base = easter_egg_journal.base(egg.name)
+        if deleted:
+            easter_egg_journal.append({"op": "delete", "name": egg.name, "base": base})
+        else:
+            last_triggered = egg.last_triggered.isoformat() if egg.last_triggered else None
+            easter_egg_journal.append({"op": "fired", "name": egg.name, "last_triggered": last_triggered, "base": base})
+    if easter_egg_journal.records >= easter_egg_journal.compact_records:
+        save_easter_eggs()
+
+# easter_eggs.json with the journal replayed on top of it (blocking)
+def read_easter_egg_file():
+    try:
+        entries = read_json(EASTER_EGG_FILE)
+    except FileNotFoundError:
+        entries = []
+        if not os.path.exists(easter_egg_journal.path):
+            raise
+    easter_egg_journal.set_snapshot(entries)
+    return apply_easter_egg_records(entries, easter_egg_journal.read())
+
+# The stored Easter egg list: easter_eggs.json, or the shared state in a sharded worker (blocking)
+def read_easter_egg_data():
+    if shared_state is not None:
+        _, data = shared_state.get("easter_eggs")
+        if data is not None:
+            return data
+    return read_easter_egg_file()
 
 '''
   _____ _                _____                  _                _        
@@ -295,220 +1825,1209 @@ def build_timezone_mapping():
         print(f"Error fetching timezones: {e}")
         return {}
 
+class TimezoneResolver:
+    """
+    Resolves timezone names and abbreviations to tzinfo objects.
+
+    The abbreviation index from build_timezone_mapping() is built once, on first use
+    (or when warm() is called at startup), and every resolved tzinfo is cached.
+    """
+
+    def __init__(self):
+        self._abbreviations = None
+        self._tz_cache = {}
+        self._lock = threading.Lock()
+
+    @property
+    def abbreviations(self):
+        if self._abbreviations is None:
+            self.warm()
+        return self._abbreviations
+
+    def warm(self):
+        """Builds the abbreviation index if it hasn't been built yet."""
+        with self._lock:
+            if self._abbreviations is None:
+                self._abbreviations = build_timezone_mapping()
+
+    def resolve(self, tz_name):
+        """Returns the tzinfo for a name or abbreviation, raising pytz.UnknownTimeZoneError if there is none."""
+        tz = self._tz_cache.get(tz_name)
+        if tz is None:
+            # Map abbreviation to full timezone name if necessary
+            tz = pytz.timezone(self.abbreviations.get(tz_name, tz_name))
+            self._tz_cache[tz_name] = tz
+        return tz
+
+timezone_resolver = TimezoneResolver()
+
+'''
+  ____       _              _       _
+ / ___|  ___| |__   ___  __| |_   _| | ___  ___ _
+ \___ \ / __| '_ \ / _ \/ _` | | | | |/ _ \/ __(_)
+  ___) | (__| | | |  __/ (_| | |_| | |  __/\__ \_
+ |____/ \___|_| |_|\___|\__,_|\__,_|_|\___||___(_)
+
+'''
+# Longest single sleep of the schedulers, so changes to the system clock are noticed in time
+SCHEDULER_MAX_SLEEP = 60
+
+class CronSchedule:
+    """
+    A cron-like schedule ("minute hour day-of-month month day-of-week"), evaluated in UTC.
+
+    Each field accepts *, N, N-M, */S, N-M/S and comma separated lists of those, e.g. "15 * * * *"
+    for every hour at x:15 or "0,30 9-17 * * 1-5" for every half hour during weekday office hours.
+    """
+
+    FIELD_RANGES = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 7)]
+
+    def __init__(self, expression):
+        self.expression = expression
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Invalid schedule '{expression}': expected 5 fields, got {len(fields)}")
+
+        parsed = [self._parse_field(field, low, high) for field, (low, high) in zip(fields, self.FIELD_RANGES)]
+        self.minutes, self.hours, self.days, self.months, weekdays = parsed
+        self.weekdays = {day % 7 for day in weekdays}  # Both 0 and 7 mean Sunday
+        self.any_day = fields[2] == "*"
+        self.any_weekday = fields[4] == "*"
+
+    @staticmethod
+    def _parse_field(field, low, high):
+        values = set()
+        for part in field.split(","):
+            value_range, _, step = part.partition("/")
+            if value_range == "*":
+                start, end = low, high
+            elif "-" in value_range:
+                start, end = (int(value) for value in value_range.split("-", 1))
+            else:
+                start = end = int(value_range)
+            step = int(step) if step else 1
+            if not (low <= start <= end <= high) or step < 1:
+                raise ValueError(f"Invalid schedule field '{field}': values must be within {low}-{high}")
+            values.update(range(start, end + 1, step))
+        return values
+
+    def _day_matches(self, moment):
+        day_match = moment.day in self.days
+        weekday_match = (moment.weekday() + 1) % 7 in self.weekdays  # cron counts from Sunday = 0
+        # Like cron: when both day fields are restricted, either one matching is enough
+        if self.any_day or self.any_weekday:
+            return day_match and weekday_match
+        return day_match or weekday_match
+
+    def next_after(self, after):
+        """Returns the first matching minute strictly after `after` (an aware datetime), in UTC."""
+        moment = after.astimezone(pytz.utc).replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = moment + timedelta(days=366 * 5)
+        while moment < limit:
+            if moment.month not in self.months:
+                moment = (moment.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self._day_matches(moment):
+                moment = moment.replace(hour=0, minute=0) + timedelta(days=1)
+            elif moment.hour not in self.hours:
+                moment = moment.replace(minute=0) + timedelta(hours=1)
+            elif moment.minute not in self.minutes:
+                moment += timedelta(minutes=1)
+            else:
+                return moment
+        raise ValueError(f"Schedule '{self.expression}' never matches")
+
+class WallClockTrigger:
+    """
+    Sleeps until the next instant of a CronSchedule and awaits `callback(fire_time, lateness)` exactly once for it.
+
+    Instants that pass while the trigger can't fire them (event loop stall, system suspend, a callback
+    still running) are handled by the missed policy: "skip" drops them, "catch_up" runs the most recent
+    one straight away. An instant the trigger wakes up for more than `max_lateness` seconds late counts
+    as missed too. Several missed instants never turn into several runs.
+    """
+
+    MISSED_POLICIES = ("skip", "catch_up")
+
+    def __init__(self, name, schedule, callback, missed_policy="skip", max_lateness=60, clock=utc_now):
+        if missed_policy not in self.MISSED_POLICIES:
+            raise ValueError(f"Invalid missed policy '{missed_policy}', choose from {', '.join(self.MISSED_POLICIES)}")
+        self.name = name
+        self.schedule = schedule
+        self.callback = callback
+        self.missed_policy = missed_policy
+        self.max_lateness = max_lateness
+        self.clock = clock
+        self.fired = 0
+        self.missed = 0
+        self.last_lateness = None
+        self._task = None
+        self._firing = False
+        self._stopped = False
+
+    def is_running(self):
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        if not self.is_running():
+            self._stopped = False
+            self._task = asyncio.create_task(self.run())
+
+    def stop(self):
+        """Stops the trigger. A run in progress is never cancelled: the trigger finishes it, then exits."""
+        if self._task is None:
+            return
+        if self._firing:
+            self._stopped = True
+        else:
+            self._task.cancel()
+        self._task = None
+
+    async def run(self):
+        fire_time = self.schedule.next_after(self.clock())
+        while True:
+            # Sleep in short steps so changes to the system clock are noticed in time
+            delay = (fire_time - self.clock()).total_seconds()
+            if delay > 0:
+                await asyncio.sleep(min(delay, SCHEDULER_MAX_SLEEP))
+                continue
+
+            self._firing = True
+            try:
+                await self.fire(fire_time)
+            finally:
+                self._firing = False
+            if self._stopped:
+                return
+            fire_time = self.next_fire_time(fire_time)
+
+    async def fire(self, fire_time):
+        lateness = (self.clock() - fire_time).total_seconds()
+        if lateness > self.max_lateness and self.missed_policy == "skip":
+            self.missed += 1
+            triggers_missed.inc(trigger=self.name)
+            print(f"{self.name}: skipped the {fire_time:%H:%M} UTC run, woke up {lateness:.1f}s late")
+            return
+
+        self.fired += 1
+        self.last_lateness = lateness
+        record_trigger(self.name, lateness)
+        print(f"{self.name}: {fire_time:%H:%M} UTC run fired {lateness:.3f}s late")
+        try:
+            await self.callback(fire_time, lateness)
+        except Exception as e:
+            print(f"Error in {self.name}: {e}")
+
+    def next_fire_time(self, last_fire_time):
+        """Picks the instant to fire after `last_fire_time`, applying the missed policy to any that already passed."""
+        now = self.clock()
+        upcoming = self.schedule.next_after(now)
+        passed = []
+        fire_time = self.schedule.next_after(last_fire_time)
+        while fire_time < upcoming:
+            passed.append(fire_time)
+            fire_time = self.schedule.next_after(fire_time)
+
+        if not passed:
+            return upcoming
+        if self.missed_policy == "catch_up":
+            self.missed += len(passed) - 1
+            triggers_missed.inc(len(passed) - 1, trigger=self.name)
+            return passed[-1]
+
+        self.missed += len(passed)
+        triggers_missed.inc(len(passed), trigger=self.name)
+        print(f"{self.name}: skipped {len(passed)} run(s) that came round while the previous one was running")
+        return upcoming
+
 # Global variable to enable/disable auto-join
 auto_join_enabled = True
 
-# Auto-join task that runs every second
-@tasks.loop(seconds=5)
-async def auto_join_task():
+# Defaults for the "auto_join" section of config.json
+AUTO_JOIN_SCHEDULE = "15 * * * *"  # Join at x:15 every hour (UTC)
+AUTO_JOIN_PLAY_DELAY = 5  # Minutes between joining and playing
+AUTO_JOIN_MISSED_POLICY = "skip"
+AUTO_JOIN_MAX_LATENESS = 60  # Seconds
+AUTO_JOIN_MAX_CONCURRENT_CONNECTS = 5  # Voice connects allowed in flight at once, to stay under Discord's rate limits
+AUTO_JOIN_CONNECT_JITTER = 3.0  # Each guild waits a random 0..N seconds before connecting so they don't all land at once
+
+# Auto-join run, fired by auto_join_trigger at every scheduled join time
+async def auto_join_task(fire_time, lateness):
     global auto_join_enabled
 
-    # Auto-join task logic for every x:15
     if auto_join_enabled:
-        now = datetime.now(pytz.utc)
-        if now.minute == 15 and now.second == 0:
-            for guild in bot.guilds:
-                voice_channel = get_most_populated_voice_channel(guild)
-                if voice_channel:
-                    try:
-                        join_time = datetime.now()  # Capture join time
-                        vc = await voice_channel.connect(reconnect=True)
-                        print(f"Automatically joined {voice_channel.name}")
-                        # Add a small delay before playing the sound to ensure the connection stabilizes
-                        await asyncio.sleep(2)  # Wait for 2 seconds before proceeding
-
-                        next_time = (now + timedelta(minutes=5)).replace(second=0, microsecond=0)
-                        sleep_duration = (next_time - now).total_seconds()
-                        await asyncio.sleep(sleep_duration)
-                        sound_to_play = choose_sound()
-
-                        # Define the after function to disconnect after the sound is done
-                        def after_playing(error):
-                            coro = vc.disconnect()
-                            fut = asyncio.run_coroutine_threadsafe(coro, bot.loop)
-                            try:
-                                fut.result()  # Ensure any exceptions are handled
-                            except Exception as e:
-                                print(f"Error disconnecting: {e}")
-
-                        vc.play(
-                            discord.FFmpegOpusAudio(sound_to_play, executable=ffmpeg_path),
-                            after=after_playing  # Pass the after function
-                        )
-
-                        leave_time = datetime.now()  # Capture leave time
-
-                        # Log the action after the bot leaves the voice channel
-                        await log_action(
-                            voice_channel=voice_channel,
-                            sound_name=os.path.basename(sound_to_play),
-                            is_easter_egg=False,
-                            mode=load_or_create_config()["mode"],
-                            join_time=join_time,
-                            leave_time=leave_time
-                        )
-                    except Exception as e:
-                        print(f"Error occurred during auto join/play: {e}")
+        settings = load_or_create_config().get("auto_join", {})
+        play_time = fire_time + timedelta(minutes=settings.get("play_delay_minutes", AUTO_JOIN_PLAY_DELAY))
+        await run_auto_join(play_time)
+
+# Build the auto-join trigger from the current config
+def create_auto_join_trigger(callback=auto_join_task, clock=utc_now):
+    settings = load_or_create_config().get("auto_join", {})
+    return WallClockTrigger(
+        "Auto-join",
+        CronSchedule(settings.get("schedule", AUTO_JOIN_SCHEDULE)),
+        callback,
+        missed_policy=settings.get("missed_policy", AUTO_JOIN_MISSED_POLICY),
+        max_lateness=settings.get("max_lateness_seconds", AUTO_JOIN_MAX_LATENESS),
+        clock=clock
+    )
 
-# New task to check for Easter Egg triggers independently
-@tasks.loop(seconds=5)
-async def easter_egg_task():
-    try:
-        now = datetime.now(pytz.utc)
-
-        # Easter Egg triggers
-        for easter_egg in easter_eggs:
-            if easter_egg.enabled and easter_egg.can_trigger():
-                join_time_utc = easter_egg.get_converted_time()
-                if join_time_utc and now.strftime("%H:%M") == join_time_utc.strftime("%H:%M"):
-                    for guild in bot.guilds:
-                        voice_channel = get_most_populated_voice_channel(guild)
-                        if voice_channel:
-                            print(f"Triggering Easter Egg '{easter_egg.name}' in {voice_channel.name}")
-                            await handle_easter_egg_trigger(easter_egg, voice_channel, guild)
-                            easter_egg.mark_triggered()
-                            save_easter_eggs()
-    except Exception as e:
-        print(f"Error in easter_egg_task: {e}")
+auto_join_trigger = None
 
-# Handle Easter Egg Trigger
-async def handle_easter_egg_trigger(easter_egg, voice_channel, guild):
+# (Re)start the auto-join trigger, e.g. after the schedule in config.json changed. The new trigger is
+# built first, so invalid settings keep the current one; a run already in progress still finishes.
+def restart_auto_join_trigger():
+    global auto_join_trigger
     try:
-        join_time = datetime.now()  # Capture join time when the bot joins
-
-        # Check if already connected to a voice channel
-        if guild.voice_client is None:
-            print(f"Bot is not connected. Joining {voice_channel.name}...")
-            vc = await voice_channel.connect()
-            print(f"Joined {voice_channel.name}.")
+        trigger = create_auto_join_trigger()
+    except (ValueError, TypeError) as e:
+        if auto_join_trigger is not None and auto_join_trigger.is_running():
+            print(f"Error in the auto_join settings, keeping the current schedule: {e}")
         else:
-            vc = guild.voice_client
-            print(f"Bot is already connected to {vc.channel.name}.")
-
-        # Apply delay if configured
-        if easter_egg.play_delay > 0:
-            print(f"Delaying sound for {easter_egg.play_delay} minutes...")
-            await asyncio.sleep(easter_egg.play_delay * 60)
-
-        sound_to_play = os.path.join(SOUND_FOLDER, f"{easter_egg.sound}.mp3")
-        print(f"Playing sound: {sound_to_play}")
-
-        # Function to disconnect after sound is done
-        async def after_playing(vc):
-            if vc.is_connected():
-                await vc.disconnect()
+            print(f"Error in the auto_join settings, auto-join won't run until they are fixed: {e}")
+        return
+    if auto_join_trigger is not None:
+        auto_join_trigger.stop()
+    auto_join_trigger = trigger
+    auto_join_trigger.start()
+
+# Join every guild at once (within the connect limit) and play in all of them at play_time
+async def run_auto_join(play_time):
+    settings = load_or_create_config().get("auto_join", {})
+    connect_slots = asyncio.Semaphore(settings.get("max_concurrent_connects", AUTO_JOIN_MAX_CONCURRENT_CONNECTS))
+    jitter = settings.get("connect_jitter_seconds", AUTO_JOIN_CONNECT_JITTER)
+
+    guilds = await claim_guilds("Auto-join", play_time, bot.guilds)
+    sounds = choose_sounds([guild.id for guild in guilds])
+    skews = await asyncio.gather(
+        *(auto_join_guild(guild, sounds[guild.id], play_time, connect_slots, jitter) for guild in guilds)
+    )
 
-        # Start playing the sound
-        vc.play(
-            discord.FFmpegPCMAudio(sound_to_play, executable=ffmpeg_path),
-            after=lambda e: asyncio.create_task(after_playing(vc))
+    # Report how far behind the target play time the guilds actually started playing
+    skews = [skew for skew in skews if skew is not None]
+    if skews:
+        print(
+            f"Auto-join played in {len(skews)} guild(s): play time skew "
+            f"min {min(skews):.3f}s, avg {sum(skews) / len(skews):.3f}s, max {max(skews):.3f}s"
         )
-        # Capture the leave time after playing
-        leave_time = datetime.now()
 
-    except Exception as e:
-        print(f"Error in handle_easter_egg_trigger: {e}")
-        leave_time = datetime.now()  # Ensure leave_time is initialized even on error
+# Auto-join one guild and play sound_to_play; returns how many seconds after play_time the sound started, or None if nothing played
+async def auto_join_guild(guild, sound_to_play, play_time, connect_slots, jitter):
+    voice_channel = get_most_populated_voice_channel(guild)
+    if not voice_channel or sound_to_play is None:
+        return None
 
-        # Log the Easter egg action after the bot leaves the voice channel
+    try:
+        await asyncio.sleep(random.uniform(0, jitter))
+        async with connect_slots:
+            join_time = datetime.now()  # Capture join time
+            await voice_sessions.connect(voice_channel)
+        print(f"Automatically joined {voice_channel.name}")
+
+        # The connection is re-checked and the sound primed just before play_time
+        settings = guild_settings.get(guild.id)
+        request = await voice_sessions.play_at(voice_channel, sound_to_play, play_time)
+        leave_time = await request.finished  # Wait for the sound to finish
+        skew = (request.started.result() - play_time).total_seconds()
+
+        # Log the action after the sound has played
         await log_action(
             voice_channel=voice_channel,
-            sound_name=easter_egg.sound,  # Use the Easter egg's sound name
-            is_easter_egg=True,  # Indicate that it was an Easter egg
-            mode=load_or_create_config()["mode"],  # Pass the current mode
+            sound_name=os.path.basename(sound_to_play),
+            is_easter_egg=False,
+            mode=settings.mode,
             join_time=join_time,
-            leave_time=leave_time,
-            easter_egg_details={"name": easter_egg.name, "timezone": easter_egg.timezone},  # Optional details
-            user=None  # Since this is automated, no user involved
+            leave_time=leave_time
         )
+        return skew
     except Exception as e:
-        print(f"Error occurred during Easter Egg activation: {e}")
+        print(f"Error occurred during auto join/play in {guild.name}: {e}")
+        return None
+
+class EasterEggScheduler:
+    """
+    Fires Easter Eggs at their join time, `lead` early so the bot can connect before the sound is due.
+
+    Each enabled egg's next UTC occurrence is computed once and kept in a min-heap; the
+    scheduler sleeps until the earliest one is due. Adding, deleting, enabling or disabling
+    an egg only recomputes that egg's entry (schedule/unschedule) and wakes the scheduler.
+    """
+
+    def __init__(self, clock=utc_now, lead=timedelta(0)):
+        self.clock = clock
+        self.lead = lead
+        self._heap = []  # (fire_time, sequence, egg); entries not in _entries are stale and skipped
+        self._entries = {}  # egg -> sequence of its live heap entry
+        self._sequence = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._task = None
+
+    def schedule(self, easter_egg):
+        """(Re)computes the next fire time of one egg."""
+        self._entries.pop(easter_egg, None)
+        if easter_egg.enabled:
+            fire_time = easter_egg.next_trigger_time(easter_egg.trigger_window_start(self.clock()))
+            if fire_time is not None:
+                sequence = next(self._sequence)
+                self._entries[easter_egg] = sequence
+                heapq.heappush(self._heap, (fire_time, sequence, easter_egg))
+        self._compact()
+        self._wakeup.set()
+
+    def unschedule(self, easter_egg):
+        self._entries.pop(easter_egg, None)
+        self._compact()
+        self._wakeup.set()
+
+    def reschedule_all(self, eggs):
+        """Rebuilds the heap from scratch, e.g. after the egg file is reloaded."""
+        self._heap = []
+        self._entries = {}
+        for easter_egg in eggs:
+            self.schedule(easter_egg)
+
+    def next_fire_time(self):
+        self._drop_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now):
+        """Removes and returns (fire_time, egg) for every egg whose fire time is at or before `now`."""
+        due = []
+        self._drop_stale()
+        while self._heap and self._heap[0][0] <= now:
+            fire_time, sequence, easter_egg = heapq.heappop(self._heap)
+            if self._entries.get(easter_egg) == sequence:
+                del self._entries[easter_egg]
+                due.append((fire_time, easter_egg))
+            self._drop_stale()
+        return due
+
+    def is_running(self):
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        if not self.is_running():
+            self._task = asyncio.create_task(self.run())
+
+    def tick(self):
+        """Marks every due egg as triggered and reschedules it; returns the (fire_time, egg) pairs to fire."""
+        now = self.clock()
+        fired = []
+        for fire_time, easter_egg in self.pop_due(now + self.lead):
+            if easter_egg.can_trigger(fire_time):
+                record_trigger("Easter egg", (now - (fire_time - self.lead)).total_seconds())
+                easter_egg.mark_triggered(fire_time)
+                fired.append((fire_time, easter_egg))
+            elif easter_egg.enabled:
+                triggers_missed.inc(trigger="Easter egg")
+            self.schedule(easter_egg)  # Queue up its next occurrence
+        if fired:
+            save_easter_egg_changes([easter_egg for _, easter_egg in fired])
+        return fired
+
+    async def run(self):
+        while True:
+            try:
+                for fire_time, easter_egg in self.tick():
+                    asyncio.create_task(fire_easter_egg(easter_egg, fire_time))
+
+                next_fire_time = self.next_fire_time()
+                timeout = SCHEDULER_MAX_SLEEP
+                if next_fire_time is not None:
+                    timeout = min(timeout, max((next_fire_time - self.lead - self.clock()).total_seconds(), 0))
+
+                # Sleep until the earliest egg is due, or until an egg is added/changed
+                self._wakeup.clear()
+                if timeout > 0:
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), timeout)
+                    except asyncio.TimeoutError:
+                        pass
+            except Exception as e:
+                print(f"Error in easter egg scheduler: {e}")
+                await asyncio.sleep(1)
+
+    def _drop_stale(self):
+        while self._heap and self._entries.get(self._heap[0][2]) != self._heap[0][1]:
+            heapq.heappop(self._heap)
+
+    # Stale entries are normally dropped lazily; rebuild the heap if they start to pile up
+    def _compact(self):
+        if len(self._heap) > 2 * len(self._entries) + 64:
+            self._heap = [entry for entry in self._heap if self._entries.get(entry[2]) == entry[1]]
+            heapq.heapify(self._heap)
+
+easter_egg_scheduler = EasterEggScheduler()
+
+# Play an Easter egg in the most populated voice channel of every guild
+async def fire_easter_egg(easter_egg, fire_time):
+    if easter_egg.guild_id is not None:
+        guild = bot.get_guild(easter_egg.guild_id)
+        guilds = [guild] if guild is not None else []
+    else:
+        guilds = [guild for guild in bot.guilds if easter_egg.name not in guild_settings.get(guild.id).disabled_easter_eggs]
+    triggers = []
+    for guild in await claim_guilds(f"Easter egg {easter_egg.name}", fire_time, guilds):
+        voice_channel = get_most_populated_voice_channel(guild)
+        if voice_channel:
+            print(f"Triggering Easter Egg '{easter_egg.name}' in {voice_channel.name}")
+            triggers.append(handle_easter_egg_trigger(easter_egg, voice_channel, guild, fire_time))
+    await asyncio.gather(*triggers)
+
+# Global variable to store Easter eggs
+easter_eggs = EasterEggRegistry()
+
+# Easter eggs guilds added for themselves, by guild ID (stored in the guild settings)
+guild_easter_eggs = {}
+
+# Turn the entries of the Easter egg file into EasterEggs, skipping (and reporting) broken ones
+def parse_easter_eggs(easter_eggs_data):
+    eggs = []
+    for egg_data in easter_eggs_data:
+        last_triggered = egg_data.get('last_triggered')
+        if isinstance(last_triggered, str):
+            try:
+                egg_data['last_triggered'] = datetime.fromisoformat(last_triggered)
+                if egg_data['last_triggered'].tzinfo is None:
+                    egg_data['last_triggered'] = pytz.utc.localize(egg_data['last_triggered'])
+            except ValueError:
+                print(f"Error: Invalid date format for Easter egg {egg_data.get('name')}, setting 'last_triggered' to None.")
+                egg_data['last_triggered'] = None
 
-# Global variables to store Easter eggs and last modified timestamp
-easter_eggs = []
-last_modified_time = None
+        try:
+            eggs.append(EasterEgg(**egg_data))
+        except (TypeError, ValueError) as e:
+            print(f"Error: Missing or invalid fields for Easter egg: {e}. Skipping entry.")
+    return eggs
 
-# Function to load Easter Eggs from a JSON file
-def load_easter_eggs():
-    global easter_eggs, last_modified_time
+# Load Easter Eggs from the JSON file. Entries that still match an egg in memory keep that egg;
+# only new or edited ones are parsed and rescheduled, so re-reading after our own save is a no-op
+async def load_easter_eggs():
+    global easter_eggs
 
-    # Check if file exists
-    if not os.path.exists(EASTER_EGG_FILE):
+    try:
+        easter_eggs_data = await storage.run(read_easter_egg_data)
+    except FileNotFoundError:
         print(f"File {EASTER_EGG_FILE} does not exist. Initializing an empty list.")
-        easter_eggs = []
+        easter_eggs_data = []
+    except json.JSONDecodeError:
+        print(f"Error: {EASTER_EGG_FILE} contains invalid JSON. Keeping the {len(easter_eggs)} Easter Eggs already loaded.")
+        return
+    except Exception as e:
+        print(f"Unexpected error while loading Easter eggs: {e}")
         return
 
-    try:
-        # Get the last modified time of the file
-        current_modified_time = os.path.getmtime(EASTER_EGG_FILE)
-
-        # Only reload if the file has changed since the last check
-        if last_modified_time is None or current_modified_time > last_modified_time:
-            with open(EASTER_EGG_FILE, 'r') as f:
-                easter_eggs_data = json.load(f)
-                easter_eggs = []
-
-                for egg_data in easter_eggs_data:
-                    last_triggered = egg_data.get('last_triggered')
-                    if isinstance(last_triggered, str):
-                        try:
-                            egg_data['last_triggered'] = datetime.fromisoformat(last_triggered)
-                        except ValueError:
-                            print(f"Error: Invalid date format for Easter egg {egg_data.get('name')}, setting 'last_triggered' to None.")
-                            egg_data['last_triggered'] = None
+    eggs = EasterEggRegistry()
+    changed = []
+    for egg_data in easter_eggs_data:
+        name = egg_data.get('name')
+        egg = easter_eggs.find(name) if isinstance(name, str) else None
+        if egg is None or easter_egg_to_json(egg) != egg_data:
+            parsed = parse_easter_eggs([dict(egg_data)])
+            if not parsed:
+                continue
+            egg = parsed[0]
+            changed.append(egg)
+        if not eggs.add(egg):
+            print(f"Error: Duplicate Easter egg name '{egg.name}' in {EASTER_EGG_FILE}. Skipping entry.")
+            if egg in changed:
+                changed.remove(egg)
+    kept = set(map(id, eggs))
+    removed = [egg for egg in easter_eggs if id(egg) not in kept]
+
+    easter_eggs = eggs
+    for egg in removed:
+        easter_egg_scheduler.unschedule(egg)
+    for egg in changed:
+        easter_egg_scheduler.schedule(egg)
+    if changed or removed:
+        print(f"Loaded {len(easter_eggs)} Easter Eggs from file ({len(changed)} new or changed, {len(removed)} removed).")
+        if shared_state is None and easter_egg_journal.records:
+            save_easter_eggs()  # Fold the replayed journal into the file, so an edit to the file isn't undone by it later
+
+# Load the Easter eggs guilds added for themselves, for the guilds the bot (or this sharded worker) is in
+async def load_guild_easter_eggs():
+    global guild_easter_eggs
+
+    for eggs in guild_easter_eggs.values():
+        for egg in eggs:
+            easter_egg_scheduler.unschedule(egg)
+
+    loaded = {}
+    for guild_id, easter_eggs_data in await storage.run(guild_settings.easter_egg_data):
+        if bot.get_guild(guild_id) is None:
+            continue  # Another shard's guild, or one the bot left
+        eggs = EasterEggRegistry()
+        for egg in parse_easter_eggs([dict(egg_data) for egg_data in easter_eggs_data]):
+            if eggs.add(egg):
+                egg.guild_id = guild_id
+                easter_egg_scheduler.schedule(egg)
+        loaded[guild_id] = eggs
+    guild_easter_eggs = loaded
+    print(f"Loaded {sum(map(len, loaded.values()))} Easter Eggs of {len(loaded)} guild(s).")
+
+# Save the Easter eggs whose state changed: the shared file for eggs of every guild, the guild's row for its own eggs
+def save_easter_egg_changes(eggs):
+    shared_eggs = [egg for egg in eggs if egg.guild_id is None]
+    if shared_eggs:
+        journal_easter_eggs(shared_eggs)
+    for guild_id in {egg.guild_id for egg in eggs if egg.guild_id is not None}:
+        guild_settings.save_easter_eggs(guild_id)
+
+# Every Easter egg that fires in a guild: the ones for every guild, then the guild's own
+def easter_eggs_for_guild(guild_id):
+    return [*easter_eggs, *guild_easter_eggs.get(guild_id, ())]
+
+# Find an Easter egg of a guild by case-insensitive name: the guild's own first, then the ones for every guild
+def find_easter_egg(guild_id, name):
+    guild_eggs = guild_easter_eggs.get(guild_id)
+    egg = guild_eggs.find(name) if guild_eggs is not None else None
+    return egg if egg is not None else easter_eggs.find(name)
 
-                    try:
-                        easter_eggs.append(EasterEgg(**egg_data))
-                    except TypeError as e:
-                        print(f"Error: Missing or invalid fields for Easter egg: {e}. Skipping entry.")
+'''
+ __     __    _             ____ _                            _
+ \ \   / /__ (_) ___ ___   / ___| |__   __ _ _ __  _ __   ___| |___ _
+  \ \ / / _ \| |/ __/ _ \ | |   | '_ \ / _` | '_ \| '_ \ / _ \ / __(_)
+   \ V / (_) | | (_|  __/ | |___| | | | (_| | | | | | | |  __/ \__ \_
+    \_/ \___/|_|\___\___|  \____|_| |_|\__,_|_| |_|_| |_|\___|_|___(_)
 
-            # Update the last modified time
-            last_modified_time = current_modified_time
-            print(f"Reloaded {len(easter_eggs)} Easter Eggs from file.")
+'''
+class VoiceChannelIndex:
+    """
+    Member counts of one guild's voice channels, kept up to date from voice state events.
+
+    The most populated channel is found through a max-heap with lazily dropped stale entries, so a
+    lookup is O(1) amortised and an update O(log n). Ties go to the channel higher up in the
+    channel list (lower position), then to the lower channel ID, like the old scan. The AFK channel
+    (when exclude_afk is set) and ignored channels are never tracked.
+    """
+
+    def __init__(self, guild, exclude_afk=False, ignored_channel_ids=()):
+        self.guild_id = guild.id
+        self.afk_channel_id = guild.afk_channel.id if exclude_afk and guild.afk_channel else None
+        self.ignored_channel_ids = set(ignored_channel_ids)
+        self.counts = {}  # Channel ID -> members in it
+        self.positions = {}  # Channel ID -> position in the channel list
+        self._heap = []  # (-members, position, channel ID); entries that disagree with counts/positions are stale
+        for channel in guild.voice_channels:
+            self.set_count(channel, len(channel.members))
+
+    def tracks(self, channel):
+        return (
+            isinstance(channel, discord.VoiceChannel)
+            and channel.id != self.afk_channel_id
+            and channel.id not in self.ignored_channel_ids
+        )
 
-        else:
-            print(f"No changes detected in {EASTER_EGG_FILE}, skipping reload.")
+    def set_count(self, channel, count):
+        if not self.tracks(channel):
+            return
+        self.counts[channel.id] = count
+        self.positions[channel.id] = channel.position
+        if count > 0:
+            heapq.heappush(self._heap, (-count, channel.position, channel.id))
+        self._compact()
+
+    def adjust(self, channel, delta):
+        if self.tracks(channel):
+            self.set_count(channel, max(self.counts.get(channel.id, 0) + delta, 0))
+
+    def remove(self, channel_id):
+        self.counts.pop(channel_id, None)
+        self.positions.pop(channel_id, None)
+
+    def most_populated(self):
+        """Returns the ID of the most populated tracked channel, or None if they are all empty."""
+        while self._heap:
+            members, position, channel_id = self._heap[0]
+            if self.counts.get(channel_id) == -members and self.positions.get(channel_id) == position:
+                return channel_id
+            heapq.heappop(self._heap)
+        return None
+
+    # Rebuild the heap if stale entries start to pile up
+    def _compact(self):
+        if len(self._heap) > 2 * len(self.counts) + 64:
+            self._heap = [
+                (-count, self.positions[channel_id], channel_id)
+                for channel_id, count in self.counts.items() if count > 0
+            ]
+            heapq.heapify(self._heap)
+
+# Guild ID -> VoiceChannelIndex
+voice_channel_indexes = {}
+
+# Build a fresh index for a guild from discord.py's cache, using the current settings
+def build_voice_channel_index(guild):
+    settings = load_or_create_config().get("voice_channels", {})
+    return VoiceChannelIndex(
+        guild,
+        exclude_afk=settings.get("exclude_afk", False),
+        ignored_channel_ids=settings.get("ignored_channel_ids", [])
+    )
 
-    except json.JSONDecodeError:
-        print(f"Error: {EASTER_EGG_FILE} contains invalid JSON. Initializing an empty list.")
-        easter_eggs = []
-    except Exception as e:
-        print(f"Unexpected error while loading Easter eggs: {e}")
+def get_voice_channel_index(guild):
+    index = voice_channel_indexes.get(guild.id)
+    if index is None:
+        index = voice_channel_indexes[guild.id] = build_voice_channel_index(guild)
+    return index
+
+# Compare every guild's index with the cache, fixing (and reporting) any that drifted
+def reconcile_voice_channel_indexes():
+    drifted = 0
+    for guild in bot.guilds:
+        fresh = build_voice_channel_index(guild)
+        index = voice_channel_indexes.get(guild.id)
+        if index is not None and index.counts != fresh.counts:
+            drifted += 1
+            differences = {
+                channel_id: (index.counts.get(channel_id), fresh.counts.get(channel_id))
+                for channel_id in set(index.counts) | set(fresh.counts)
+                if index.counts.get(channel_id) != fresh.counts.get(channel_id)
+            }
+            print(f"Voice channel index for {guild.name} drifted (channel: indexed, actual): {differences}")
+        voice_channel_indexes[guild.id] = fresh
+    return drifted
 
-# Function to check and reload the Easter Egg list if the file has changed
-def check_and_reload_easter_eggs():
-    load_easter_eggs()  # Simply call the load function to handle checking and reloading
+# Self-check of the voice channel indexes against discord.py's cache
+@tasks.loop(minutes=10)
+async def voice_channel_index_check():
+    reconcile_voice_channel_indexes()
 
 # Function to get the most populated voice channel
 def get_most_populated_voice_channel(guild: discord.Guild):
-    voice_channels = [vc for vc in guild.voice_channels if len(vc.members) > 0]
-    return max(voice_channels, key=lambda vc: len(vc.members)) if voice_channels else None
+    channel_id = get_voice_channel_index(guild).most_populated()
+    return guild.get_channel(channel_id) if channel_id is not None else None
 
-# Choose the sound based on the mode
-def choose_sound():
-    config = load_or_create_config()
-    if config["mode"] == "randomize":
-        return os.path.join(SOUND_FOLDER, random.choice(get_available_sounds()) + ".mp3")
-    elif config["mode"] == "percent":
-        return weighted_random_choice(config["sounds"])
-    else:
-        return os.path.join(SOUND_FOLDER, config["default_sound"] + ".mp3")
-
-# Weighted random choice based on percentage values
-def weighted_random_choice(sounds):
-    total_weight = sum(sounds.values())
-    random_num = random.uniform(0, total_weight)
-    current_sum = 0
-    for sound, weight in sounds.items():
-        current_sum += weight
-        if random_num <= current_sum:
-            return os.path.join(SOUND_FOLDER, sound + ".mp3")
+'''
+ __     __    _            ____                _
+ \ \   / /__ (_) ___ ___  / ___|  ___  ___ ___(_) ___  _ __  ___ _
+  \ \ / / _ \| |/ __/ _ \ \___ \ / _ \/ __/ __| |/ _ \| '_ \/ __(_)
+   \ V / (_) | | (_|  __/  ___) |  __/\__ \__ \ | (_) | | | \__ \_
+    \_/ \___/|_|\___\___| |____/ \___||___/___/_|\___/|_| |_|___(_)
+
+'''
+# Default for voice_sessions.linger_seconds: how long the bot stays in a channel after its last play
+VOICE_LINGER_SECONDS = 15
+# Default for voice_sessions.prewarm_seconds: how long before an Easter egg plays the bot connects
+VOICE_PREWARM_SECONDS = 30
+# A scheduled play joins its guild's queue this long before its target time, to prime the sound
+VOICE_PRIME_SECONDS = 2
+# The voice connection is checked (and reconnected if it dropped) this long before a scheduled play
+VOICE_HEALTH_CHECK_SECONDS = 1
+
+class PrimedAudio(discord.AudioSource):
+    """
+    Wraps an audio source whose first frame has been read ahead of time, so the player thread
+    can send it the moment playback starts. Reports when that first frame went out.
+    """
+
+    def __init__(self, source, on_first_frame):
+        self._source = source
+        self._on_first_frame = on_first_frame
+        self._first_frame = None
+        self.primed_at = None
+
+    # Blocking (FFmpeg may still be starting up); run in the executor
+    def prime(self):
+        self._first_frame = self._source.read()
+        self.primed_at = time.perf_counter()
+
+    def read(self):
+        if self._on_first_frame is not None:
+            self._on_first_frame(utc_now())
+            self._on_first_frame = None
+        if self._first_frame is not None:
+            frame, self._first_frame = self._first_frame, None
+            return frame
+        return self._source.read()
+
+    def is_opus(self):
+        return self._source.is_opus()
+
+    def cleanup(self):
+        self._source.cleanup()
+
+class PlayRequest:
+    """One queued play of a sound in a voice channel."""
+
+    def __init__(self, channel, sound_path, leave_after=True, at=None):
+        self.channel = channel
+        self.sound_path = sound_path
+        self.leave_after = leave_after
+        self.at = at  # UTC target time for the first frame; None plays as soon as possible
+        self.enqueued_at = time.monotonic()
+        self.requested_at = utc_now()
+        self.wait_time = None  # Seconds spent waiting in the queue
+        self.time_to_first_frame = None  # Seconds from the target (or the request) to the first frame
+        loop = asyncio.get_running_loop()
+        self.started = loop.create_future()  # Resolves to the UTC time the first frame went out, or None if it never did
+        self.finished = loop.create_future()  # Resolves to the local time playing ended, or raises the playback error
+
+    # Called on the bot loop when the audio player thread sends the first frame
+    def first_frame(self, when):
+        self.time_to_first_frame = (when - (self.at or self.requested_at)).total_seconds()
+        if not self.started.done():
+            self.started.set_result(when)
+
+    # Called on the bot loop once the audio player thread is done with this request
+    def finish(self, error=None):
+        if not self.started.done():
+            self.started.set_result(None)
+        if self.finished.done():
+            return  # The caller stopped waiting
+        if error is not None:
+            self.finished.set_exception(error)
+        else:
+            self.finished.set_result(datetime.now())
+
+class GuildVoiceSession:
+    """The play queue and voice connection state of one guild."""
+
+    def __init__(self, guild_id):
+        self.guild_id = guild_id
+        self.queue = asyncio.Queue()
+        self.connect_lock = asyncio.Lock()
+        self.worker = None
+        self.linger = None  # Task that disconnects once the session has been idle for the linger time
+        self.playing = None
+        self.wait_times = deque(maxlen=100)
+        self.first_frame_times = deque(maxlen=100)
+
+    @property
+    def depth(self):
+        return self.queue.qsize() + (1 if self.playing else 0)
+
+    def cancel_linger(self):
+        if self.linger is not None:
+            self.linger.cancel()
+            self.linger = None
+
+class VoiceSessionManager:
+    """
+    Owns the bot's voice connections.
+
+    Every play goes through one queue per guild, so a second play waits for the first instead of
+    failing with "Already playing". The existing connection is reused (or moved) rather than
+    reconnecting, and after the last queued play the bot stays in the channel for `linger_seconds`
+    so bursts of plays don't reconnect each time.
+
+    Plays with a known target time (`play_at`) connect early, have their first frame read ahead,
+    and re-check the connection just before the target so the sound starts on time.
+    """
+
+    def __init__(self, linger_seconds=VOICE_LINGER_SECONDS):
+        self.linger_seconds = linger_seconds
+        self.prewarm_seconds = VOICE_PREWARM_SECONDS
+        self.sessions = {}  # Guild ID -> GuildVoiceSession
+
+    def session(self, guild):
+        session = self.sessions.get(guild.id)
+        if session is None:
+            session = self.sessions[guild.id] = GuildVoiceSession(guild.id)
+        return session
+
+    async def connect(self, channel, self_deaf=False):
+        """
+        Returns a voice client connected to `channel`, reusing or moving the guild's connection if there is one.
+        Waits for a play in progress in the guild to end first.
+        """
+        session = self.session(channel.guild)
+        async with session.connect_lock:
+            return await self._connect(session, channel, self_deaf)
+
+    # Connect with the session's connect lock already held
+    async def _connect(self, session, channel, self_deaf=False):
+        session.cancel_linger()
+        vc = channel.guild.voice_client
+        if vc is not None and vc.is_connected():
+            if vc.channel != channel:
+                with voice_connect_seconds.time(action="move"):
+                    await vc.move_to(channel)
+            return vc
+        if vc is not None:
+            await vc.disconnect(force=True)  # Half-open connection left over from a drop
+        with voice_connect_seconds.time(action="connect"):
+            return await channel.connect(reconnect=True, self_deaf=self_deaf)
+
+    def enqueue(self, channel, sound_path, leave_after=True, at=None):
+        """
+        Queues a play and returns its PlayRequest; the play starts once everything queued before it is done.
+        Await `request.finished` for the time it ended.
+        """
+        session = self.session(channel.guild)
+        request = PlayRequest(channel, sound_path, leave_after, at)
+        session.queue.put_nowait(request)
+        if session.worker is None or session.worker.done():
+            session.worker = asyncio.create_task(self._work(session, channel.guild))
+        return request
+
+    async def play_at(self, channel, sound_path, at, leave_after=True):
+        """
+        Connects now and queues the sound to start at the UTC time `at`. Returns the PlayRequest once it
+        is queued; await `request.started` / `request.finished` for the outcome.
+        """
+        await self.connect(channel)
+        prime_time = (at - utc_now()).total_seconds() - VOICE_PRIME_SECONDS
+        if prime_time > 0:
+            await asyncio.sleep(prime_time)
+        return self.enqueue(channel, sound_path, leave_after, at=at)
+
+    async def disconnect(self, guild):
+        session = self.session(guild)
+        session.cancel_linger()
+        if guild.voice_client is not None:
+            await guild.voice_client.disconnect()
+
+    def stats(self):
+        """Queue depth and recent queue wait times per guild, for spotting contention."""
+        return {
+            guild_id: {
+                "depth": session.depth,
+                "avg_wait": sum(session.wait_times) / len(session.wait_times) if session.wait_times else 0.0,
+                "max_wait": max(session.wait_times, default=0.0),
+                "avg_first_frame": (
+                    sum(session.first_frame_times) / len(session.first_frame_times) if session.first_frame_times else 0.0
+                )
+            }
+            for guild_id, session in self.sessions.items()
+        }
+
+    async def _work(self, session, guild):
+        loop = asyncio.get_running_loop()
+        while True:
+            request = await session.queue.get()
+            session.cancel_linger()
+            request.wait_time = time.monotonic() - request.enqueued_at
+            session.wait_times.append(request.wait_time)
+            play_queue_wait_seconds.observe(request.wait_time)
+            if request.wait_time > 1:
+                print(f"Play in {guild.name} waited {request.wait_time:.1f}s in the queue ({session.queue.qsize()} still queued)")
+
+            session.playing = request
+            try:
+                # Connecting and playing hold the connect lock, so a connect() from outside the queue
+                # (auto-join, /join, play_at) waits for the play instead of moving the bot mid-sound
+                async with session.connect_lock:
+                    # The player thread only hands results back to the loop; it never waits on them
+                    opened_at = time.perf_counter()
+                    audio = create_audio_source(request.sound_path)
+                    source = PrimedAudio(
+                        audio,
+                        lambda when, request=request: loop.call_soon_threadsafe(request.first_frame, when)
+                    )
+                    priming = asyncio.ensure_future(self._prime(audio, source))  # Get the first frame ready while connecting
+                    try:
+                        vc = await self._connect(session, request.channel)
+                        await priming
+                        audio_first_frame_seconds.observe(
+                            source.primed_at - opened_at, source="cache" if isinstance(audio, MappedOpusAudio) else "ffmpeg"
+                        )
+                        if request.at is not None:
+                            vc = await self._wait_for_target(request)
+
+                        vc.play(source, after=lambda error, request=request: loop.call_soon_threadsafe(request.finish, error))
+                    except BaseException:
+                        # Until the player has it, the source is ours to release (mapped file, pooled FFmpeg decoder)
+                        priming.cancel()
+                        audio.cleanup()
+                        raise
+                    await asyncio.wait([request.finished])  # Doesn't cancel the future if the worker is cancelled
+                if request.time_to_first_frame is not None:
+                    session.first_frame_times.append(request.time_to_first_frame)
+                    play_first_frame_seconds.observe(
+                        max(request.time_to_first_frame, 0.0), scheduled="true" if request.at is not None else "false"
+                    )
+                    print(
+                        f"First frame in {guild.name} {request.time_to_first_frame * 1000:.0f} ms after the "
+                        f"{'target time' if request.at is not None else 'request'}"
+                    )
+            except Exception as e:
+                print(f"Error playing {request.sound_path} in {guild.name}: {e}")
+                request.finish(e)
+            finally:
+                session.playing = None
+
+            if session.queue.empty() and request.leave_after:
+                session.linger = asyncio.create_task(self._leave_when_idle(session, guild))
+
+    # Wait for a decoder if the sound needs a pooled FFmpeg, then read the first frame in the executor
+    @staticmethod
+    async def _prime(audio, source):
+        if isinstance(audio, PooledFFmpegAudio):
+            await audio.start()
+        await asyncio.get_running_loop().run_in_executor(None, source.prime)
+
+    # Sleep until the target time, making sure the connection is still up shortly before it
+    async def _wait_for_target(self, request):
+        health_check = (request.at - utc_now()).total_seconds() - VOICE_HEALTH_CHECK_SECONDS
+        if health_check > 0:
+            await asyncio.sleep(health_check)
+        vc = await self._connect(self.session(request.channel.guild), request.channel)  # Reconnects if the connection dropped
+        remaining = (request.at - utc_now()).total_seconds()
+        if remaining > 0:
+            await asyncio.sleep(remaining)
+        return vc
+
+    async def _leave_when_idle(self, session, guild):
+        await asyncio.sleep(self.linger_seconds)
+        session.linger = None
+        if session.depth == 0 and guild.voice_client is not None:
+            await guild.voice_client.disconnect()
+
+voice_sessions = VoiceSessionManager()
+
+# Apply the voice_sessions config section; Easter eggs fire early by the prewarm time so they can connect first
+def apply_voice_session_settings(config):
+    settings = config.get("voice_sessions", {})
+    voice_sessions.linger_seconds = settings.get("linger_seconds", VOICE_LINGER_SECONDS)
+    voice_sessions.prewarm_seconds = settings.get("prewarm_seconds", VOICE_PREWARM_SECONDS)
+    easter_egg_scheduler.lead = timedelta(seconds=voice_sessions.prewarm_seconds)
+
+apply_voice_session_settings(config)
+
+class AliasSampler:
+    """
+    Draws items with probability proportional to their weight in O(1), using Walker's alias method.
+
+    Building the tables is O(n); do it once per set of weights and reuse the sampler for every draw.
+    """
+
+    def __init__(self, items, weights):
+        self.items = list(items)
+        count = len(self.items)
+        self.probability = [1.0] * count
+        self.alias = list(range(count))
+
+        total = sum(weights)
+        if count == 0 or total <= 0:
+            # Nothing to weigh: like the old cumulative walk, every draw lands on the first item
+            self.probability = [0.0] * count
+            self.alias = [0] * count
+            self._build_arrays()
+            return
+
+        scaled = [weight * count / total for weight in weights]
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            self.probability[less] = scaled[less]
+            self.alias[less] = more
+            scaled[more] += scaled[less] - 1.0
+            (small if scaled[more] < 1.0 else large).append(more)
+        # Whatever is left over is 1.0 give or take rounding
+        for i in small + large:
+            self.probability[i] = 1.0
+        self._build_arrays()
+
+    def _build_arrays(self):
+        if np is not None:
+            self._np_probability = np.array(self.probability)
+            self._np_alias = np.array(self.alias, dtype=np.intp)
+
+    def draw(self, rng=random):
+        """Returns one item, or None if there are no items."""
+        if not self.items:
+            return None
+        column = int(rng.random() * len(self.items))
+        return self.items[column] if rng.random() < self.probability[column] else self.items[self.alias[column]]
+
+    def draw_many(self, count, np_rng=None):
+        """Returns `count` independent draws, vectorised with NumPy when it is installed."""
+        if not self.items:
+            return [None] * count
+        if np is None:
+            return [self.draw() for _ in range(count)]
+
+        np_rng = np_rng or np.random.default_rng()
+        columns = np_rng.integers(0, len(self.items), size=count)
+        picks = np.where(np_rng.random(count) < self._np_probability[columns], columns, self._np_alias[columns])
+        return [self.items[i] for i in picks]
+
+class SoundPicker:
+    """The sound choices of one config snapshot: enabled sounds, the percent-mode sampler and the single-mode sound."""
+
+    def __init__(self, config, available_sounds):
+        self.mode = config["mode"]
+        sound_status = config.get("sound_status", {})
+        self.enabled_sounds = [sound for sound in available_sounds if sound_status.get(sound, True)]
+        enabled = set(self.enabled_sounds)
+        percent_sounds = [(sound, percent) for sound, percent in config["sounds"].items() if sound in enabled]
+        self.sampler = AliasSampler([sound for sound, _ in percent_sounds], [percent for _, percent in percent_sounds])
+        self.default_sound = config["default_sound"]
+
+    def choose(self):
+        if self.mode == "randomize":
+            return random.choice(self.enabled_sounds)
+        elif self.mode == "percent":
+            return self.sampler.draw()
+        return self.default_sound
+
+    def choose_many(self, count):
+        if self.mode == "randomize":
+            return random.choices(self.enabled_sounds, k=count) if self.enabled_sounds else [None] * count
+        elif self.mode == "percent":
+            return self.sampler.draw_many(count)
+        return [self.default_sound] * count
+
+'''
+  ____       _ _     _   ____       _   _   _                   
+ / ___|_   _(_) | __| | / ___|  ___| |_| |_(_)_ __   __ _ ___ _ 
+| |  _| | | | | |/ _` | \___ \ / _ \ __| __| | '_ \ / _` / __(_)
+| |_| | |_| | | | (_| |  ___) |  __/ |_| |_| | | | | (_| \__ \_ 
+ \____|\__,_|_|_|\__,_| |____/ \___|\__|\__|_|_| |_|\__, |___(_)
+                                                    |___/       
+'''
+# SQLite database with the settings and Easter eggs each guild set for itself
+GUILD_SETTINGS_FILE = os.path.join(BASE_DIR, "guild_settings.db")
+
+# Settings a guild can set for itself; whatever it hasn't set comes from config.json
+GUILD_SETTING_KEYS = (
+    "mode", "default_sound", "sounds", "sound_status", "log_channel_id",
+    "general_role_id", "reload_role_id", "disabled_easter_eggs"
+)
+
+GUILD_SETTINGS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS guild_settings (
+    guild_id INTEGER PRIMARY KEY,
+    settings TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+"""
+
+# The config.json value a guild setting falls back to
+def default_guild_setting(config, key):
+    if key == "general_role_id":
+        return config.get("startup_and_roles", {}).get("role_needed_for_general_command")
+    if key == "reload_role_id":
+        return config.get("startup_and_roles", {}).get("role_needed_for_reload_command")
+    if key == "disabled_easter_eggs":
+        return []
+    return thaw_config(config.get(key))
+
+class GuildSettings:
+    """One guild's effective settings (config.json with the guild's own settings on top) and its sound picker."""
+
+    def __init__(self, config, own, available_sounds):
+        values = {key: default_guild_setting(config, key) for key in GUILD_SETTING_KEYS}
+        for key in GUILD_SETTING_KEYS:
+            if key not in own:
+                continue
+            if key in ("sounds", "sound_status"):
+                # Only sounds that still exist; sounds added since keep their config.json values
+                values[key] = dict(values[key] or {})
+                values[key].update({sound: value for sound, value in own[key].items() if sound in available_sounds})
+            else:
+                values[key] = own[key]
+        if values["default_sound"] not in available_sounds:
+            values["default_sound"] = config["default_sound"]
+
+        self.values = values
+        self.mode = values["mode"]
+        self.log_channel_id = values["log_channel_id"]
+        self.general_role_id = values["general_role_id"]
+        self.reload_role_id = values["reload_role_id"]
+        self.disabled_easter_eggs = frozenset(values["disabled_easter_eggs"])
+        self.picker = SoundPicker(values, available_sounds)
+
+class GuildSettingsStore:
+    """
+    Per-guild settings and Easter eggs, one row per guild in a SQLite table keyed by guild ID.
+
+    Every row is read into memory once at startup, on the storage thread (see setup_hook). get() resolves a guild's effective settings
+    with one dict lookup; the cache is only rebuilt when the config snapshot or the sound list
+    changes, and guilds that set nothing share one GuildSettings. Changing a guild's settings
+    rewrites just that guild's row, on the storage thread.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._rows = None  # Guild ID -> the guild's own settings (and "easter_eggs")
+        self._resolved = {}  # Guild ID -> GuildSettings
+        self._sources = (None, None)  # Config snapshot and sound index the cache was built from
+        self._default = None
+        self._local = threading.local()
+
+    def connect(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(GUILD_SETTINGS_SCHEMA)
+            self._local.connection = connection
+        return connection
+
+    def load(self):
+        """Reads every guild's row into memory."""
+        rows = self.connect().execute("SELECT guild_id, settings FROM guild_settings").fetchall()
+        self._rows = {guild_id: json.loads(settings) for guild_id, settings in rows}
+        self._resolved = {}
+
+    def own(self, guild_id):
+        """What the guild set itself (read-only)."""
+        if self._rows is None:
+            self.load()  # Only without the startup load (the benchmarks); the bot never reads here on the loop
+        return self._rows.get(guild_id, {})
+
+    def get(self, guild_id):
+        config = load_or_create_config()
+        if self._sources[0] is not config or self._sources[1] is not sound_library.sounds:
+            self._resolved = {}
+            self._default = GuildSettings(config, {}, get_available_sounds())
+            self._sources = (config, sound_library.sounds)
+        settings = self._resolved.get(guild_id)
+        if settings is None:
+            own = self.own(guild_id)
+            has_settings = any(key in own for key in GUILD_SETTING_KEYS)
+            settings = GuildSettings(config, own, get_available_sounds()) if has_settings else self._default
+            self._resolved[guild_id] = settings
+        return settings
+
+    def edit(self, guild_id):
+        """Returns a mutable copy of a guild's effective settings for the caller to change and commit()."""
+        return copy.deepcopy(self.get(guild_id).values)
+
+    def commit(self, guild_id, edited):
+        """Keeps the settings the caller changed as the guild's own and writes the guild's row."""
+        current = self.get(guild_id).values
+        own = dict(self.own(guild_id))
+        own.update({key: edited[key] for key in GUILD_SETTING_KEYS if edited[key] != current[key]})
+        self._store(guild_id, own)
+
+    def save_easter_eggs(self, guild_id):
+        own = dict(self.own(guild_id))
+        own["easter_eggs"] = [easter_egg_to_json(egg) for egg in guild_easter_eggs.get(guild_id, ())]
+        self._store(guild_id, own)
+
+    def easter_egg_data(self):
+        """(guild ID, stored Easter egg entries) for every guild with Easter eggs of its own."""
+        if self._rows is None:
+            self.load()
+        # Runs on the storage thread while commands may add rows on the loop, so go over a copy
+        return [(guild_id, own["easter_eggs"]) for guild_id, own in list(self._rows.items()) if own.get("easter_eggs")]
+
+    def _store(self, guild_id, own):
+        if self._rows is None:
+            self.load()
+        self._rows[guild_id] = own
+        self._resolved.pop(guild_id, None)
+        storage.submit(self._write, guild_id, json.dumps(own))
+
+    def _write(self, guild_id, settings):
+        connection = self.connect()
+        with connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO guild_settings (guild_id, settings, updated_at) VALUES (?, ?, ?)",
+                (guild_id, settings, time.time())
+            )
+
+guild_settings = GuildSettingsStore(GUILD_SETTINGS_FILE)
 
 # Role restriction check functions
 def has_general_role():
     async def predicate(interaction: discord.Interaction):
         role_ids = [role.id for role in interaction.user.roles]
-        if ROLE_NEEDED_FOR_GENERAL_COMMAND in role_ids:
+        if guild_settings.get(interaction.guild_id).general_role_id in role_ids:
             return True
         await interaction.response.send_message("You do not have permission to use this command.", ephemeral=True)
         return False
@@ -517,12 +3036,48 @@ def has_general_role():
 def has_reload_role():
     async def predicate(interaction: discord.Interaction):
         role_ids = [role.id for role in interaction.user.roles]
-        if ROLE_NEEDED_FOR_RELOAD_COMMAND in role_ids:
+        if guild_settings.get(interaction.guild_id).reload_role_id in role_ids:
             return True
         await interaction.response.send_message("You do not have permission to use this command.", ephemeral=True)
         return False
     return app_commands.check(predicate)
 
+# Commands that change things for every server: the bot owner, or the role config.json sets for them. Never a role
+# a server set for itself, since any server admin can give themselves that
+async def has_config_role(interaction: discord.Interaction, key):
+    if await bot.is_owner(interaction.user):
+        return True
+    role_id = load_or_create_config()["startup_and_roles"].get(key)
+    return role_id is not None and role_id in [role.id for role in interaction.user.roles]
+
+def has_global_general_role():
+    async def predicate(interaction: discord.Interaction):
+        if await has_config_role(interaction, "role_needed_for_general_command"):
+            return True
+        await interaction.response.send_message("You do not have permission to use this command.", ephemeral=True)
+        return False
+    return app_commands.check(predicate)
+
+def has_global_reload_role():
+    async def predicate(interaction: discord.Interaction):
+        if await has_config_role(interaction, "role_needed_for_reload_command"):
+            return True
+        await interaction.response.send_message("You do not have permission to use this command.", ephemeral=True)
+        return False
+    return app_commands.check(predicate)
+
+# Server setup commands: anyone who can manage the server, or who has its admin role
+def has_manage_guild():
+    async def predicate(interaction: discord.Interaction):
+        if interaction.user.guild_permissions.manage_guild:
+            return True
+        role_ids = [role.id for role in interaction.user.roles]
+        if guild_settings.get(interaction.guild_id).reload_role_id in role_ids:
+            return True
+        await interaction.response.send_message("You need the Manage Server permission to use this command.", ephemeral=True)
+        return False
+    return app_commands.check(predicate)
+
 '''
   ____  _           _        ____                                          _       
  / ___|| | __ _ ___| |__    / ___|___  _ __ ___  _ __ ___   __ _ _ __   __| |___ _ 
@@ -536,7 +3091,7 @@ def has_reload_role():
 @app_commands.describe(sound_name="Specify a sound if choosing single or percent mode.")
 @has_general_role()
 async def mode(interaction: discord.Interaction, mode_type: str = None, sound_name: str = None):
-    config = load_or_create_config()
+    config = guild_settings.edit(interaction.guild_id)
 
     if mode_type is None:
         # If no mode_type is provided, output the current mode
@@ -574,21 +3129,20 @@ async def mode(interaction: discord.Interaction, mode_type: str = None, sound_na
             matched_sound = available_sounds[available_sounds_lower.index(sound_name_lower)]
             config["mode"] = "single"
             config["default_sound"] = matched_sound
-            save_config(config)
+            guild_settings.commit(interaction.guild_id, config)
             await interaction.response.send_message(f"Mode set to 'single' with default sound '{matched_sound}'.")
         else:
-            # Set to single mode with a random sound from percent mode
+            # Set to single mode with a random sound from percent mode, or any sound if the server has none there
+            top_sounds = [s for s, p in config.get("sounds", {}).items() if p == 100]
             config["mode"] = "single"
-            if not config.get("sounds"):
-                backup_and_create_new_config(config)
-            config["default_sound"] = random.choice([s for s, p in config["sounds"].items() if p == 100])
-            save_config(config)
+            config["default_sound"] = random.choice(top_sounds or available_sounds)
+            guild_settings.commit(interaction.guild_id, config)
             await interaction.response.send_message(f"Mode set to 'single' with randomly chosen sound '{config['default_sound']}'.")
     
     elif mode_type == "randomize":
         # Set to randomize mode
         config["mode"] = "randomize"
-        save_config(config)
+        guild_settings.commit(interaction.guild_id, config)
         await interaction.response.send_message("Mode set to 'randomize'. The bot will play a random sound from the folder.")
 
     elif mode_type == "percent":
@@ -603,28 +3157,27 @@ async def mode(interaction: discord.Interaction, mode_type: str = None, sound_na
                 return
 
             matched_sound = available_sounds[available_sounds_lower.index(sound_name_lower)]
-            set_percent_mode(config, matched_sound)
+            set_percent_mode(interaction.guild_id, matched_sound)
             await interaction.response.send_message(f"Mode set to 'percent' with default sound '{matched_sound}'.")
 
         else:
             # Set to percent mode with a random sound if no sound_name provided
-            if not config.get("sounds"):
-                backup_and_create_new_config(config)
             random_sound = random.choice(available_sounds)
-            set_percent_mode(config, random_sound)
+            set_percent_mode(interaction.guild_id, random_sound)
             await interaction.response.send_message(f"Mode set to 'percent' with random default sound '{random_sound}'.")
 
     else:
         await interaction.response.send_message("Invalid mode. Choose between 'single', 'randomize', or 'percent'.", ephemeral=True)
 
-# Function to set the config for percent mode
-def set_percent_mode(config, sound_name):
+# Function to set a guild's settings for percent mode
+def set_percent_mode(guild_id, sound_name):
     if sound_name not in get_available_sounds():
         raise ValueError(f"Invalid sound name. Available sounds: {', '.join(get_available_sounds())}")
-    config["mode"] = "percent"
-    config["sounds"] = {sound: (100 if sound == sound_name else 0.001) for sound in get_available_sounds()}
-    config["default_sound"] = sound_name
-    save_config(config)
+    settings = guild_settings.edit(guild_id)
+    settings["mode"] = "percent"
+    settings["sounds"] = {sound: (100 if sound == sound_name else 0.001) for sound in get_available_sounds()}
+    settings["default_sound"] = sound_name
+    guild_settings.commit(guild_id, settings)
 
 # View for confirmation of overwriting percent config
 class ConfirmOverwriteView(View):
@@ -635,8 +3188,7 @@ class ConfirmOverwriteView(View):
 
     @discord.ui.button(label="Yes", style=discord.ButtonStyle.danger)
     async def confirm(self, interaction: discord.Interaction, button: Button):
-        config = load_or_create_config()
-        set_percent_mode(config, self.sound_name)
+        set_percent_mode(interaction.guild_id, self.sound_name)
         await self.interaction.followup.send(f"Percent mode overwritten with default sound '{self.sound_name}'.")
 
     @discord.ui.button(label="No", style=discord.ButtonStyle.secondary)
@@ -655,7 +3207,7 @@ async def autojoin_status(interaction: discord.Interaction):
 @app_commands.describe(sound_name="The name of the sound to enable/disable.", action="Either 'enable' or 'disable'.")
 @has_general_role()
 async def sounds(interaction: discord.Interaction, sound_name: str = None, action: str = None):
-    config = load_or_create_config()
+    config = guild_settings.edit(interaction.guild_id) if sound_name and action else guild_settings.get(interaction.guild_id).values
     
     available_sounds = get_available_sounds()
 
@@ -671,98 +3223,90 @@ async def sounds(interaction: discord.Interaction, sound_name: str = None, actio
             await interaction.response.send_message("Invalid action. Use 'enable' or 'disable'.", ephemeral=True)
             return
 
-        # Ensure that the config contains the enable/disable flag for each sound
-        if "sound_status" not in config:
+        # Ensure that the settings contain the enable/disable flag for each sound
+        if not config.get("sound_status"):
             config["sound_status"] = {sound: True for sound in available_sounds}
 
         # Update the enabled/disabled status for the sound
         config["sound_status"][sound_name] = (action.lower() == "enable")
-        save_config(config)
+        guild_settings.commit(interaction.guild_id, config)
 
         status = "enabled" if config["sound_status"][sound_name] else "disabled"
         await interaction.response.send_message(f"Sound '{sound_name}' is now {status}.", ephemeral=True)
         return
 
     # If no sound_name or action is provided, list all sounds and their status
-    sound_status = config.get("sound_status", {sound: True for sound in available_sounds})
+    sound_status = config.get("sound_status") or {sound: True for sound in available_sounds}
 
     if config["mode"] == "percent":
         # Show sounds with their percentages in percent mode
-        sound_list = "\n".join([f"{sound} `{('Enabled' if sound_status.get(sound, True) else 'Disabled')}`: {percent}%" for sound, percent in config["sounds"].items()])
+        sound_list = "\n".join([f"{sound}{format_duration(sound)} `{('Enabled' if sound_status.get(sound, True) else 'Disabled')}`: {percent}%" for sound, percent in config["sounds"].items()])
         await interaction.response.send_message(f"Available sounds and their percentages:\n{sound_list}")
     else:
         # Just list sounds in single or randomize mode, with their enabled/disabled status
-        sound_list = "\n".join([f"{sound} `{('Enabled' if sound_status.get(sound, True) else 'Disabled')}`" for sound in available_sounds])
+        sound_list = "\n".join([f"{sound}{format_duration(sound)} `{('Enabled' if sound_status.get(sound, True) else 'Disabled')}`" for sound in available_sounds])
         await interaction.response.send_message(f"Available sounds:\n{sound_list}")
 
-# Function to choose a sound for auto-join, excluding disabled sounds
-def choose_sound():
-    config = load_or_create_config()
-    available_sounds = get_available_sounds()
-    
-    # Get the sound status (enabled/disabled)
-    sound_status = config.get("sound_status", {sound: True for sound in available_sounds})
-    
-    # Filter sounds to only include enabled ones
-    enabled_sounds = [sound for sound in available_sounds if sound_status.get(sound, True)]
-
-    if config["mode"] == "randomize":
-        return os.path.join(SOUND_FOLDER, random.choice(enabled_sounds) + ".mp3")
-    elif config["mode"] == "percent":
-        # Filter percent sounds to only include enabled ones
-        enabled_percent_sounds = {sound: percent for sound, percent in config["sounds"].items() if sound in enabled_sounds}
-        return weighted_random_choice(enabled_percent_sounds)
-    else:
-        return os.path.join(SOUND_FOLDER, config["default_sound"] + ".mp3")
+# Function to choose a sound for a guild with its own settings, excluding disabled sounds
+@choose_sound_seconds.timed
+def choose_sound(guild_id):
+    sound = guild_settings.get(guild_id).picker.choose()
+    return os.path.join(SOUND_FOLDER, sound + ".mp3") if sound is not None else None
+
+# Choose a sound for each of many guilds at once (an auto-join run); guilds sharing settings share one batch draw
+def choose_sounds(guild_ids):
+    by_picker = {}
+    for guild_id in guild_ids:
+        picker = guild_settings.get(guild_id).picker
+        by_picker.setdefault(id(picker), (picker, []))[1].append(guild_id)
+
+    sounds = {}
+    for picker, picker_guild_ids in by_picker.values():
+        for guild_id, sound in zip(picker_guild_ids, picker.choose_many(len(picker_guild_ids))):
+            sounds[guild_id] = os.path.join(SOUND_FOLDER, sound + ".mp3") if sound is not None else None
+    return sounds
 
 # Function to handle Easter Egg triggers
-async def handle_easter_egg_trigger(easter_egg, voice_channel, guild):
+async def handle_easter_egg_trigger(easter_egg, voice_channel, guild, fire_time):
     try:
         join_time = datetime.now()  # Capture join time when the bot joins
 
-        # Check if already connected to a voice channel
-        if guild.voice_client is None:
-            print(f"Bot is not connected. Joining {voice_channel.name}...")
-            vc = await voice_channel.connect()
-            print(f"Joined {voice_channel.name}.")
-        else:
-            vc = guild.voice_client
-            print(f"Bot is already connected to {vc.channel.name}.")
-
         # Apply delay if configured
-        if easter_egg.play_delay > 0:
-            print(f"Delaying sound for {easter_egg.play_delay} minutes...")
-            await asyncio.sleep(easter_egg.play_delay * 60)
+        play_time = fire_time + timedelta(minutes=easter_egg.play_delay)
 
-        # Easter eggs ignore the enabled/disabled status of sounds
+        # Easter eggs ignore the enabled/disabled status of sounds; the bot connects now and plays on time
         sound_to_play = os.path.join(SOUND_FOLDER, f"{easter_egg.sound}.mp3")
-        print(f"Playing sound: {sound_to_play}")
-
-        # Function to disconnect after sound is done
-        async def after_playing(vc):
-            if vc.is_connected():
-                await vc.disconnect()
+        print(f"Playing sound at {play_time:%H:%M:%S} UTC: {sound_to_play}")
+        request = await voice_sessions.play_at(voice_channel, sound_to_play, play_time)
 
-        # Start playing the sound
-        vc.play(
-            discord.FFmpegPCMAudio(sound_to_play, executable=ffmpeg_path),
-            after=lambda e: asyncio.create_task(after_playing(vc))
-        )
         # Capture the leave time after playing
-        leave_time = datetime.now()
+        leave_time = await request.finished
 
+        # Log the Easter egg action
+        await log_action(
+            voice_channel=voice_channel,
+            sound_name=easter_egg.sound,  # Use the Easter egg's sound name
+            is_easter_egg=True,  # Indicate that it was an Easter egg
+            mode=guild_settings.get(guild.id).mode,  # Pass the guild's current mode
+            join_time=join_time,
+            leave_time=leave_time,
+            easter_egg_details={"name": easter_egg.name, "timezone": easter_egg.timezone},  # Optional details
+            user=None  # Since this is automated, no user involved
+        )
     except Exception as e:
         print(f"Error in handle_easter_egg_trigger: {e}")
-        
+
 # Command to toggle auto-join task
 @bot.tree.command(name="toggle_auto_join", description="Toggle the auto-join task.")
-@has_general_role()
+@has_global_general_role()
 async def toggle_auto_join(interaction: discord.Interaction):
     global auto_join_enabled
 
     # Toggle the auto_join_enabled flag
     auto_join_enabled = not auto_join_enabled
     state = "enabled" if auto_join_enabled else "disabled"
+    if shared_state is not None:
+        storage.submit(shared_state.put, "auto_join", {"enabled": auto_join_enabled})  # Every worker follows the toggle
     
     await interaction.response.send_message(f"Auto-join task {state}.")
 
@@ -780,68 +3324,50 @@ async def testsound(interaction: discord.Interaction, sound_name: str, channel:
     
     # Check if bot is already connected to a voice channel
     vc = interaction.guild.voice_client
-    
-    if vc is None or vc.channel != channel:
-        # If not connected or connected to a different channel, connect to the specified one
-        vc = await channel.connect()
-    else:
+    if vc is not None and vc.channel == channel:
         # Already connected to the same channel
         await interaction.followup.send(f"Bot is already connected to {channel.name}. Playing the sound.")
 
-    # Define the after function to disconnect after the sound is done, if `leave_after` is True
-    def after_playing(error):
-        if leave_after:
-            coro = vc.disconnect()
-            fut = asyncio.run_coroutine_threadsafe(coro, bot.loop)
-            try:
-                fut.result()  # Ensure any exceptions are handled
-            except Exception as e:
-                print(f"Error disconnecting: {e}")
-
-    # Play the sound
-    vc.play(
-        discord.FFmpegPCMAudio(os.path.join(SOUND_FOLDER, f"{sound_name}.mp3"), executable=ffmpeg_path),
-        after=after_playing  # Pass the after function
-    )
+    # Queue the sound; the bot leaves after the linger time if `leave_after` is True
+    request = voice_sessions.enqueue(channel, os.path.join(SOUND_FOLDER, f"{sound_name}.mp3"), leave_after=leave_after)
     
     # Send the follow-up message while the sound is playing
     await interaction.followup.send(f"Playing '{sound_name}' in {channel.name}")
 
+    try:
+        await request.finished
+    except Exception as e:
+        await interaction.followup.send(f"Error playing '{sound_name}': {e}", ephemeral=True)
+
 @bot.tree.command(name="cheers", description="Play a sound in a voice channel.")
 @has_general_role()
 async def cheers(interaction: discord.Interaction, channel: discord.VoiceChannel):
     # Defer the response to avoid the 3-second timeout
     await interaction.response.defer()
 
-    sound_to_play = choose_sound()
-    vc = await channel.connect()
+    sound_to_play = choose_sound(channel.guild.id)
     join_time = datetime.now()  # Capture join time
 
-    # Define the after function to disconnect after the sound is done
-    def after_playing(error):
-        coro = vc.disconnect()
-        fut = asyncio.run_coroutine_threadsafe(coro, bot.loop)
-        try:
-            fut.result()  # Ensure any exceptions are handled
-        except Exception as e:
-            print(f"Error disconnecting: {e}")
-
-    vc.play(
-        discord.FFmpegPCMAudio(sound_to_play, executable=ffmpeg_path),
-        after=after_playing  # Pass the after function
-    )
+    # Queue the sound; the bot leaves after the linger time
+    request = voice_sessions.enqueue(channel, sound_to_play)
 
-    # Send the follow-up message after playing sound
+    # Send the follow-up message while the sound is playing
     await interaction.followup.send(f"Playing sound in {channel.name}")
 
-    # Log the action after the bot leaves the voice channel
+    try:
+        leave_time = await request.finished
+    except Exception as e:
+        await interaction.followup.send(f"Error playing sound: {e}", ephemeral=True)
+        return
+
+    # Log the action after the sound has played
     await log_action(
         voice_channel=channel,
         sound_name=os.path.basename(sound_to_play),
         is_easter_egg=False,
-        mode=load_or_create_config()["mode"],
+        mode=guild_settings.get(channel.guild.id).mode,
         join_time=join_time,
-        leave_time=datetime.now(),  # Log the leave time after playing sound
+        leave_time=leave_time,  # When the sound actually finished
         user=interaction.user  # Pass the user who ran the command
     )
 
@@ -854,13 +3380,8 @@ async def join(interaction: discord.Interaction, channel: discord.VoiceChannel):
     try:
         join_time = datetime.now()  # Capture join time
         
-        # Check if the bot is already in a voice channel and leave if necessary
-        if interaction.guild.voice_client:
-            if interaction.guild.voice_client.channel != channel:
-                await interaction.guild.voice_client.disconnect()
-
-        # Connect with self_deaf=True to suppress microphone activation
-        vc = await channel.connect(self_deaf=True)
+        # Connect with self_deaf=True to suppress microphone activation (moves the bot if it is elsewhere)
+        await voice_sessions.connect(channel, self_deaf=True)
 
         # Log the action when joining the voice channel
         await log_action(
@@ -888,7 +3409,7 @@ async def leave(interaction: discord.Interaction):
 
         if interaction.guild.voice_client:
             voice_channel = interaction.guild.voice_client.channel  # Capture the channel it was in
-            await interaction.guild.voice_client.disconnect()
+            await voice_sessions.disconnect(interaction.guild)
             
             # Log the action when leaving the voice channel
             await log_action(
@@ -909,68 +3430,112 @@ async def leave(interaction: discord.Interaction):
         print(f"Error: {e}")
 
 
+# Apply a freshly reloaded config to the running bot. Sounds are re-processed when asked to or when
+# the processing settings changed; in a sharded deployment the coordinator does that instead
+async def apply_config(ingest=False):
+    config = load_or_create_config()
+    settings_key = sound_library.settings_key()
+    sound_library.configure(config.get("sound_library", {}))
+    if shared_state is None and (ingest or sound_library.settings_key() != settings_key):
+        await bot.loop.run_in_executor(None, sound_library.ingest)  # Process added or changed sounds
+    restart_auto_join_trigger()  # The auto-join schedule may have changed
+    apply_voice_session_settings(config)
+    apply_file_watcher_settings(config)
+    ffmpeg_pool.configure(config.get("ffmpeg_pool", {}))
+    voice_channel_indexes.clear()  # Rebuilt with the current ignored/AFK settings on next use
+
 # Slash command for reloading the bot's configuration and syncing commands
 @bot.tree.command(name="reload", description="Reload the bot's configuration and sync slash commands.")
-@has_reload_role()
+@has_global_reload_role()
 async def reload(interaction: discord.Interaction):
     try:
         await interaction.response.send_message("Reloading slash commands and configuration...")
+        await storage.run(config_store.flush)  # Don't lose pending edits before re-reading the file
+        await bot.loop.run_in_executor(None, sound_library.scan)  # The config lists the sounds in the folder
+        await storage.run(config_store.reload)  # Pick up manual edits to config.json
+        await apply_config(ingest=True)
         await bot.tree.sync()
         await interaction.followup.send("Slash commands and configuration have been successfully reloaded.")
     except Exception as e:
         await interaction.followup.send(f"Error occurred during reload: {e}")
         print(f"Error during reload: {e}")
 
-# Periodically check and reload Easter eggs
-async def periodic_check():
-    while True:
-        check_and_reload_easter_eggs()
-        await asyncio.sleep(60)  # Check every minute
-
 # Slash command to list, enable, or disable Easter Eggs
 @bot.tree.command(name="easteregg", description="List, enable, or disable Easter Eggs.")
 @app_commands.describe(easter_egg_name="Easter Egg to enable/disable", action="Enable or disable the Easter Egg")
 @has_general_role()
 async def easteregg(interaction: discord.Interaction, easter_egg_name: str = None, action: str = None):
+    disabled_here = guild_settings.get(interaction.guild_id).disabled_easter_eggs
+
     if not easter_egg_name:
-        enabled_eggs = [egg.name for egg in easter_eggs if egg.enabled]
-        disabled_eggs = [egg.name for egg in easter_eggs if not egg.enabled]
+        guild_eggs = easter_eggs_for_guild(interaction.guild_id)
+        # Eggs for every server can be switched off per server; the server's own eggs are switched on and off directly
+        enabled_eggs = [egg.name for egg in guild_eggs if egg.enabled and egg.name not in disabled_here]
+        disabled_eggs = [egg.name for egg in guild_eggs if not egg.enabled or egg.name in disabled_here]
         await interaction.response.send_message(
             f"**Enabled Easter Eggs:**\n- " + "\n- ".join(enabled_eggs) +
             f"\n\n**Disabled Easter Eggs:**\n- " + "\n- ".join(disabled_eggs)
         )
     else:
-        easter_egg_name_lower = easter_egg_name.lower()
-        matched_egg = next((egg for egg in easter_eggs if egg.name.lower() == easter_egg_name_lower), None)
+        matched_egg = find_easter_egg(interaction.guild_id, easter_egg_name)
         if not matched_egg:
             await interaction.response.send_message(f"Easter Egg '{easter_egg_name}' not found.", ephemeral=True)
             return
 
-        if action.lower() == "enable":
-            matched_egg.enabled = True
-            await interaction.response.send_message(f"Easter Egg '{matched_egg.name}' is now enabled.")
-        elif action.lower() == "disable":
-            matched_egg.enabled = False
-            await interaction.response.send_message(f"Easter Egg '{matched_egg.name}' is now disabled.")
-        else:
+        if action is None or action.lower() not in ("enable", "disable"):
             await interaction.response.send_message("Invalid action. Use 'enable' or 'disable'.")
-        save_easter_eggs()
+            return
+        enable = action.lower() == "enable"
+
+        if matched_egg.guild_id is not None:
+            # One of this server's own Easter eggs
+            matched_egg.enabled = enable
+            easter_egg_scheduler.schedule(matched_egg)
+            guild_settings.save_easter_eggs(interaction.guild_id)
+        else:
+            # An Easter egg for every server: only this server's list of disabled eggs changes
+            if enable and not matched_egg.enabled:
+                await interaction.response.send_message(
+                    f"Easter Egg '{matched_egg.name}' is disabled for every server in {EASTER_EGG_FILE}.", ephemeral=True
+                )
+                return
+            settings = guild_settings.edit(interaction.guild_id)
+            disabled = [name for name in settings["disabled_easter_eggs"] if name != matched_egg.name]
+            if not enable:
+                disabled.append(matched_egg.name)
+            settings["disabled_easter_eggs"] = disabled
+            guild_settings.commit(interaction.guild_id, settings)
+        await interaction.response.send_message(f"Easter Egg '{matched_egg.name}' is now {'enabled' if enable else 'disabled'}.")
 
 @bot.tree.command(name="delete_easter_egg", description="Delete an existing Easter Egg.")
 @has_reload_role()
 @app_commands.describe(easter_egg_name="The name of the Easter Egg to delete.")
 async def delete_easter_egg(interaction: discord.Interaction, easter_egg_name: str):
-    easter_egg_name_lower = easter_egg_name.lower()
-    
-    # Find the Easter Egg by case-insensitive match
-    matched_egg = next((egg for egg in easter_eggs if egg.name.lower() == easter_egg_name_lower), None)
+    # Find the Easter Egg by case-insensitive match, among this server's own and every server's
+    matched_egg = find_easter_egg(interaction.guild_id, easter_egg_name)
 
     if not matched_egg:
         await interaction.response.send_message(f"Easter Egg '{easter_egg_name}' not found.", ephemeral=True)
         return
 
-    easter_eggs.remove(matched_egg)
-    save_easter_eggs()
+    if matched_egg.guild_id is None:
+        # An Easter egg for every server: only the bot's own admins may delete it, a server just switches it off
+        if not await has_config_role(interaction, "role_needed_for_reload_command"):
+            settings = guild_settings.edit(interaction.guild_id)
+            if matched_egg.name not in settings["disabled_easter_eggs"]:
+                settings["disabled_easter_eggs"] = [*settings["disabled_easter_eggs"], matched_egg.name]
+                guild_settings.commit(interaction.guild_id, settings)
+            await interaction.response.send_message(
+                f"Easter Egg '{matched_egg.name}' is shared by every server, so it has been disabled for this server instead."
+            )
+            return
+        easter_egg_scheduler.unschedule(matched_egg)
+        easter_eggs.remove(matched_egg)
+        journal_easter_eggs([matched_egg], deleted=True)
+    else:
+        easter_egg_scheduler.unschedule(matched_egg)
+        guild_easter_eggs[matched_egg.guild_id].remove(matched_egg)
+        guild_settings.save_easter_eggs(matched_egg.guild_id)
     await interaction.response.send_message(f"Easter Egg '{easter_egg_name}' has been deleted.")
 
 # /Add_Easter_Egg Command - Updated so the sound is case insensitive.
@@ -986,18 +3551,17 @@ async def delete_easter_egg(interaction: discord.Interaction, easter_egg_name: s
 async def add_easter_egg(interaction: discord.Interaction, name: str, sound: str, join_time: str, play_delay: int, timezone: str):
     available_sounds = get_available_sounds()
 
-    # Convert both the input sound name and Easter Egg names to lowercase for comparison
+    # Convert the input sound name to lowercase for comparison
     sound_lower = sound.lower()
     available_sounds_lower = [s.lower() for s in available_sounds]
-    name_lower = name.lower()
 
     # Check if the sound exists (case-insensitive)
     if sound_lower not in available_sounds_lower:
         await interaction.response.send_message(f"Invalid sound. Available sounds: {', '.join(available_sounds)}")
         return
 
-    # Check if an Easter Egg with the same name (case-insensitive) already exists
-    if any(egg.name.lower() == name_lower for egg in easter_eggs):
+    # Check if an Easter Egg with the same name (case-insensitive) already exists here
+    if find_easter_egg(interaction.guild_id, name) is not None:
         await interaction.response.send_message(f"An Easter Egg with the name '{name}' already exists.", ephemeral=True)
         return
 
@@ -1010,10 +3574,11 @@ async def add_easter_egg(interaction: discord.Interaction, name: str, sound: str
         await interaction.response.send_message("Invalid time format. Please use the format 'HH:MM AM/PM'.")
         return
 
-    # Create the new Easter Egg and add it to the list
-    new_easter_egg = EasterEgg(name, matched_sound, join_time, play_delay, timezone)
-    easter_eggs.append(new_easter_egg)
-    save_easter_eggs()
+    # Create the new Easter Egg for this server and add it to the server's list
+    new_easter_egg = EasterEgg(name, matched_sound, join_time, play_delay, timezone, guild_id=interaction.guild_id)
+    guild_easter_eggs.setdefault(interaction.guild_id, EasterEggRegistry()).add(new_easter_egg)
+    easter_egg_scheduler.schedule(new_easter_egg)
+    guild_settings.save_easter_eggs(interaction.guild_id)
     await interaction.response.send_message(f"Easter Egg '{name}' added successfully.")
 
 '''
@@ -1111,6 +3676,110 @@ async def on_app_command_error(interaction: discord.Interaction, error):
  |_____\___/ \__, |\__, |_|_| |_|\__, (_)
              |___/ |___/         |___/   
 '''
+# Log pipeline settings
+LOG_QUEUE_SIZE = 1000  # Events waiting to be sent; beyond this new events are dropped (and counted)
+LOG_MAX_EMBEDS_PER_MESSAGE = 10  # Discord's limit
+LOG_BATCH_WINDOW = 1.0  # Seconds to wait for more events to share a message with
+LOG_MAX_RETRIES = 5
+
+class LogSink:
+    """
+    Sends log embeds from a background task so callers never wait on Discord.
+
+    Events go into a bounded queue; the consumer collects whatever arrives within LOG_BATCH_WINDOW
+    and sends it as messages of up to 10 embeds per log channel, backing off when rate limited.
+    Events that don't fit in the queue are dropped and counted in `dropped`.
+    """
+
+    def __init__(self, max_queued=LOG_QUEUE_SIZE):
+        self.queue = asyncio.Queue(maxsize=max_queued)
+        self.dropped = 0
+        self.sent_embeds = 0
+        self.sent_messages = 0
+        self.rate_limited = 0
+        self._task = None
+
+    def enqueue(self, channel_id, embed):
+        try:
+            self.queue.put_nowait((channel_id, embed))
+        except asyncio.QueueFull:
+            self.dropped += 1
+            if self.dropped == 1 or self.dropped % 100 == 0:
+                print(f"Log queue is full, {self.dropped} log event(s) dropped so far")
+
+    def is_running(self):
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        if not self.is_running():
+            self._task = asyncio.create_task(self.run())
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batches = {}  # Channel ID -> embeds, in arrival order
+            channel_id, embed = await self.queue.get()
+            batches.setdefault(channel_id, []).append(embed)
+
+            # Give other events a moment to join this batch
+            deadline = loop.time() + LOG_BATCH_WINDOW
+            while max(len(embeds) for embeds in batches.values()) < LOG_MAX_EMBEDS_PER_MESSAGE:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    channel_id, embed = await asyncio.wait_for(self.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                batches.setdefault(channel_id, []).append(embed)
+
+            for channel_id, embeds in batches.items():
+                for start in range(0, len(embeds), LOG_MAX_EMBEDS_PER_MESSAGE):
+                    await self._send(channel_id, embeds[start:start + LOG_MAX_EMBEDS_PER_MESSAGE])
+
+    async def _send(self, channel_id, embeds):
+        with log_send_seconds.time():
+            await self._send_batch(channel_id, embeds)
+
+    async def _send_batch(self, channel_id, embeds):
+        log_channel = bot.get_channel(channel_id)
+        if log_channel is None:
+            print(f"Log channel with ID {channel_id} not found, {len(embeds)} log event(s) lost.")
+            return
+
+        backoff = 1.0
+        for attempt in range(LOG_MAX_RETRIES):
+            try:
+                # Send the embeds to the log channel
+                await log_channel.send(embeds=embeds)
+                self.sent_embeds += len(embeds)
+                self.sent_messages += 1
+                print(f"Logged {len(embeds)} action(s) to channel: {log_channel.name}")
+                return
+            except discord.HTTPException as e:
+                if e.status != 429:
+                    print(f"Failed to log action(s): {e}")
+                    return
+                self.rate_limited += 1
+                retry_after = retry_after_seconds(e.response) or backoff
+                print(f"Log channel rate limited, retrying in {retry_after:.1f}s")
+                await asyncio.sleep(retry_after)
+                backoff *= 2
+            except Exception as e:
+                print(f"Failed to log action(s): {e}")
+                return
+        print(f"Giving up on {len(embeds)} log event(s) after {LOG_MAX_RETRIES} rate limited attempts")
+
+log_sink = LogSink()
+
+# Seconds Discord asked us to wait in a 429 response's Retry-After header, or None if it didn't say
+def retry_after_seconds(response):
+    try:
+        return float(response.headers["Retry-After"])
+    except (AttributeError, KeyError, TypeError, ValueError):
+        return None
+
+# Build the log embed for an action and queue it for the log channel; never waits on Discord
 async def log_action(
     voice_channel: discord.VoiceChannel, 
     sound_name: str, 
@@ -1122,6 +3791,17 @@ async def log_action(
     easter_egg_details: dict = None, 
     user: discord.User = None
 ):
+    # Every action goes into the play history, even when there is no log channel
+    play_history.record(
+        history_event(sound_name, is_easter_egg, join_time, leave_time),
+        voice_channel.guild.id,
+        voice_channel.id,
+        sound_name[:-4] if sound_name.endswith(".mp3") else sound_name,
+        mode=mode,
+        easter_egg=easter_egg_details.get("name") if is_easter_egg and easter_egg_details else None,
+        user_id=user.id if user else None
+    )
+
     config = load_or_create_config()
 
     log_settings = config.get("log_settings", {})
@@ -1130,8 +3810,8 @@ async def log_action(
     thumbnail_url = log_settings.get("thumbnail_url", "")
     footer_icon_url = log_settings.get("footer_icon_url", "")
 
-    # Check for log channel ID in the config
-    log_channel_id = config.get("log_channel_id", None)
+    # Check for the guild's log channel ID
+    log_channel_id = guild_settings.get(voice_channel.guild.id).log_channel_id
     if log_channel_id is None:
         print("No log channel set, please use `/setlog`.")
         return
@@ -1172,20 +3852,709 @@ async def log_action(
         embed.add_field(name="Easter Egg Name", value=easter_egg_details.get("name"), inline=False)
         embed.add_field(name="Easter Egg Timezone", value=easter_egg_details.get("timezone"), inline=False)
 
-    try:
-        # Send the embed to the log channel
-        await log_channel.send(embed=embed)
-        print(f"Logged action to channel: {log_channel.name}")
-    except Exception as e:
-        print(f"Failed to log action: {e}")
+    log_sink.enqueue(log_channel_id, embed)
 
 @bot.tree.command(name="setlog", description="Set the log channel for bot actions.")
 async def setlog(interaction: discord.Interaction, channel: discord.TextChannel):
-    config = load_or_create_config()
-    config['log_channel_id'] = channel.id
-    save_config(config)
+    settings = guild_settings.edit(interaction.guild_id)
+    settings['log_channel_id'] = channel.id
+    guild_settings.commit(interaction.guild_id, settings)
     await interaction.response.send_message(f"Log channel set to: {channel.mention}")
 
+@bot.tree.command(name="setrole", description="Set the role this server needs for general or admin commands.")
+@app_commands.describe(kind="Which commands: 'general' or 'reload' (admin commands).", role="The role to require.")
+@app_commands.guild_only()
+@app_commands.default_permissions(manage_guild=True)
+@has_manage_guild()
+async def setrole(interaction: discord.Interaction, kind: str, role: discord.Role):
+    if kind.lower() not in ("general", "reload"):
+        await interaction.response.send_message("Invalid kind. Use 'general' or 'reload'.", ephemeral=True)
+        return
+    settings = guild_settings.edit(interaction.guild_id)
+    settings[f"{kind.lower()}_role_id"] = role.id
+    guild_settings.commit(interaction.guild_id, settings)
+    await interaction.response.send_message(f"{kind.capitalize()} commands now need the {role.mention} role in this server.")
+
+# Format one metric's label set for /perf, e.g. "cheersbot_voice_connect_seconds (action=move)"
+def perf_label(name, labels):
+    name = name.removeprefix("cheersbot_").removesuffix("_seconds")
+    return f"{name} ({', '.join(f'{key}={value}' for key, value in labels)})" if labels else name
+
+@bot.tree.command(name="perf", description="Show event loop lag, hot path timings and trigger counters.")
+@has_global_reload_role()
+async def perf(interaction: discord.Interaction):
+    lines = ["**Timings (recent p50 / p99 / max, ms):**"]
+    for metric in metrics.metrics.values():
+        if isinstance(metric, Histogram):
+            for labels, summary in metric.summary().items():
+                lines.append(
+                    f"{perf_label(metric.name, labels)}: {summary['p50'] * 1000:.1f} / {summary['p99'] * 1000:.1f} / "
+                    f"{summary['max'] * 1000:.1f} ({summary['count']} total)"
+                )
+
+    lines.append("\n**Triggers:**")
+    for counter in (triggers_fired, triggers_late, triggers_missed):
+        for labels, value in counter.values().items():
+            lines.append(f"{perf_label(counter.name.removesuffix('_total'), labels)}: {value}")
+
+    queued = sum(session["depth"] for session in voice_sessions.stats().values())
+    lines.append(f"\n**Queues:** {queued} play(s) queued, {log_sink.queue.qsize()} log event(s) queued, {log_sink.dropped} dropped")
+    pool = ffmpeg_pool.stats()
+    lines.append(f"**FFmpeg decoders:** {pool['warm']} warm, {pool['decoding']} decoding, {pool['waiting']} play(s) waiting")
+
+    await interaction.response.send_message("\n".join(lines)[:2000], ephemeral=True)
+
+'''
+  ____  _               _   _ _     _
+ |  _ \| | __ _ _   _  | | | (_)___| |_ ___  _ __ _   _ _
+ | |_) | |/ _` | | | | | |_| | / __| __/ _ \| '__| | | (_)
+ |  __/| | (_| | |_| | |  _  | \__ \ || (_) | |  | |_| |_
+ |_|   |_|\__,_|\__, | |_| |_|_|___/\__\___/|_|   \__, (_)
+                |___/                             |___/
+'''
+PLAY_HISTORY_FILE = os.path.join(BASE_DIR, "play_history.db")
+PLAY_HISTORY_BATCH_SIZE = 500  # Most rows written in one transaction
+STATS_MAX_DAYS = 3650  # Longest period /stats counts over; Discord rejects larger values before the command runs
+
+PLAY_HISTORY_SCHEMA = """
+CREATE TABLE IF NOT EXISTS plays (
+    id INTEGER PRIMARY KEY,
+    time REAL NOT NULL,
+    event TEXT NOT NULL,
+    guild_id INTEGER,
+    channel_id INTEGER,
+    sound TEXT,
+    mode TEXT,
+    easter_egg TEXT,
+    user_id INTEGER
+);
+CREATE INDEX IF NOT EXISTS plays_guild_time ON plays (guild_id, time);
+CREATE INDEX IF NOT EXISTS plays_sound_time ON plays (sound, time);
+
+-- Per-day counts, kept up to date with every insert so /stats never has to scan plays
+CREATE TABLE IF NOT EXISTS daily_counts (
+    guild_id INTEGER NOT NULL,
+    day TEXT NOT NULL,
+    sound TEXT NOT NULL,
+    event TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (guild_id, day, sound, event)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS daily_counts_day ON daily_counts (day, sound);
+"""
+
+class PlayHistory:
+    """
+    Records every join, leave, play and Easter egg fire in a local SQLite database.
+
+    record() only queues the row; a background thread writes queued rows in batches, one
+    transaction per batch, and keeps the daily_counts rollup in step. Queries open their own
+    connection (the database runs in WAL mode, so they don't block the writer).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._queue = queue.Queue()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="play-history", daemon=True)
+            self._thread.start()
+
+    def close(self):
+        """Writes whatever is still queued and stops the writer thread."""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout=10)
+            self._thread = None
+
+    def record(self, event, guild_id, channel_id, sound, mode=None, easter_egg=None, user_id=None, when=None):
+        when = when or utc_now()
+        self._queue.put((when.timestamp(), event, guild_id, channel_id, sound, mode, easter_egg, user_id))
+
+    def connect(self):
+        connection = sqlite3.connect(self.path)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def _run(self):
+        connection = self.connect()
+        connection.executescript(PLAY_HISTORY_SCHEMA)
+        running = True
+        while running:
+            rows = [self._queue.get()]
+            # Take everything else that is already waiting, up to a batch
+            while len(rows) < PLAY_HISTORY_BATCH_SIZE:
+                try:
+                    rows.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if None in rows:
+                running = False
+                rows = [row for row in rows if row is not None]
+            if not rows:
+                continue
+
+            try:
+                with connection:
+                    connection.executemany(
+                        "INSERT INTO plays (time, event, guild_id, channel_id, sound, mode, easter_egg, user_id) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        rows
+                    )
+                    connection.executemany(
+                        "INSERT INTO daily_counts (guild_id, day, sound, event, count) VALUES (?, ?, ?, ?, 1) "
+                        "ON CONFLICT (guild_id, day, sound, event) DO UPDATE SET count = count + 1",
+                        [
+                            (row[2], datetime.fromtimestamp(row[0], pytz.utc).strftime("%Y-%m-%d"), row[4] or "", row[1])
+                            for row in rows
+                        ]
+                    )
+            except sqlite3.Error as e:
+                print(f"Error writing {len(rows)} play history row(s): {e}")
+        connection.close()
+
+    def _query(self, sql, params):
+        connection = self.connect()
+        try:
+            return connection.execute(sql, params).fetchall()
+        finally:
+            connection.close()
+
+    async def query(self, sql, params=()):
+        """Runs a read-only query in an executor and returns all rows."""
+        return await asyncio.get_running_loop().run_in_executor(None, self._query, sql, params)
+
+    async def sound_counts(self, since_day, guild_id=None):
+        """Plays (including Easter eggs) per sound since a day ("YYYY-MM-DD"), for one guild or all of them."""
+        guild_filter = "AND guild_id = ?" if guild_id is not None else ""
+        return await self.query(
+            f"SELECT sound, SUM(count) AS plays FROM daily_counts "
+            f"WHERE day >= ? AND event IN ('play', 'easter_egg') {guild_filter} "
+            f"GROUP BY sound ORDER BY plays DESC",
+            (since_day, guild_id) if guild_id is not None else (since_day,)
+        )
+
+    async def guild_counts(self, since_day):
+        """Plays (including Easter eggs) per guild since a day ("YYYY-MM-DD")."""
+        return await self.query(
+            "SELECT guild_id, SUM(count) AS plays FROM daily_counts "
+            "WHERE day >= ? AND event IN ('play', 'easter_egg') "
+            "GROUP BY guild_id ORDER BY plays DESC",
+            (since_day,)
+        )
+
+play_history = PlayHistory(PLAY_HISTORY_FILE)
+atexit.register(play_history.close)
+
+# Work out which kind of action log_action() was called for
+def history_event(sound_name, is_easter_egg, join_time, leave_time):
+    if is_easter_egg:
+        return "easter_egg"
+    if sound_name == "No sound played":
+        return "join" if join_time and not leave_time else "leave"
+    return "play"
+
+@bot.tree.command(name="stats", description="Show how often each sound played, in this server and across servers.")
+@app_commands.describe(days="How many days back to count, 1 to 3650 (default 30).")
+@has_general_role()
+async def stats(interaction: discord.Interaction, days: app_commands.Range[int, 1, STATS_MAX_DAYS] = 30):
+    await interaction.response.defer()
+    since_day = (utc_now() - timedelta(days=days)).strftime("%Y-%m-%d")
+
+    guild_sounds = await play_history.sound_counts(since_day, interaction.guild.id)
+    all_sounds = await play_history.sound_counts(since_day)
+    guilds = await play_history.guild_counts(since_day)
+
+    def sound_list(rows):
+        listed = "\n".join(f"{sound or 'Unknown'}: {plays}" for sound, plays in rows[:10]) or "Nothing played yet."
+        if len(rows) > 10:
+            listed += f"\n...and {len(rows) - 10} more"
+        return listed
+
+    guild_list = "\n".join(
+        f"{getattr(bot.get_guild(guild_id), 'name', guild_id)}: {plays}" for guild_id, plays in guilds[:10]
+    ) or "Nothing played yet."
+
+    await interaction.followup.send(
+        f"**Plays in this server (last {days} days):**\n{sound_list(guild_sounds)}\n\n"
+        f"**Plays in all servers (last {days} days):**\n{sound_list(all_sounds)}\n\n"
+        f"**Top servers (last {days} days):**\n{guild_list}"[:2000]
+    )
+
+'''
+ _____ _ _       __        __    _       _                 
+|  ___(_) | ___  \ \      / /_ _| |_ ___| |__   ___ _ __ _ 
+| |_  | | |/ _ \  \ \ /\ / / _` | __/ __| '_ \ / _ \ '__(_)
+|  _| | | |  __/   \ V  V / (_| | || (__| | | |  __/ |   _ 
+|_|   |_|_|\___|    \_/\_/ \__,_|\__\___|_| |_|\___|_|  (_)
+'''
+# How long a watched folder has to be quiet before its changes are handed over as one batch
+WATCH_DEBOUNCE_SECONDS = 1.0
+
+# How often the polling fallback re-lists the watched folders
+WATCH_POLL_SECONDS = 5.0
+
+# inotify event bits (see inotify(7))
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_DELETE = 0x200
+IN_Q_OVERFLOW = 0x4000
+INOTIFY_EVENT = struct.Struct("iIII")  # wd, mask, cookie, len; followed by `len` bytes of name
+
+class FileWatch:
+    """One watched folder: the file names to look at, the callback and the changes waiting for it."""
+
+    def __init__(self, folder, match, callback):
+        self.folder = folder
+        self.match = match  # Called with a file name; only matching names are reported
+        self.callback = callback  # Coroutine function taking a set of file names, or None for "anything may have changed"
+        self.pending = set()
+        self.rescan = False
+        self.timer = None
+        self.lock = asyncio.Lock()
+        self.listing = {}  # File name -> (mtime, size), for polling
+
+class FileWatcher:
+    """
+    Watches folders and hands each callback its changes in batches.
+
+    On Linux this uses inotify through ctypes, so changes arrive as soon as a file is written,
+    moved or deleted. Elsewhere, or if inotify can't be used, it re-lists the folders every
+    `poll_interval` seconds instead. Either way changes are collected until the folder has been
+    quiet for `debounce` seconds, so dropping 500 sounds into a folder is one callback, not 500.
+    """
+
+    def __init__(self, debounce=WATCH_DEBOUNCE_SECONDS, poll_interval=WATCH_POLL_SECONDS):
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.watches = []
+        self.backend = None  # "inotify" or "poll" once started
+        self._fd = None
+        self._descriptors = {}  # inotify watch descriptor -> [FileWatch]
+        self._poll_task = None
+
+    def watch(self, folder, match, callback):
+        self.watches.append(FileWatch(folder, match, callback))
+
+    def is_running(self):
+        return self.backend is not None
+
+    def start(self, backend="auto"):
+        if self.is_running():
+            return
+        if backend in ("auto", "inotify"):
+            try:
+                self._start_inotify()
+                self.backend = "inotify"
+            except (OSError, AttributeError) as e:
+                print(f"inotify is not available ({e}), polling watched folders every {self.poll_interval}s")
+        if self.backend is None:
+            for file_watch in self.watches:
+                file_watch.listing = self._list(file_watch)
+            self._poll_task = asyncio.create_task(self._poll())
+            self.backend = "poll"
+
+    def stop(self):
+        if self._fd is not None:
+            asyncio.get_running_loop().remove_reader(self._fd)
+            os.close(self._fd)
+            self._fd = None
+            self._descriptors = {}
+        if self._poll_task is not None:
+            self._poll_task.cancel()
+            self._poll_task = None
+        for file_watch in self.watches:
+            if file_watch.timer is not None:
+                file_watch.timer.cancel()
+                file_watch.timer = None
+        self.backend = None
+
+    def _start_inotify(self):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), os.strerror(ctypes.get_errno()))
+        try:
+            descriptors = {}
+            for file_watch in self.watches:
+                wd = libc.inotify_add_watch(
+                    fd, os.fsencode(file_watch.folder), IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE
+                )
+                if wd < 0:
+                    raise OSError(ctypes.get_errno(), f"{file_watch.folder}: {os.strerror(ctypes.get_errno())}")
+                descriptors.setdefault(wd, []).append(file_watch)
+            asyncio.get_running_loop().add_reader(fd, self._read_events)
+        except BaseException:
+            os.close(fd)
+            raise
+        self._fd = fd
+        self._descriptors = descriptors
+
+    def _read_events(self):
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset + INOTIFY_EVENT.size <= len(data):
+            wd, mask, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+            offset += INOTIFY_EVENT.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                # The kernel dropped events; we no longer know what changed
+                for file_watch in self.watches:
+                    self._changed(file_watch, None)
+                continue
+            for file_watch in self._descriptors.get(wd, []):
+                if name and file_watch.match(name):
+                    self._changed(file_watch, name)
+
+    async def _poll(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            for file_watch in self.watches:
+                try:
+                    listing = await storage.run(self._list, file_watch)
+                except OSError as e:
+                    print(f"Error listing {file_watch.folder}: {e}")
+                    continue
+                for name in listing.keys() | file_watch.listing.keys():
+                    if listing.get(name) != file_watch.listing.get(name):
+                        self._changed(file_watch, name)
+                file_watch.listing = listing
+
+    @staticmethod
+    def _list(file_watch):
+        listing = {}
+        with os.scandir(file_watch.folder) as entries:
+            for entry in entries:
+                if file_watch.match(entry.name) and entry.is_file():
+                    stat = entry.stat()
+                    listing[entry.name] = (stat.st_mtime_ns, stat.st_size)
+        return listing
+
+    # Note a change and (re)start the quiet period before the batch goes out
+    def _changed(self, file_watch, name):
+        if name is None:
+            file_watch.rescan = True
+        else:
+            file_watch.pending.add(name)
+        if file_watch.timer is not None:
+            file_watch.timer.cancel()
+        file_watch.timer = asyncio.get_running_loop().call_later(self.debounce, self._flush, file_watch)
+
+    def _flush(self, file_watch):
+        file_watch.timer = None
+        names = None if file_watch.rescan else file_watch.pending
+        file_watch.pending = set()
+        file_watch.rescan = False
+        asyncio.create_task(self._deliver(file_watch, names))
+
+    async def _deliver(self, file_watch, names):
+        async with file_watch.lock:  # One batch at a time per watch, in order
+            try:
+                await file_watch.callback(names)
+            except Exception as e:
+                print(f"Error handling changes in {file_watch.folder}: {e}")
+
+file_watcher = FileWatcher()
+
+# New, replaced or deleted sounds: update just those sounds, then the config in one commit
+async def on_sound_files_changed(file_names):
+    added, removed = await bot.loop.run_in_executor(None, sound_library.update, file_names)
+    config_store.sync_sounds()
+    count = "some" if file_names is None else len(file_names)
+    print(f"Sound folder changed ({count} file(s)): {len(added)} sound(s) added, {len(removed)} removed")
+
+# config.json edited by hand (or, in a sharded worker, the shared config changed); our own writes are recognised and ignored
+async def on_config_changed(file_names=None):
+    try:
+        changed = await storage.run(config_store.reload_if_changed)
+    except json.JSONDecodeError as e:
+        print(f"Error: {CONFIG_FILE} contains invalid JSON ({e}). Keeping the current config.")
+        return
+    if changed:
+        await apply_config()
+        print(f"Reloaded {'the shared config' if shared_state is not None else CONFIG_FILE} after it was edited")
+
+async def on_easter_eggs_changed(file_names=None):
+    await load_easter_eggs()
+
+file_watcher.watch(SOUND_FOLDER, lambda name: name.endswith('.mp3'), on_sound_files_changed)
+file_watcher.watch(BASE_DIR, lambda name: name == os.path.basename(CONFIG_FILE), on_config_changed)
+file_watcher.watch(BASE_DIR, lambda name: name == os.path.basename(EASTER_EGG_FILE), on_easter_eggs_changed)
+
+# Apply the file_watcher config section
+def apply_file_watcher_settings(config):
+    settings = config.get("file_watcher", {})
+    file_watcher.debounce = settings.get("debounce_seconds", WATCH_DEBOUNCE_SECONDS)
+    file_watcher.poll_interval = settings.get("poll_seconds", WATCH_POLL_SECONDS)
+
+apply_file_watcher_settings(config)
+
+'''
+ ____  _                   _ _               
+/ ___|| |__   __ _ _ __ __| (_)_ __   __ _ _ 
+\___ \| '_ \ / _` | '__/ _` | | '_ \ / _` (_)
+ ___) | | | | (_| | | | (_| | | | | | (_| |_ 
+|____/|_| |_|\__,_|_|  \__,_|_|_| |_|\__, (_)
+                                     |___/   
+'''
+# Defaults for the "sharding" section of config.json
+SHARDING_WORKERS = 2  # Worker processes; each runs an AutoShardedBot for its share of the shards
+SHARD_IDENTIFY_INTERVAL = 5.5  # Seconds between gateway logins in one rate limit bucket (Discord allows one per 5 s)
+SHARED_STATE_POLL_SECONDS = 1.0  # How often processes look for changes other processes made
+FIRE_CLAIM_RETENTION = timedelta(days=7)
+WORKER_RESTART_DELAY = 5.0
+
+DISCORD_GATEWAY_BOT_URL = "https://discord.com/api/v10/gateway/bot"
+
+# Guilds this process should fire a trigger in: all of them, or in a sharded deployment the ones it wins the claim for
+async def claim_guilds(trigger, fire_time, guilds):
+    guilds = list(guilds)
+    if shared_state is None or not guilds:
+        return guilds
+    won = await storage.run(shared_state.claim, trigger, fire_time, [guild.id for guild in guilds])
+    fire_claims.inc(len(won), result="won")
+    fire_claims.inc(len(guilds) - len(won), result="lost")
+    return [guild for guild in guilds if guild.id in won]
+
+# Wait for our turn to log a shard in, so workers starting at the same time stay within Discord's login rate limit
+async def shared_identify_hook(shard_id, *, initial=False):
+    delay = await storage.run(shared_state.reserve_identify, shard_id % SHARD_MAX_CONCURRENCY, SHARD_IDENTIFY_INTERVAL)
+    if delay > 0:
+        print(f"Shard {shard_id} waiting {delay:.1f}s for a login slot")
+        await asyncio.sleep(delay)
+
+if shared_state is not None:
+    bot.before_identify_hook = shared_identify_hook
+
+class SharedStateSync:
+    """
+    Applies changes other processes made to the shared state in a sharded worker.
+
+    Polls the document versions and, for each document that moved on, does what the file
+    watcher does for the matching file in a single-process bot. Our own writes come back too;
+    the handlers recognise them and do nothing.
+    """
+
+    def __init__(self, shared, poll_interval=SHARED_STATE_POLL_SECONDS):
+        self.shared = shared
+        self.poll_interval = poll_interval
+        self.versions = {}
+        self._task = None
+
+    def is_running(self):
+        return self._task is not None and not self._task.done()
+
+    async def start(self):
+        if self.is_running():
+            return
+        self.versions = await storage.run(self.shared.versions)
+        await self.load_auto_join_toggle()
+        self._task = asyncio.create_task(self.run())
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                versions = await storage.run(self.shared.versions)
+                # Config first: the sound list and eggs may depend on new settings
+                for name in ("config", "sounds", "easter_eggs", "auto_join"):
+                    if versions.get(name) != self.versions.get(name):
+                        self.versions[name] = versions.get(name)
+                        await self.apply(name)
+            except Exception as e:
+                print(f"Error syncing shared state: {e}")
+
+    async def apply(self, name):
+        if name == "config":
+            await on_config_changed()
+        elif name == "sounds":
+            await bot.loop.run_in_executor(None, sound_library.ingest)  # Already processed by the coordinator
+        elif name == "easter_eggs":
+            await on_easter_eggs_changed()
+        elif name == "auto_join":
+            await self.load_auto_join_toggle()
+
+    async def load_auto_join_toggle(self):
+        global auto_join_enabled
+        _, data = await storage.run(self.shared.get, "auto_join")
+        if data is not None:
+            auto_join_enabled = data["enabled"]
+
+shared_state_sync = SharedStateSync(shared_state) if shared_state is not None else None
+
+class ShardCoordinator:
+    """
+    Runs a sharded deployment: `python cheersbot.py` with sharding enabled starts this instead of the bot.
+
+    The shards are split round-robin over the worker processes, so each worker's shards fall in
+    different login rate limit buckets, and every worker is started at once; the shared login
+    slots (SharedState.reserve_identify) keep them within Discord's limit. A worker that exits is
+    restarted. The coordinator doesn't connect to Discord itself. It owns the files: config.json
+    and easter_eggs.json are copied into the shared state at start and whenever they are edited,
+    changes the workers make are written back to them, and new sounds are processed here once
+    instead of in every worker.
+    """
+
+    def __init__(self, token, settings):
+        self.token = token
+        self.settings = settings
+        self.shared = SharedState(SHARED_STATE_FILE)
+        self.processes = {}  # Worker number -> running process
+        self.mirrored = {}  # Document name -> data last copied between its file and the shared state
+        self.versions = {}  # Document name -> version mirror() last looked at
+        self.watcher = FileWatcher(file_watcher.debounce, file_watcher.poll_interval)
+        self.watcher.watch(SOUND_FOLDER, lambda name: name.endswith('.mp3'), self.on_sound_files_changed)
+        self.watcher.watch(
+            BASE_DIR, lambda name: name == os.path.basename(CONFIG_FILE),
+            lambda file_names: self.on_file_changed("config", CONFIG_FILE)
+        )
+        self.watcher.watch(
+            BASE_DIR, lambda name: name == os.path.basename(EASTER_EGG_FILE),
+            lambda file_names: self.on_file_changed("easter_eggs", EASTER_EGG_FILE)
+        )
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, sound_library.ingest)
+        await storage.run(self.seed)
+        shard_count, max_concurrency = await self.gateway_info()
+        workers = max(1, min(self.settings.get("workers", SHARDING_WORKERS), shard_count))
+        print(f"Running {shard_count} shard(s) in {workers} worker process(es), {max_concurrency} login(s) at a time")
+
+        self.watcher.start(load_or_create_config().get("file_watcher", {}).get("backend", "auto"))
+        tasks = [
+            self.supervise(worker, [shard_id for shard_id in range(shard_count) if shard_id % workers == worker], shard_count, max_concurrency)
+            for worker in range(workers)
+        ]
+        try:
+            await asyncio.gather(*tasks, self.mirror(), self.prune())
+        finally:
+            for process in self.processes.values():
+                if process.returncode is None:
+                    process.terminate()
+
+    def seed(self):
+        """Copies the files into the shared state; edits made while the bot was down win over what is there."""
+        try:
+            easter_eggs_data = read_easter_egg_file()
+            if easter_egg_journal.records:
+                easter_egg_journal.compact(easter_eggs_data)  # The workers keep the list in the shared state from now on
+        except FileNotFoundError:
+            easter_eggs_data = []
+        for name, data in (
+            ("config", config_store.edit()),
+            ("easter_eggs", easter_eggs_data),
+            ("sounds", self.sound_list())
+        ):
+            if self.shared.get(name)[1] != data:
+                self.shared.put(name, data)
+            self.mirrored[name] = data
+        if self.shared.get("auto_join")[1] is None:
+            self.shared.put("auto_join", {"enabled": auto_join_enabled})
+        self.versions = self.shared.versions()
+
+    async def gateway_info(self):
+        """Shard count (from the config, or Discord's recommendation) and how many shards may log in at once."""
+        async with aiohttp.ClientSession() as session:
+            async with session.get(DISCORD_GATEWAY_BOT_URL, headers={"Authorization": f"Bot {self.token}"}) as response:
+                response.raise_for_status()
+                info = await response.json()
+        shard_count = self.settings.get("shard_count") or info["shards"]
+        return shard_count, info["session_start_limit"]["max_concurrency"]
+
+    async def supervise(self, worker, shard_ids, shard_count, max_concurrency):
+        env = dict(
+            os.environ,
+            CHEERSBOT_WORKER=str(worker),
+            CHEERSBOT_SHARD_IDS=",".join(map(str, shard_ids)),
+            CHEERSBOT_SHARD_COUNT=str(shard_count),
+            CHEERSBOT_MAX_CONCURRENCY=str(max_concurrency)
+        )
+        while True:
+            process = await asyncio.create_subprocess_exec(sys.executable, os.path.abspath(__file__), env=env)
+            self.processes[worker] = process
+            print(f"Started worker {worker} (pid {process.pid}) for shard(s) {', '.join(map(str, shard_ids))}")
+            code = await process.wait()
+            print(f"Worker {worker} exited with code {code}, restarting it in {WORKER_RESTART_DELAY:g}s")
+            await asyncio.sleep(WORKER_RESTART_DELAY)
+
+    async def mirror(self):
+        """Writes changes the workers made to the config and the Easter eggs back to their files."""
+        versions = self.versions
+        while True:
+            await asyncio.sleep(SHARED_STATE_POLL_SECONDS)
+            try:
+                current = await storage.run(self.shared.versions)
+                for name, path in (("config", CONFIG_FILE), ("easter_eggs", EASTER_EGG_FILE)):
+                    if current.get(name) == versions.get(name):
+                        continue
+                    versions[name] = current.get(name)
+                    _, data = await storage.run(self.shared.get, name)
+                    if data != self.mirrored.get(name):
+                        self.mirrored[name] = data
+                        await storage.run(write_json_atomic, path, data)
+                        if name == "config":
+                            await self.on_config_changed(data)
+            except Exception as e:
+                print(f"Error mirroring shared state: {e}")
+
+    async def prune(self):
+        while True:
+            try:
+                pruned = await storage.run(self.shared.prune_claims, utc_now() - FIRE_CLAIM_RETENTION)
+                if pruned:
+                    print(f"Dropped {pruned} old fire claim(s)")
+            except Exception as e:
+                print(f"Error pruning fire claims: {e}")
+            await asyncio.sleep(3600)
+
+    # The processing settings may have changed; if so, process every sound again and tell the workers
+    async def on_config_changed(self, config):
+        settings_key = sound_library.settings_key()
+        sound_library.configure(config.get("sound_library", {}))
+        if sound_library.settings_key() != settings_key:
+            await asyncio.get_running_loop().run_in_executor(None, sound_library.ingest)
+            await storage.run(self.shared.put, "sounds", self.sound_list())
+
+    async def on_file_changed(self, name, path):
+        try:
+            data = await storage.run(read_json, path)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Error reading {path}, not passing it on to the workers: {e}")
+            return
+        if data == self.mirrored.get(name):
+            return  # Our own write
+        self.mirrored[name] = data
+        await storage.run(self.shared.put, name, data)
+        if name == "config":
+            await self.on_config_changed(data)
+        print(f"Passed edits to {path} on to the workers")
+
+    async def on_sound_files_changed(self, file_names):
+        added, removed = await asyncio.get_running_loop().run_in_executor(None, sound_library.update, file_names)
+        await storage.run(self.sync_sounds)
+        print(f"Sound folder changed: {len(added)} sound(s) added, {len(removed)} removed")
+
+    # Publish the new sound list, and update the shared config to match it in one write
+    def sync_sounds(self):
+        self.shared.put("sounds", self.sound_list())
+        _, config = self.shared.get("config")
+        synced = copy.deepcopy(config)
+        update_config_sounds(synced)
+        if synced != config:
+            self.shared.put("config", synced)
+
+    def sound_list(self):
+        return {"sounds": sorted(sound_library.names()), "settings": sound_library.settings_key()}
+
 '''
   ____        _                        _                              _     _                     _ _             
  | __ )  ___ | |_   _ __ ___  __ _  __| |_   _    _____   _____ _ __ | |_  | |__   __ _ _ __   __| | | ___ _ __ _ 
@@ -1194,26 +4563,96 @@ async def setlog(interaction: discord.Interaction, channel: discord.TextChannel)
  |____/ \___/ \__| |_|  \___|\__,_|\__,_|\__, |  \___| \_/ \___|_| |_|\__| |_| |_|\__,_|_| |_|\__,_|_|\___|_|  (_)
                                          |___/                                                                    
 '''
+# Runs once before the bot connects, so no command is served before the per-guild settings are in memory
+@bot.event
+async def setup_hook():
+    await storage.run(guild_settings.load)
+
 @bot.event
 async def on_ready():
-    load_easter_eggs()  # Load Easter Eggs
+    await bot.loop.run_in_executor(None, timezone_resolver.warm)  # Build the timezone index off the event loop
+    voice_channel_indexes.clear()  # The cache is rebuilt on (re)connect, so rebuild the indexes from it too
+    await bot.loop.run_in_executor(None, sound_library.ingest)  # Pre-encode new or changed sounds
+    await load_easter_eggs()  # Load Easter Eggs
+    await load_guild_easter_eggs()
     load_or_create_config()  # Load configuration
     await bot.tree.sync()  # Sync slash commands
-    easter_egg_task.start()  # Start the Easter egg task
+    easter_egg_scheduler.start()  # Start the Easter egg scheduler
+
+    log_sink.start()  # Start sending queued log events
+    ffmpeg_pool.start()  # Start warm FFmpeg decoders for sounds that aren't cached yet
+    play_history.start()  # Start writing play history
+    loop_lag_monitor.start()  # Start sampling event loop lag
+
+    metrics_settings = load_or_create_config().get("metrics", {})
+    if metrics_settings.get("enabled", True):
+        port = metrics_settings.get("port", METRICS_PORT)
+        if WORKER_ID is not None:
+            port += WORKER_ID + 1  # One endpoint per sharded worker
+        await metrics_server.start(metrics_settings.get("host", METRICS_HOST), port)
+
+    if shared_state_sync is not None:
+        await shared_state_sync.start()  # Follow config, sound, Easter egg and toggle changes from other processes
+    else:
+        watcher_settings = load_or_create_config().get("file_watcher", {})
+        if watcher_settings.get("enabled", True):
+            file_watcher.start(watcher_settings.get("backend", "auto"))  # Pick up sound, config and Easter egg edits
+
+    if not voice_channel_index_check.is_running():
+        voice_channel_index_check.start()
 
-    # Ensure the task is started but will respect the toggle
-    if not auto_join_task.is_running():
-        auto_join_task.start()
+    # Ensure the trigger is started but will respect the toggle
+    if auto_join_trigger is None or not auto_join_trigger.is_running():
+        restart_auto_join_trigger()
 
     print(f"Logged in as {bot.user} and slash commands are ready.")
 
-# Load the environment variables from .env file
-load_dotenv()
+# Keep the voice channel indexes in step with people joining, leaving and moving
+@bot.event
+async def on_voice_state_update(member, before, after):
+    if before.channel == after.channel:
+        return  # Mute, deafen, stream etc.
+    index = voice_channel_indexes.get(member.guild.id)
+    if index is None:
+        return  # Built from the cache on first use, which already includes this change
+    if before.channel is not None:
+        index.adjust(before.channel, -1)
+    if after.channel is not None:
+        index.adjust(after.channel, 1)
 
-# Get the bot token from the environment and run the bot
-BOT_TOKEN = os.getenv('DISCORD_BOT_TOKEN')
+@bot.event
+async def on_guild_channel_update(before, after):
+    index = voice_channel_indexes.get(after.guild.id)
+    if index is not None and isinstance(after, discord.VoiceChannel) and before.position != after.position:
+        index.set_count(after, index.counts.get(after.id, len(after.members)))
 
-if not BOT_TOKEN:
-    print("Error: Bot token not found in .env file.")
-else:
-    bot.run(BOT_TOKEN)
\ No newline at end of file
+@bot.event
+async def on_guild_channel_delete(channel):
+    index = voice_channel_indexes.get(channel.guild.id)
+    if index is not None:
+        index.remove(channel.id)
+
+@bot.event
+async def on_guild_update(before, after):
+    if before.afk_channel != after.afk_channel:
+        voice_channel_indexes.pop(after.id, None)  # Rebuilt with the new AFK channel on next use
+
+@bot.event
+async def on_guild_remove(guild):
+    voice_channel_indexes.pop(guild.id, None)
+
+# Only start the bot when run directly, so benchmark.py can import this file
+if __name__ == "__main__":
+    # Load the environment variables from .env file
+    load_dotenv()
+
+    # Get the bot token from the environment and run the bot
+    BOT_TOKEN = os.getenv('DISCORD_BOT_TOKEN')
+
+    sharding_settings = load_or_create_config().get("sharding", {})
+    if not BOT_TOKEN:
+        print("Error: Bot token not found in .env file.")
+    elif WORKER_ID is None and sharding_settings.get("enabled", False):
+        asyncio.run(ShardCoordinator(BOT_TOKEN, sharding_settings).run())
+    else:
+        bot.run(BOT_TOKEN)
\ No newline at end of file
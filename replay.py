@@ -0,0 +1,126 @@
+'''
+Replays CheersBot's schedules against a simulated clock and prints every fire they would make.
+
+Run with:
+    python replay.py                                  # this year, with easter_eggs.json and config.json
+    python replay.py --start 2025-03-01 --days 60 --output trace.txt
+    python replay.py --eggs other_eggs.json --lateness 90
+
+The real scheduling code runs (EasterEggScheduler.tick, EasterEgg.can_trigger, get_converted_time
+and the auto-join WallClockTrigger), but the clock jumps straight to the next fire time instead of
+sleeping, so a year takes seconds. Nothing joins a voice channel and nothing is written back to the
+Easter egg file. The trace only depends on the inputs, so traces from two versions can be diffed.
+'''
+
+import argparse
+import asyncio
+import contextlib
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+with contextlib.redirect_stdout(sys.stderr):  # Keep the paths the bot prints on import out of the trace
+    import cheersbot
+    from benchmark import SimulatedClock
+
+def format_time(when):
+    return when.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+class Trace:
+    """Writes one line per fire (or batch of missed runs), in order."""
+
+    def __init__(self, out):
+        self.out = out
+        self.lines = 0
+
+    def easter_egg(self, fire_time, lateness, easter_egg):
+        tz = cheersbot.timezone_resolver.resolve(easter_egg.timezone)
+        local = fire_time.astimezone(tz)
+        converted = easter_egg.get_converted_time()  # The bot's "today's join time" at the moment of firing
+        self._write(
+            f"{format_time(fire_time)}  easter_egg  {easter_egg.name!r}  "
+            f"local={local:%Y-%m-%d %H:%M %Z}  late={lateness:.0f}s  "
+            f"converted={format_time(converted) if converted else 'none'}"
+        )
+
+    def auto_join(self, fire_time, lateness):
+        self._write(f"{format_time(fire_time)}  auto_join  late={lateness:.0f}s")
+
+    def missed(self, kind, count, now):
+        self._write(f"{format_time(now)}  {kind}  missed={count}")
+
+    def _write(self, line):
+        self.lines += 1
+        print(line, file=self.out)
+
+async def replay(eggs, start, end, lateness, trace):
+    clock = SimulatedClock(start)
+    cheersbot.utc_now = clock  # get_converted_time and can_trigger read the clock through utc_now
+    cheersbot.save_easter_eggs = lambda: None  # Never write last_triggered back to the real file
+    cheersbot.journal_easter_eggs = lambda eggs, deleted=False: None  # ... or to its journal
+
+    scheduler = cheersbot.EasterEggScheduler(clock=clock, lead=cheersbot.easter_egg_scheduler.lead)
+    scheduler.reschedule_all(eggs)
+
+    async def record_auto_join(fire_time, late):
+        trace.auto_join(fire_time, late)
+
+    trigger = cheersbot.create_auto_join_trigger(callback=record_auto_join, clock=clock)
+    auto_join_fire = trigger.schedule.next_after(clock())
+
+    # Same steps as WallClockTrigger.run and EasterEggScheduler.run, minus the sleeping
+    while True:
+        egg_fire = scheduler.next_fire_time()
+        egg_wake = egg_fire - scheduler.lead if egg_fire is not None else None
+        if egg_wake is not None and egg_wake < auto_join_fire:
+            if egg_wake > end:
+                break
+            clock.set(egg_wake + timedelta(seconds=lateness))
+            for fire_time, easter_egg in scheduler.tick():
+                trace.easter_egg(fire_time, (clock() - (fire_time - scheduler.lead)).total_seconds(), easter_egg)
+        else:
+            if auto_join_fire > end:
+                break
+            clock.set(auto_join_fire + timedelta(seconds=lateness))
+            missed = trigger.missed
+            await trigger.fire(auto_join_fire)
+            auto_join_fire = trigger.next_fire_time(auto_join_fire)
+            if trigger.missed > missed:
+                trace.missed("auto_join", trigger.missed - missed, clock())
+
+def load_eggs(path):
+    return cheersbot.parse_easter_eggs(cheersbot.read_json(path))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay CheersBot's schedules against a simulated clock.")
+    parser.add_argument("--eggs", default=cheersbot.EASTER_EGG_FILE, help="Easter egg file to replay.")
+    parser.add_argument("--start", help="UTC start date (YYYY-MM-DD); defaults to 1 January this year.")
+    parser.add_argument("--days", type=int, default=365, help="How many days to simulate.")
+    parser.add_argument("--lateness", type=float, default=0.0, help="Seconds late every wake-up happens, to exercise the missed-run handling.")
+    parser.add_argument("--output", help="Write the trace here instead of to stdout.")
+    args = parser.parse_args()
+
+    if args.start:
+        start = cheersbot.pytz.utc.localize(datetime.strptime(args.start, "%Y-%m-%d"))
+    else:
+        start = cheersbot.pytz.utc.localize(datetime(cheersbot.utc_now().year, 1, 1))
+    end = start + timedelta(days=args.days)
+
+    out = open(args.output, "w") if args.output else sys.stdout
+    trace = Trace(out)
+    began = time.perf_counter()
+    # The trace keeps the real stdout; the bot's own console output is dropped
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        cheersbot.timezone_resolver.warm()
+        eggs = load_eggs(args.eggs)
+        asyncio.run(replay(eggs, start, end, args.lateness, trace))
+    elapsed = time.perf_counter() - began
+    if args.output:
+        out.close()
+
+    print(
+        f"Replayed {args.days} days from {start:%Y-%m-%d} with {len(eggs)} Easter egg(s): "
+        f"{trace.lines} line(s) in {elapsed:.2f}s",
+        file=sys.stderr
+    )
@@ -0,0 +1,15 @@
+'''
+Shared setup for the tests: makes cheersbot importable from the repository root.
+
+Importing cheersbot loads config.json the way startup does (see Benchmarks in the README);
+the tests themselves only write to pytest's temporary folders.
+'''
+
+import contextlib
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+with contextlib.redirect_stdout(sys.stderr):  # Keep the paths the bot prints on import out of the test output
+    import cheersbot  # noqa: F401
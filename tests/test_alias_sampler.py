@@ -0,0 +1,90 @@
+'''
+AliasSampler and SoundPicker: draws follow the configured weights, one at a time and in batches.
+'''
+
+import os
+import random
+from collections import Counter
+
+import pytest
+
+import cheersbot
+
+WEIGHTS = {"cheers": 50, "420": 30, "airhorn": 15, "quiet": 5}
+DRAWS = 200_000
+TOLERANCE = 0.01  # Absolute difference allowed between a drawn and a configured share
+
+
+def assert_matches_weights(picks, weights):
+    counts = Counter(picks)
+    total = sum(weights.values())
+    for item, weight in weights.items():
+        assert counts[item] / len(picks) == pytest.approx(weight / total, abs=TOLERANCE), item
+    assert set(counts) <= set(weights)
+
+
+def test_draw_follows_weights():
+    sampler = cheersbot.AliasSampler(WEIGHTS, WEIGHTS.values())
+    rng = random.Random(1)
+
+    assert_matches_weights([sampler.draw(rng) for _ in range(DRAWS)], WEIGHTS)
+
+
+def test_draw_many_follows_weights_with_numpy():
+    np = pytest.importorskip("numpy")
+    sampler = cheersbot.AliasSampler(WEIGHTS, WEIGHTS.values())
+
+    assert_matches_weights(sampler.draw_many(DRAWS, np.random.default_rng(1)), WEIGHTS)
+
+
+def test_draw_many_follows_weights_without_numpy(monkeypatch):
+    monkeypatch.setattr(cheersbot, "np", None)
+    sampler = cheersbot.AliasSampler(WEIGHTS, WEIGHTS.values())
+    random.seed(1)
+
+    assert_matches_weights(sampler.draw_many(DRAWS), WEIGHTS)
+
+
+def test_tiny_weights_are_rare_but_possible():
+    # The 0.001 weight percent mode gives every sound but the chosen one
+    weights = {"chosen": 100, "other": 0.001}
+    sampler = cheersbot.AliasSampler(weights, weights.values())
+    rng = random.Random(1)
+
+    picks = Counter(sampler.draw(rng) for _ in range(DRAWS))
+    assert picks["other"] / DRAWS < 0.0001
+    assert sampler.probability[list(weights).index("other")] == pytest.approx(2 * 0.001 / 100.001)
+
+
+def test_no_weight_draws_the_first_item_or_nothing():
+    assert cheersbot.AliasSampler(["a", "b"], [0, 0]).draw() == "a"
+    assert cheersbot.AliasSampler([], []).draw() is None
+    assert cheersbot.AliasSampler([], []).draw_many(3) == [None, None, None]
+
+
+def test_percent_mode_picker_skips_disabled_sounds():
+    config = {
+        "mode": "percent", "default_sound": "cheers", "sounds": WEIGHTS,
+        "sound_status": {"airhorn": False}
+    }
+    picker = cheersbot.SoundPicker(config, list(WEIGHTS))
+    enabled = {sound: weight for sound, weight in WEIGHTS.items() if sound != "airhorn"}
+
+    assert_matches_weights(picker.choose_many(DRAWS), enabled)
+
+
+def test_choose_sounds_uses_each_guilds_picker(tmp_path, monkeypatch):
+    store = cheersbot.GuildSettingsStore(str(tmp_path / "guild_settings.db"))
+    store.load()
+    monkeypatch.setattr(cheersbot, "guild_settings", store)
+    single_sound = cheersbot.get_available_sounds()[0]
+    settings = store.edit(2)
+    settings["mode"] = "single"
+    settings["default_sound"] = single_sound
+    store.commit(2, settings)
+
+    sounds = cheersbot.choose_sounds([1, 2, 3])
+
+    assert set(sounds) == {1, 2, 3}
+    assert sounds[2] == os.path.join(cheersbot.SOUND_FOLDER, single_sound + ".mp3")
+    assert all(sound is None or sound.endswith(".mp3") for sound in sounds.values())
@@ -0,0 +1,73 @@
+'''
+CronSchedule: the auto-join schedule is evaluated in UTC, so DST changes in any timezone never move it.
+'''
+
+from datetime import datetime, timedelta
+
+import pytest
+import pytz
+
+import cheersbot
+
+UTC = pytz.utc
+BERLIN = pytz.timezone("Europe/Berlin")
+NEW_YORK = pytz.timezone("America/New_York")
+
+
+# The next `count` instants of a schedule after `start`
+def instants(schedule, start, count):
+    moments = []
+    moment = start
+    for _ in range(count):
+        moment = schedule.next_after(moment)
+        moments.append(moment)
+    return moments
+
+
+@pytest.mark.parametrize("start", [
+    BERLIN.localize(datetime(2026, 3, 28, 22, 0)),   # Spring forward in Europe, 2026-03-29 02:00 local
+    BERLIN.localize(datetime(2026, 10, 24, 22, 0)),  # Fall back in Europe, 2026-10-25 03:00 local
+    NEW_YORK.localize(datetime(2026, 3, 7, 22, 0)),  # Spring forward in the US, 2026-03-08 02:00 local
+    NEW_YORK.localize(datetime(2026, 10, 31, 22, 0)),  # Fall back in the US, 2026-11-01 02:00 local
+])
+def test_hourly_schedule_stays_hourly_across_dst(start):
+    moments = instants(cheersbot.CronSchedule("15 * * * *"), start, 48)
+
+    assert all(moment.tzinfo is UTC and moment.minute == 15 for moment in moments)
+    assert all(later - earlier == timedelta(hours=1) for earlier, later in zip(moments, moments[1:]))
+
+
+def test_daily_schedule_keeps_its_utc_time_across_dst():
+    moments = instants(cheersbot.CronSchedule("0 9 * * *"), NEW_YORK.localize(datetime(2026, 3, 6, 12, 0)), 4)
+
+    assert moments == [UTC.localize(datetime(2026, 3, day, 9, 0)) for day in (7, 8, 9, 10)]
+
+
+@pytest.mark.parametrize("is_dst, expected", [
+    (True, datetime(2026, 11, 1, 5, 45)),   # 01:30 EDT is 05:30 UTC
+    (False, datetime(2026, 11, 1, 6, 45)),  # 01:30 EST, an hour later, is 06:30 UTC
+])
+def test_ambiguous_local_time_is_converted_before_matching(is_dst, expected):
+    after = NEW_YORK.localize(datetime(2026, 11, 1, 1, 30), is_dst=is_dst)
+
+    assert cheersbot.CronSchedule("45 * * * *").next_after(after) == UTC.localize(expected)
+
+
+def test_next_after_is_strictly_after():
+    schedule = cheersbot.CronSchedule("15 * * * *")
+
+    assert schedule.next_after(UTC.localize(datetime(2026, 1, 1, 10, 15))) == UTC.localize(datetime(2026, 1, 1, 11, 15))
+    assert schedule.next_after(UTC.localize(datetime(2026, 1, 1, 10, 14, 59))) == UTC.localize(datetime(2026, 1, 1, 10, 15))
+
+
+def test_restricted_day_and_weekday_match_either():
+    # The 13th, or any Friday (cron's day-of-month / day-of-week rule)
+    moments = instants(cheersbot.CronSchedule("0 12 13 * 5"), UTC.localize(datetime(2026, 4, 1)), 4)
+
+    assert [moment.day for moment in moments] == [3, 10, 13, 17]  # The 13th is a Monday
+
+
+@pytest.mark.parametrize("expression", ["15 * * *", "60 * * * *", "*/0 * * * *", "0 0 31 2 *"])
+def test_invalid_schedules_raise(expression):
+    with pytest.raises(ValueError):
+        cheersbot.CronSchedule(expression).next_after(UTC.localize(datetime(2026, 1, 1)))
@@ -0,0 +1,109 @@
+'''
+EasterEggJournal: replaying records, cutting off damaged lines, and compaction followed by replay.
+'''
+
+import json
+import os
+import zlib
+from datetime import datetime
+
+import pytest
+
+import cheersbot
+
+
+@pytest.fixture
+def journal(tmp_path, monkeypatch):
+    journal = cheersbot.EasterEggJournal(str(tmp_path / "easter_eggs.journal"), str(tmp_path / "easter_eggs.json"))
+    monkeypatch.setattr(cheersbot, "easter_egg_journal", journal)
+    monkeypatch.setattr(cheersbot, "EASTER_EGG_FILE", journal.snapshot_path)
+    return journal
+
+
+def entry(name, last_triggered=None):
+    return {"name": name, "sound": "cheers_bitch", "join_time": "4:20 PM", "play_delay": 0,
+            "timezone": "UTC", "enabled": True, "last_triggered": last_triggered}
+
+
+def egg(name, last_triggered=None):
+    egg = cheersbot.parse_easter_eggs([entry(name)])[0]
+    egg.last_triggered = last_triggered
+    return egg
+
+
+# Queue records through the bot's own entry point and write them out
+def record(journal, eggs, deleted=False):
+    cheersbot.journal_easter_eggs(eggs, deleted=deleted)
+    journal.flush()
+
+
+def test_replay_applies_fires_and_deletes(journal):
+    journal.compact([entry("A"), entry("B")])
+    record(journal, [egg("A", datetime(2026, 1, 1, 16, 20))])
+    record(journal, [egg("B")], deleted=True)
+
+    assert cheersbot.read_easter_egg_file() == [entry("A", "2026-01-01T16:20:00")]
+
+
+def test_torn_last_line_is_dropped_and_cut_off(journal):
+    journal.compact([entry("A")])
+    record(journal, [egg("A", datetime(2026, 1, 1, 16, 20))])
+    intact_size = os.path.getsize(journal.path)
+    with open(journal.path, "ab") as f:
+        f.write(b'0badc0de {"op":"fired","na')  # A crash in the middle of an append
+
+    assert [r["op"] for r in journal.read()] == ["fired"]
+    assert os.path.getsize(journal.path) == intact_size
+
+
+def test_crc_mismatch_on_last_line_is_dropped(journal):
+    journal.compact([entry("A")])
+    record(journal, [egg("A", datetime(2026, 1, 1, 16, 20))])
+    intact_size = os.path.getsize(journal.path)
+    line = json.dumps({"op": "delete", "name": "A", "base": entry("A")}, separators=(",", ":")).encode()
+    with open(journal.path, "ab") as f:
+        f.write(b"%08x %s\n" % (zlib.crc32(line) ^ 1, line))
+
+    assert cheersbot.read_easter_egg_file() == [entry("A", "2026-01-01T16:20:00")]
+    assert os.path.getsize(journal.path) == intact_size
+
+
+def test_lines_end_in_a_bare_newline(journal):
+    journal.compact([entry("A")])
+    record(journal, [egg("A", datetime(2026, 1, 1, 16, 20))])
+
+    with open(journal.path, "rb") as f:
+        assert b"\r" not in f.read()
+
+
+def test_compaction_then_replay(journal):
+    journal.compact([entry("A"), entry("B")])
+    record(journal, [egg("A", datetime(2026, 1, 1, 16, 20))])
+    journal.compact(cheersbot.read_easter_egg_file(), journal.seq)
+    assert journal.read() == []
+
+    record(journal, [egg("A", datetime(2026, 1, 2, 16, 20))])
+    record(journal, [egg("B")], deleted=True)
+
+    assert cheersbot.read_easter_egg_file() == [entry("A", "2026-01-02T16:20:00")]
+
+
+def test_replay_after_a_crash_between_snapshot_and_truncate(journal):
+    journal.compact([entry("A"), entry("B")])
+    record(journal, [egg("A", datetime(2026, 1, 1, 16, 20))])
+    record(journal, [egg("B")], deleted=True)
+    # The snapshot already holds the records, but the journal wasn't emptied yet
+    cheersbot.write_json_atomic(journal.snapshot_path, [entry("A", "2026-01-01T16:20:00")])
+
+    assert cheersbot.read_easter_egg_file() == [entry("A", "2026-01-01T16:20:00")]
+
+
+def test_hand_edits_win_over_pending_records(journal):
+    journal.compact([entry("A", "2026-01-01T16:20:00"), entry("B")])
+    record(journal, [egg("A", datetime(2026, 1, 2, 16, 20))])
+    record(journal, [egg("B")], deleted=True)
+    # A reset by hand, B changed by hand while the records were still pending
+    edited_b = dict(entry("B"), sound="other")
+    cheersbot.write_json_atomic(journal.snapshot_path, [entry("A"), edited_b])
+
+    assert cheersbot.read_easter_egg_file() == [entry("A"), edited_b]